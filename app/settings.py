@@ -1,3 +1,4 @@
+import json
 import os
 
 from pathlib import Path
@@ -24,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "payouts.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -61,6 +63,34 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "OPTIONS": {},
+    }
+}
+
+# Пул соединений psycopg в каждом процессе gunicorn и воркера Celery. Размер пула задается
+# на процесс: в сумме по всем процессам он не должен превышать max_connections PostgreSQL
+DB_POOL = os.getenv("DB_POOL", "True") == "True"
+# Проверка соединения перед использованием: для пула Django передает ее в ConnectionPool(check=...),
+# разорванные соединения заменяются новыми
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "4")),
+        # Соединения пересоздаются после max_lifetime секунд и закрываются после max_idle простоя
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        # Ожидание свободного соединения, после которого запрос завершается ошибкой
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_CACHE_URL", "redis://localhost:6379/1"),
     }
 }
 
@@ -104,8 +134,42 @@ CELERY_CACHE_BACKEND = "django-cache"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
-CELERY_RESULT_EXTENDED = True
+# Полные результаты задач не сохраняются, итог обработки заявки хранит PAYOUTS_TASK_RESULTS
+CELERY_TASK_IGNORE_RESULT = os.getenv("CELERY_TASK_IGNORE_RESULT", "True") == "True"
+CELERY_RESULT_EXTENDED = False
 CELERY_TIMEZONE = TIME_ZONE
+# Celery закрывает соединения с базой после каждой задачи, а с пулом - и сам пул.
+# Пул закрывается раз в 2 * CELERY_DB_REUSE_MAX задач, соединение возвращается
+# в пул после каждой задачи (payouts/db_pool.py)
+CELERY_DB_REUSE_MAX = int(os.getenv("CELERY_DB_REUSE_MAX", "1000")) if DB_POOL else None
+# Приоритеты сообщений внутри очереди для брокера Redis
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+    "sep": ":",
+}
+CELERY_BEAT_SCHEDULE = {
+    "prune-idempotency-keys": {
+        "task": "payouts.tasks.prune_idempotency_keys_task",
+        "schedule": 60 * 60,
+    },
+    "prune-outbox": {
+        "task": "payouts.tasks.prune_outbox_task",
+        "schedule": 60 * 60,
+    },
+    "prune-task-results": {
+        "task": "payouts.tasks.prune_task_results_task",
+        "schedule": 60 * 60,
+    },
+    "sweep-stale-payouts": {
+        "task": "payouts.tasks.sweep_stale_payouts_task",
+        "schedule": 60 * 60,
+    },
+    "create-payout-partitions": {
+        "task": "payouts.tasks.create_payout_partitions_task",
+        "schedule": 24 * 60 * 60,
+    },
+}
 
 # DRF Settings
 REST_FRAMEWORK = {
@@ -115,12 +179,150 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "payouts.renderers.OrjsonRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
+        "payouts.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "payouts.parsers.OrjsonParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "payouts.parsers.MessagePackParser",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Payouts Settings
+PAYOUTS_BULK_MAX_SIZE = int(os.getenv("PAYOUTS_BULK_MAX_SIZE", "10000"))
+PAYOUTS_EXPORT_CHUNK_SIZE = int(os.getenv("PAYOUTS_EXPORT_CHUNK_SIZE", "2000"))
+# Срок хранения ключей идемпотентности (Idempotency-Key) в секундах
+PAYOUTS_IDEMPOTENCY_TTL = int(os.getenv("PAYOUTS_IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+# Режим обработки: single - задача на каждую заявку, batch - пакетный захват заявок воркером
+PAYOUTS_PROCESSING_MODE = os.getenv("PAYOUTS_PROCESSING_MODE", "single")
+PAYOUTS_BATCH_SIZE = int(os.getenv("PAYOUTS_BATCH_SIZE", "100"))
+PAYOUTS_BATCH_INTERVAL = float(os.getenv("PAYOUTS_BATCH_INTERVAL", "5"))
+# Банковский шлюз и число одновременных банковских вызовов в пакетном режиме
+PAYOUTS_BANK_GATEWAY = {
+    "BACKEND": os.getenv("PAYOUTS_BANK_GATEWAY_BACKEND", "payouts.gateways.StubBankGateway"),
+    "OPTIONS": {
+        "min_latency": float(os.getenv("PAYOUTS_STUB_GATEWAY_MIN_LATENCY", "2")),
+        "max_latency": float(os.getenv("PAYOUTS_STUB_GATEWAY_MAX_LATENCY", "5")),
+        "error_rate": float(os.getenv("PAYOUTS_STUB_GATEWAY_ERROR_RATE", "0.1")),
+    },
+}
+PAYOUTS_BANK_CONCURRENCY = int(os.getenv("PAYOUTS_BANK_CONCURRENCY", "50"))
+# Хранилище итогов обработки заявок: DatabaseResultStore или RedisResultStore
+PAYOUTS_TASK_RESULTS = {
+    "BACKEND": os.getenv(
+        "PAYOUTS_TASK_RESULTS_BACKEND", "payouts.task_results.DatabaseResultStore"
+    ),
+    "OPTIONS": {},
+}
+if PAYOUTS_TASK_RESULTS["BACKEND"].endswith("RedisResultStore"):
+    PAYOUTS_TASK_RESULTS["OPTIONS"]["url"] = os.getenv(
+        "REDIS_CACHE_URL", "redis://localhost:6379/1"
+    )
+# Срок хранения итогов обработки в секундах и размер порции при их удалении
+PAYOUTS_TASK_RESULTS_TTL = int(os.getenv("PAYOUTS_TASK_RESULTS_TTL", str(7 * 24 * 60 * 60)))
+PAYOUTS_TASK_RESULTS_PRUNE_BATCH_SIZE = int(
+    os.getenv("PAYOUTS_TASK_RESULTS_PRUNE_BATCH_SIZE", "1000")
+)
+# Секционирование заявок по месяцам: сколько месяцев создавать вперед, сколько хранить
+# и в скольких последних месяцах воркеры ищут активные заявки
+PAYOUTS_PARTITION_PREMAKE_MONTHS = int(os.getenv("PAYOUTS_PARTITION_PREMAKE_MONTHS", "3"))
+PAYOUTS_PARTITION_RETENTION_MONTHS = int(os.getenv("PAYOUTS_PARTITION_RETENTION_MONTHS", "24"))
+PAYOUTS_PARTITION_ACTIVE_MONTHS = int(os.getenv("PAYOUTS_PARTITION_ACTIVE_MONTHS", "2"))
+# Архив завершенных заявок: каталог или URI объектного хранилища и возраст переноса в днях
+PAYOUTS_ARCHIVE_URI = os.getenv("PAYOUTS_ARCHIVE_URI", str(BASE_DIR / "archive"))
+PAYOUTS_ARCHIVE_AFTER_DAYS = int(os.getenv("PAYOUTS_ARCHIVE_AFTER_DAYS", "365"))
+PAYOUTS_ARCHIVE_BATCH_SIZE = int(os.getenv("PAYOUTS_ARCHIVE_BATCH_SIZE", "5000"))
+# Потоки SSE с изменениями статусов: интервал комментариев-пингов, время жизни потока
+# (после него клиент переподключается) и число заявок в одном потоке
+PAYOUTS_EVENTS_HEARTBEAT_INTERVAL = float(os.getenv("PAYOUTS_EVENTS_HEARTBEAT_INTERVAL", "15"))
+PAYOUTS_EVENTS_MAX_DURATION = float(os.getenv("PAYOUTS_EVENTS_MAX_DURATION", "300"))
+PAYOUTS_EVENTS_MAX_IDS = int(os.getenv("PAYOUTS_EVENTS_MAX_IDS", "100"))
+# Лимит частоты вызовов и выключатель по БИК банка получателя, состояние общее для воркеров
+PAYOUTS_BANK_LIMITER = {
+    "BACKEND": os.getenv("PAYOUTS_BANK_LIMITER_BACKEND", "payouts.bank_limits.RedisBankLimiter"),
+    "OPTIONS": {
+        "url": os.getenv("REDIS_CACHE_URL", "redis://localhost:6379/1"),
+        "rate": float(os.getenv("PAYOUTS_BANK_RATE", "50")),
+        "burst": int(os.getenv("PAYOUTS_BANK_BURST", "100")),
+        "failure_threshold": int(os.getenv("PAYOUTS_BANK_FAILURE_THRESHOLD", "5")),
+        "open_seconds": float(os.getenv("PAYOUTS_BANK_OPEN_SECONDS", "30")),
+        "probe_timeout": float(os.getenv("PAYOUTS_BANK_PROBE_TIMEOUT", "60")),
+    },
+}
+# Повторные попытки после ошибки банка: число попыток до FAILED и экспоненциальная задержка
+# в секундах; задержка хранится в заявке (next_attempt_at), а не в отложенных сообщениях брокера
+PAYOUTS_RETRY_MAX_ATTEMPTS = int(os.getenv("PAYOUTS_RETRY_MAX_ATTEMPTS", "5"))
+PAYOUTS_RETRY_BASE_DELAY = float(os.getenv("PAYOUTS_RETRY_BASE_DELAY", "30"))
+PAYOUTS_RETRY_MAX_DELAY = float(os.getenv("PAYOUTS_RETRY_MAX_DELAY", str(60 * 60)))
+PAYOUTS_RETRY_SWEEP_INTERVAL = float(os.getenv("PAYOUTS_RETRY_SWEEP_INTERVAL", "5"))
+PAYOUTS_RETRY_SWEEP_BATCH_SIZE = int(os.getenv("PAYOUTS_RETRY_SWEEP_BATCH_SIZE", "500"))
+# Через сколько секунд опубликованная повторно, но не захваченная заявка публикуется снова
+PAYOUTS_RETRY_REDELIVERY_TIMEOUT = float(os.getenv("PAYOUTS_RETRY_REDELIVERY_TIMEOUT", "300"))
+# Аренда захваченных заявок воркером: срок, интервал продления во время банковского вызова
+# и периодический возврат в очередь заявок с истекшей арендой
+PAYOUTS_LEASE_DURATION = float(os.getenv("PAYOUTS_LEASE_DURATION", "120"))
+PAYOUTS_LEASE_HEARTBEAT_INTERVAL = float(os.getenv("PAYOUTS_LEASE_HEARTBEAT_INTERVAL", "30"))
+PAYOUTS_LEASE_RECOVERY_INTERVAL = float(os.getenv("PAYOUTS_LEASE_RECOVERY_INTERVAL", "30"))
+PAYOUTS_LEASE_RECOVERY_BATCH_SIZE = int(os.getenv("PAYOUTS_LEASE_RECOVERY_BATCH_SIZE", "500"))
+# Доставка заявок в брокер: outbox - через таблицу outbox и ретранслятор, direct - после коммита
+PAYOUTS_DISPATCH_MODE = os.getenv("PAYOUTS_DISPATCH_MODE", "outbox")
+PAYOUTS_OUTBOX_BATCH_SIZE = int(os.getenv("PAYOUTS_OUTBOX_BATCH_SIZE", "500"))
+PAYOUTS_OUTBOX_RELAY_INTERVAL = float(os.getenv("PAYOUTS_OUTBOX_RELAY_INTERVAL", "1"))
+# Срок хранения отправленных сообщений outbox в секундах
+PAYOUTS_OUTBOX_RETENTION = int(os.getenv("PAYOUTS_OUTBOX_RETENTION", str(7 * 24 * 60 * 60)))
+PAYOUTS_OUTBOX_PRUNE_BATCH_SIZE = int(os.getenv("PAYOUTS_OUTBOX_PRUNE_BATCH_SIZE", "1000"))
+# Очереди заявок: приоритет сообщений (в Redis 0 - наивысший) и параллельность воркера,
+# с которой его запускает run_payout_worker
+PAYOUTS_QUEUES = {
+    "payouts_urgent": {"priority": 0, "concurrency": 8},
+    "payouts_default": {"priority": 5, "concurrency": 4},
+    "payouts_bulk": {"priority": 9, "concurrency": 2},
+}
+PAYOUTS_DEFAULT_QUEUE = "payouts_default"
+# Правила маршрутизации проверяются по порядку, срабатывает первое подходящее. Условия:
+# min_amount (включительно), max_amount (не включая), currencies, biks (БИК банка получателя)
+PAYOUTS_QUEUE_ROUTES = json.loads(
+    os.getenv(
+        "PAYOUTS_QUEUE_ROUTES",
+        json.dumps(
+            [
+                {"queue": "payouts_urgent", "min_amount": "1000000"},
+                {"queue": "payouts_bulk", "max_amount": "1000"},
+            ]
+        ),
+    )
+)
+
+# Порт HTTP-экспортера метрик воркера Celery (0 - экспортер не запускается)
+PAYOUTS_METRICS_WORKER_PORT = int(os.getenv("PAYOUTS_METRICS_WORKER_PORT", "9100"))
+
+if PAYOUTS_PROCESSING_MODE == "batch":
+    CELERY_BEAT_SCHEDULE["process-payout-batch"] = {
+        "task": "payouts.tasks.process_payout_batch_task",
+        "schedule": PAYOUTS_BATCH_INTERVAL,
+    }
+else:
+    # В пакетном режиме заявки с наступившим сроком попытки захватывает пакетная задача
+    CELERY_BEAT_SCHEDULE["sweep-payout-retries"] = {
+        "task": "payouts.tasks.sweep_retries_task",
+        "schedule": PAYOUTS_RETRY_SWEEP_INTERVAL,
+    }
+
+CELERY_BEAT_SCHEDULE["recover-expired-leases"] = {
+    "task": "payouts.tasks.recover_expired_leases_task",
+    "schedule": PAYOUTS_LEASE_RECOVERY_INTERVAL,
+}
+
+if PAYOUTS_DISPATCH_MODE == "outbox":
+    CELERY_BEAT_SCHEDULE["relay-payout-outbox"] = {
+        "task": "payouts.tasks.relay_outbox_task",
+        "schedule": PAYOUTS_OUTBOX_RELAY_INTERVAL,
+    }
+
 # Spectacular Settings
 SPECTACULAR_SETTINGS = {
     "TITLE": "Payouts API",
@@ -40,6 +40,18 @@ CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 CELERY_RESULT_BACKEND = "cache+memory://"
 
+# Банковский шлюз-заглушка без задержки
+PAYOUTS_BANK_GATEWAY = {
+    "BACKEND": "payouts.gateways.StubBankGateway",
+    "OPTIONS": {"min_latency": 0, "max_latency": 0, "error_rate": 0.1},
+}
+
+# Лимиты банков в памяти процесса, без ограничения частоты
+PAYOUTS_BANK_LIMITER = {
+    "BACKEND": "payouts.bank_limits.LocalBankLimiter",
+    "OPTIONS": {"rate": 1_000_000, "burst": 1_000_000},
+}
+
 # Отключаем логирование для тестов
 LOGGING = {
     "version": 1,
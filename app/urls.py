@@ -5,6 +5,8 @@ from django.http import HttpResponse
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from payouts.metrics import metrics_view
+
 
 def ping(request):
     return HttpResponse("pong")
@@ -12,6 +14,7 @@ def ping(request):
 
 urlpatterns = [
     path("ping/", ping),
+    path("metrics", metrics_view, name="metrics"),
     path("admin/", admin.site.urls),
     path("", include("payouts.urls")),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -0,0 +1,10 @@
+from payouts.metrics import mark_process_dead, reset_multiprocess_dir
+
+
+def on_starting(server):
+    reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    # Значения завершившегося воркера объединяются в файлы live-процессов при сборе метрик
+    mark_process_dead(worker.pid)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from payouts.models import Payout, RecipientDetails
+from payouts.models import Payout, PayoutOutbox, PayoutTaskResult, RecipientDetails
 
 
 @admin.register(RecipientDetails)
@@ -16,14 +16,38 @@ class PayoutAdmin(admin.ModelAdmin):
     list_display = ("id", "amount", "currency", "status", "created_at", "recipient_name")
     list_filter = ("status", "currency", "created_at")
     search_fields = ("id", "recipient_details__full_name", "recipient_details__inn")
-    readonly_fields = ("id", "created_at", "updated_at")
+    readonly_fields = (
+        "id",
+        "created_at",
+        "updated_at",
+        "attempt_count",
+        "next_attempt_at",
+        "worker_id",
+        "lease_expires_at",
+    )
     fieldsets = (
         ("Основная информация", {"fields": ("id", "amount", "currency", "status", "description")}),
         ("Реквизиты получателя", {"fields": ("recipient_details",)}),
         ("Дополнительно", {"fields": ("created_at", "updated_at", "error_message")}),
+        ("Повторные попытки", {"fields": ("attempt_count", "next_attempt_at")}),
+        ("Аренда воркером", {"fields": ("worker_id", "lease_expires_at")}),
     )
 
     def recipient_name(self, obj):
         return obj.recipient_details.full_name
 
     recipient_name.short_description = "Получатель"
+
+
+@admin.register(PayoutOutbox)
+class PayoutOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "payout", "created_at", "sent_at")
+    list_filter = ("sent_at",)
+    readonly_fields = ("id", "payout", "created_at", "sent_at")
+
+
+@admin.register(PayoutTaskResult)
+class PayoutTaskResultAdmin(admin.ModelAdmin):
+    list_display = ("payout_id", "outcome", "finished_at")
+    list_filter = ("outcome",)
+    readonly_fields = ("payout_id", "outcome", "finished_at")
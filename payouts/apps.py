@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class PayoutsConfig(AppConfig):
     name = "payouts"
+
+    def ready(self):
+        # Подключение обработчиков сигналов Celery для метрик задач, записи итогов обработки
+        # и возврата соединений в пул
+        from payouts import db_pool, metrics, task_results  # noqa: F401, PLC0415
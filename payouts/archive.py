@@ -0,0 +1,222 @@
+"""
+Холодный архив завершенных заявок.
+
+Заявки в COMPLETED, FAILED и CANCELLED старше PAYOUTS_ARCHIVE_AFTER_DAYS переносятся
+из таблицы заявок в файлы Parquet со сжатием zstd вместе со снимком реквизитов
+получателя. Файлы раскладываются по месяцам создания заявок:
+<PAYOUTS_ARCHIVE_URI>/created_month=ГГГГ-ММ/<uuid>.parquet. URI - локальный путь
+или адрес объектного хранилища, поддерживаемый pyarrow (например, s3://bucket/payouts).
+
+Таблица ArchivedPayout хранит для каждой перенесенной заявки только путь к файлу,
+поэтому карточка заявки и выгрузка находят архивную заявку по id одним запросом
+к индексу и чтением одного файла.
+"""
+
+import uuid
+
+from collections import defaultdict
+from datetime import UTC, datetime
+from functools import cache
+from typing import Any, Iterable, Iterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from pyarrow.fs import FileSelector, FileSystem
+
+from payouts.exporters import EXPORT_COLUMNS
+from payouts.filters import match_row
+from payouts.models import ArchivedPayout, Payout, PayoutTaskResult
+from payouts.partitions import month_start
+
+
+FINAL_STATUSES = (Payout.Status.COMPLETED, Payout.Status.FAILED, Payout.Status.CANCELLED)
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# Колонки архива совпадают с именами полей .values(), которые читает карточка заявки
+SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("amount", pa.decimal128(12, 2)),
+        ("currency", pa.string()),
+        ("status", pa.string()),
+        ("description", pa.string()),
+        ("created_at", TIMESTAMP),
+        ("updated_at", TIMESTAMP),
+        ("error_message", pa.string()),
+        ("attempt_count", pa.int64()),
+        ("next_attempt_at", TIMESTAMP),
+        ("recipient_details__id", pa.string()),
+        ("recipient_details__full_name", pa.string()),
+        ("recipient_details__bank_name", pa.string()),
+        ("recipient_details__account_number", pa.string()),
+        ("recipient_details__inn", pa.string()),
+        ("recipient_details__kpp", pa.string()),
+        ("recipient_details__bik", pa.string()),
+        ("recipient_details__corr_account", pa.string()),
+    ]
+)
+UUID_COLUMNS = ("id", "recipient_details__id")
+
+# Колонки архива, по которым пересчитывается сводная статистика
+STATS_COLUMNS = ["id", "created_at", "currency", "status", "amount"]
+
+# Поля выгрузки, которые в архиве хранятся под другим именем
+EXPORT_ALIASES = {"recipient_details_id": "recipient_details__id"}
+
+
+@cache
+def get_filesystem() -> tuple[FileSystem, str]:
+    """Файловая система и корневой путь архива из PAYOUTS_ARCHIVE_URI."""
+    return FileSystem.from_uri(settings.PAYOUTS_ARCHIVE_URI)
+
+
+@receiver(setting_changed)
+def reset_filesystem(setting: str | None = None, **kwargs) -> None:
+    if setting in (None, "PAYOUTS_ARCHIVE_URI"):
+        get_filesystem.cache_clear()
+
+
+def write_file(rows: list[dict[str, Any]], month: str) -> str:
+    """Запись строк в новый файл месяца; возвращает путь относительно корня архива."""
+    filesystem, root = get_filesystem()
+    path = f"created_month={month}/{uuid.uuid4().hex}.parquet"
+    filesystem.create_dir(f"{root}/created_month={month}", recursive=True)
+    table = pa.Table.from_pylist(rows, schema=SCHEMA)
+    pq.write_table(table, f"{root}/{path}", filesystem=filesystem, compression="zstd")
+    return path
+
+
+def archive_batch(older_than: datetime, batch_size: int) -> int:
+    """
+    Перенос в архив до batch_size завершенных заявок, созданных раньше older_than.
+
+    Строки блокируются через SKIP LOCKED; файлы записываются до удаления строк
+    в той же транзакции, поэтому сбой оставляет заявку в таблице, а не теряет ее.
+    Повторный перенос после сбоя пишет новый файл, индекс указывает на последний.
+    """
+    with transaction.atomic():
+        rows = list(
+            Payout.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(status__in=FINAL_STATUSES, created_at__lt=older_than)
+            .order_by("created_at", "id")
+            .values(*SCHEMA.names)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        by_month: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            for column in UUID_COLUMNS:
+                row[column] = str(row[column])
+            by_month[f"{row['created_at']:%Y-%m}"].append(row)
+
+        index = []
+        for month, month_rows in by_month.items():
+            path = write_file(month_rows, month)
+            index.extend(ArchivedPayout(id=row["id"], path=path) for row in month_rows)
+
+        ids = [row["id"] for row in rows]
+        ArchivedPayout.objects.bulk_create(
+            index, update_conflicts=True, unique_fields=["id"], update_fields=["path"]
+        )
+        PayoutTaskResult.objects.filter(payout_id__in=ids).delete()
+        Payout.objects.filter(id__in=ids, created_at__lt=older_than).delete()
+    return len(rows)
+
+
+def read_archived(payout_ids: Iterable[Any]) -> list[dict[str, Any]]:
+    """Строки архивных заявок по id; заявки, которых нет в индексе архива, пропускаются."""
+    ids = []
+    for payout_id in payout_ids:
+        try:
+            ids.append(uuid.UUID(str(payout_id)))
+        except ValueError:
+            continue
+
+    by_path: dict[str, list[str]] = defaultdict(list)
+    for payout_id, path in ArchivedPayout.objects.filter(id__in=ids).values_list("id", "path"):
+        by_path[path].append(str(payout_id))
+
+    filesystem, root = get_filesystem()
+    rows = []
+    for path, path_ids in by_path.items():
+        table = pq.read_table(
+            f"{root}/{path}", filesystem=filesystem, filters=[("id", "in", path_ids)]
+        )
+        rows.extend(table.to_pylist())
+    return rows
+
+
+def read_archived_period(start: datetime, end: datetime) -> list[dict[str, Any]]:
+    """
+    Строки архивных заявок, созданных в [start, end), с колонками STATS_COLUMNS.
+
+    Читаются файлы месяцев периода; строки файлов, на которые не указывает индекс
+    архива (файл остался от прерванного переноса), пропускаются.
+    """
+    filesystem, root = get_filesystem()
+    rows = []
+    month = month_start(start.astimezone(UTC))
+    while month < end:
+        selector = FileSelector(f"{root}/created_month={month:%Y-%m}", allow_not_found=True)
+        for info in filesystem.get_file_info(selector):
+            table = pq.read_table(
+                info.path,
+                filesystem=filesystem,
+                columns=STATS_COLUMNS,
+                filters=[("created_at", ">=", start), ("created_at", "<", end)],
+            )
+            file_rows = {row["id"]: row for row in table.to_pylist()}
+            indexed = ArchivedPayout.objects.filter(
+                id__in=list(file_rows), path=info.path.removeprefix(f"{root}/")
+            ).values_list("id", flat=True)
+            rows.extend(file_rows[str(payout_id)] for payout_id in indexed)
+        month = month_start(month, 1)
+    return rows
+
+
+def archived_bounds() -> tuple[datetime, datetime] | None:
+    """
+    Самое раннее и самое позднее created_at архивных заявок или None, если архив пуст.
+
+    Месяцы границ берутся из путей индекса (created_month=ГГГГ-ММ/...), а created_at
+    читается только из файлов этих двух месяцев.
+    """
+    paths = ArchivedPayout.objects.aggregate(first=Min("path"), last=Max("path"))
+    if paths["first"] is None:
+        return None
+    created = []
+    for path in (paths["first"], paths["last"]):
+        month = datetime.strptime(path.split("/")[0], "created_month=%Y-%m").replace(tzinfo=UTC)
+        created.extend(
+            row["created_at"] for row in read_archived_period(month, month_start(month, 1))
+        )
+    return (min(created), max(created)) if created else None
+
+
+def get_archived(payout_id: Any) -> dict[str, Any] | None:
+    """Строка архивной заявки в формате .values() карточки заявки или None."""
+    rows = read_archived([payout_id])
+    return rows[0] if rows else None
+
+
+def iter_archived_export_rows(
+    payout_ids: Iterable[Any], filters: dict[str, Any] | None = None
+) -> Iterator[tuple]:
+    """
+    Строки архивных заявок в порядке колонок выгрузки EXPORT_COLUMNS.
+
+    filters - проверенные параметры фильтра (filters.validate_filters), которым
+    должны соответствовать строки, как и заявки из таблицы.
+    """
+    columns = [EXPORT_ALIASES.get(path, path) for path in EXPORT_COLUMNS.values()]
+    for row in read_archived(payout_ids):
+        if filters is None or match_row(row, filters):
+            yield tuple(row[column] for column in columns)
@@ -0,0 +1,226 @@
+"""
+Асинхронные обработчики горячих эндпоинтов для запуска под ASGI-сервером.
+
+Чтение выполняется асинхронным ORM Django. Создание заявки остается одной транзакцией
+в sync_to_async (асинхронных транзакций в Django нет), а публикация в брокер в режиме
+direct выполняется в пуле потоков после коммита, не блокируя цикл событий. Поток
+изменений статусов (payout_events) ждет уведомлений LISTEN/NOTIFY, не обращаясь к базе.
+"""
+
+import asyncio
+import uuid
+
+from functools import wraps
+from io import BytesIO
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    NotFound,
+    UnsupportedMediaType,
+    ValidationError,
+)
+
+from payouts import idempotency
+from payouts.archive import get_archived
+from payouts.models import Payout, RecipientDetails
+from payouts.parsers import MessagePackParser, OrjsonParser
+from payouts.renderers import OrjsonRenderer
+from payouts.routing import Route, route_payout
+from payouts.serializers import (
+    PayoutReadRepresentation,
+    PayoutSerializer,
+    RecipientDetailsSerializer,
+)
+from payouts.status_events import get_listener, payload_id, read_events, stream_events
+from payouts.tasks import DISPATCH_MODE_OUTBOX, enqueue_payouts, schedule_payouts
+
+
+STATUS_FIELDS = ["id", "status", "updated_at", "error_message", "attempt_count", "next_attempt_at"]
+
+renderer = OrjsonRenderer()
+parsers = {parser.media_type: parser for parser in (OrjsonParser(), MessagePackParser())}
+
+
+class EventsUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Уведомления об изменении статусов временно недоступны."
+    default_code = "events_unavailable"
+
+
+def render(data: Any, response_status: int = status.HTTP_200_OK) -> HttpResponse:
+    return HttpResponse(
+        renderer.render(data), status=response_status, content_type=renderer.media_type
+    )
+
+
+def api_view(view):
+    """Ошибки DRF (валидация, 404, 422) отдаются в том же формате, что и у синхронного API."""
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            return render(detail, exc.status_code)
+
+    return wrapper
+
+
+def parse_body(request: HttpRequest) -> Any:
+    """Разбор тела JSON или msgpack; пустое тело, как и в DRF, дает пустой словарь."""
+    if not request.body:
+        return {}
+    parser = parsers.get(request.content_type)
+    if parser is None:
+        raise UnsupportedMediaType(request.content_type)
+    encoding = request.encoding or settings.DEFAULT_CHARSET
+    return parser.parse(BytesIO(request.body), parser.media_type, {"encoding": encoding})
+
+
+def create_payout_sync(
+    data: Any, key: str | None, fingerprint: str | None
+) -> tuple[dict[str, Any], Route]:
+    """
+    Валидация и сохранение заявки с сообщением outbox и ключом идемпотентности в одной транзакции.
+
+    Возвращает ответ и маршрут заявки для публикации в режиме direct.
+    """
+    serializer = PayoutSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+
+    with transaction.atomic():
+        payout = serializer.save()
+        if settings.PAYOUTS_DISPATCH_MODE == DISPATCH_MODE_OUTBOX:
+            schedule_payouts([payout])
+        out = PayoutSerializer(payout).data
+        if key is not None:
+            idempotency.store(
+                key, fingerprint, status.HTTP_201_CREATED, renderer.render(out), renderer.media_type
+            )
+    return out, route_payout(payout)
+
+
+@csrf_exempt
+@require_POST
+@api_view
+async def create_payout(request: HttpRequest) -> HttpResponse:
+    """Создание заявки"""
+    data = parse_body(request)
+    key = idempotency.get_idempotency_key(request)
+    fingerprint = None
+    if key is not None:
+        fingerprint = idempotency.fingerprint(request.method, request.path, data)
+        stored = await sync_to_async(idempotency.lookup)(key)
+        if stored is not None:
+            return idempotency.replay(stored, fingerprint)
+
+    try:
+        out, route = await sync_to_async(create_payout_sync)(data, key, fingerprint)
+    except IntegrityError:
+        # Параллельный запрос с тем же ключом успел создать заявку первым
+        stored = await sync_to_async(idempotency.lookup)(key) if key is not None else None
+        if stored is None:
+            raise
+        return idempotency.replay(stored, fingerprint)
+
+    if settings.PAYOUTS_DISPATCH_MODE != DISPATCH_MODE_OUTBOX:
+        await sync_to_async(enqueue_payouts, thread_sensitive=False)([out["id"]], route)
+    return render(out, status.HTTP_201_CREATED)
+
+
+async def read_payout(representation: PayoutReadRepresentation, id) -> HttpResponse:
+    """Заявка из таблицы или, если ее там нет, из архива."""
+    try:
+        row = await representation.values(Payout.objects.all()).aget(id=id)
+    except Payout.DoesNotExist as exc:
+        # Заявка могла быть перенесена в архив
+        row = await sync_to_async(get_archived)(id)
+        if row is None:
+            raise NotFound() from exc
+    return render(representation.to_representation(row))
+
+
+@require_GET
+@api_view
+async def retrieve_payout(request: HttpRequest, id) -> HttpResponse:
+    """Карточка заявки, поддерживает параметр fields"""
+    return await read_payout(PayoutReadRepresentation.from_query_params(request.GET), id)
+
+
+@require_GET
+@api_view
+async def payout_status(request: HttpRequest, id) -> HttpResponse:
+    """Статус заявки для опроса клиентом"""
+    return await read_payout(PayoutReadRepresentation(STATUS_FIELDS), id)
+
+
+def parse_event_ids(values: list[str]) -> list[str]:
+    """id заявок из повторяющегося параметра id, не больше PAYOUTS_EVENTS_MAX_IDS."""
+    if not values:
+        raise ValidationError({"id": "Укажите хотя бы одну заявку."})
+    if len(values) > settings.PAYOUTS_EVENTS_MAX_IDS:
+        raise ValidationError({"id": f"Не больше {settings.PAYOUTS_EVENTS_MAX_IDS} заявок."})
+    try:
+        return list(dict.fromkeys(str(uuid.UUID(value)) for value in values))
+    except ValueError as exc:
+        raise ValidationError({"id": "Некорректный id заявки."}) from exc
+
+
+@require_GET
+@api_view
+async def payout_events(request: HttpRequest, id=None) -> HttpResponse:
+    """
+    Поток Server-Sent Events с изменениями статуса заявки (id в пути) или набора
+    заявок (повторяющийся параметр id).
+
+    Подписка оформляется до чтения текущих статусов, поэтому изменение между чтением
+    и подпиской не теряется. Несуществующие заявки пропускаются, если не найдена ни
+    одна - 404.
+    """
+    payout_ids = [str(id)] if id is not None else parse_event_ids(request.GET.getlist("id"))
+    listener = get_listener()
+    queue = listener.subscribe(payout_ids)
+    try:
+        try:
+            await asyncio.wait_for(
+                listener.ready.wait(), settings.PAYOUTS_EVENTS_HEARTBEAT_INTERVAL
+            )
+        except TimeoutError as exc:
+            raise EventsUnavailable() from exc
+        snapshot = await read_events(payout_ids)
+    except BaseException:
+        listener.unsubscribe(payout_ids, queue)
+        raise
+
+    found = [payload_id(payload) for payload in snapshot]
+    listener.unsubscribe(set(payout_ids) - set(found), queue)
+    if not found:
+        raise NotFound()
+
+    response = StreamingHttpResponse(
+        stream_events(listener, queue, found, snapshot), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx не буферизует поток и отдает события клиенту сразу
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+@api_view
+async def retrieve_recipient(request: HttpRequest, id) -> HttpResponse:
+    """Реквизиты получателя"""
+    try:
+        recipient = await RecipientDetails.objects.aget(id=id)
+    except RecipientDetails.DoesNotExist as exc:
+        raise NotFound() from exc
+    return render(RecipientDetailsSerializer(recipient).data)
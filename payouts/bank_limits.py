@@ -0,0 +1,201 @@
+"""
+Ограничение частоты вызовов и автоматический выключатель (circuit breaker) по банку получателя.
+
+Банк определяется по БИК получателя. Для каждого банка хранится состояние:
+
+- корзина токенов: не более rate вызовов в секунду с пиком до burst вызовов;
+- выключатель: после failure_threshold ошибок банка подряд вызовы не выполняются
+  open_seconds секунд, затем пропускается одна пробная заявка (половинчатое состояние):
+  успех замыкает выключатель, ошибка снова размыкает его.
+
+RedisBankLimiter делит состояние между всеми воркерами, LocalBankLimiter хранит его в памяти
+процесса и подходит для тестов и одиночного воркера.
+"""
+
+import logging
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from functools import cache
+from typing import Callable, TypeVar
+
+import redis
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "payouts:bank:"
+
+T = TypeVar("T")
+
+
+@dataclass
+class BankState:
+    """Состояние лимитов одного банка"""
+
+    tokens: float
+    updated_at: float
+    failures: int = 0
+    open_until: float = 0.0
+    probe_until: float = 0.0
+
+
+class BaseBankLimiter(ABC):
+    """Базовый интерфейс лимитов банков"""
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: int = 40,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        probe_timeout: float = 60.0,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.probe_timeout = probe_timeout
+
+    def acquire(self, bik: str) -> float:
+        """
+        Разрешение на вызов банка.
+
+        Возвращает 0, если вызов можно выполнять сейчас, иначе число секунд,
+        через которое стоит повторить попытку.
+        """
+        return self._update(bik, self._acquire)
+
+    def record_success(self, bik: str) -> None:
+        self._update(bik, self._success)
+
+    def record_failure(self, bik: str) -> None:
+        if self._update(bik, self._failure):
+            logger.warning(f"Выключатель банка {bik} разомкнут на {self.open_seconds} с")
+
+    @abstractmethod
+    def _update(self, bik: str, step: Callable[[BankState, float], T]) -> T:
+        """Атомарно применяет step к состоянию банка и сохраняет результат."""
+
+    def new_state(self, now: float) -> BankState:
+        return BankState(tokens=self.burst, updated_at=now)
+
+    def _acquire(self, state: BankState, now: float) -> float:
+        if state.open_until > now:
+            return state.open_until - now
+        half_open = state.open_until > 0
+        if half_open and state.probe_until > now:
+            return state.probe_until - now
+
+        state.tokens = min(self.burst, state.tokens + (now - state.updated_at) * self.rate)
+        state.updated_at = now
+        if state.tokens < 1:
+            return (1 - state.tokens) / self.rate
+        state.tokens -= 1
+
+        if half_open:
+            # Пробная заявка: остальные ждут ее результата, но не дольше probe_timeout
+            state.probe_until = now + self.probe_timeout
+        return 0.0
+
+    def _success(self, state: BankState, now: float) -> None:
+        state.failures = 0
+        state.open_until = 0.0
+        state.probe_until = 0.0
+
+    def _failure(self, state: BankState, now: float) -> bool:
+        """Возвращает True, если выключатель разомкнулся этой ошибкой."""
+        state.failures += 1
+        if state.open_until <= 0 and state.failures < self.failure_threshold:
+            return False
+        opened = state.open_until <= now
+        state.open_until = now + self.open_seconds
+        state.probe_until = 0.0
+        state.failures = 0
+        return opened
+
+
+class LocalBankLimiter(BaseBankLimiter):
+    """Состояние в памяти процесса"""
+
+    def __init__(self, **options) -> None:
+        super().__init__(**options)
+        self._states: dict[str, BankState] = {}
+        self._lock = threading.Lock()
+
+    def _update(self, bik: str, step: Callable[[BankState, float], T]) -> T:
+        now = time.time()
+        with self._lock:
+            state = self._states.setdefault(bik, self.new_state(now))
+            return step(state, now)
+
+
+class RedisBankLimiter(BaseBankLimiter):
+    """
+    Состояние в хеше Redis на каждый банк.
+
+    Изменение выполняется оптимистичной транзакцией WATCH/MULTI: при конкурентной записи
+    другим воркером шаг повторяется на свежем состоянии. Если Redis недоступен, вызовы
+    разрешаются, чтобы отказ Redis не останавливал выплаты.
+    """
+
+    def __init__(self, url: str, **options) -> None:
+        super().__init__(**options)
+        self.client = redis.Redis.from_url(url)
+        # Состояние банка без вызовов живет не дольше полного восстановления корзины
+        # и времени размыкания выключателя
+        self.ttl = int(self.burst / self.rate + self.open_seconds + self.probe_timeout) + 1
+
+    def _update(self, bik: str, step: Callable[[BankState, float], T]) -> T:
+        key = KEY_PREFIX + bik
+        try:
+            with self.client.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(key)
+                        now = time.time()
+                        raw = pipe.hgetall(key)
+                        state = self.load_state(raw) if raw else self.new_state(now)
+                        result = step(state, now)
+                        pipe.multi()
+                        pipe.hset(key, mapping=asdict(state))
+                        pipe.expire(key, self.ttl)
+                        pipe.execute()
+                        return result
+                    except redis.WatchError:
+                        continue
+        except redis.RedisError as exc:
+            logger.warning(f"Лимиты банка {bik} недоступны: {exc}")
+            now = time.time()
+            return step(self.new_state(now), now)
+
+    @staticmethod
+    def load_state(raw: dict[bytes, bytes]) -> BankState:
+        return BankState(
+            tokens=float(raw[b"tokens"]),
+            updated_at=float(raw[b"updated_at"]),
+            failures=int(raw[b"failures"]),
+            open_until=float(raw[b"open_until"]),
+            probe_until=float(raw[b"probe_until"]),
+        )
+
+
+@cache
+def get_bank_limiter() -> BaseBankLimiter:
+    """Лимиты банков из настройки PAYOUTS_BANK_LIMITER, один экземпляр на процесс."""
+    config = settings.PAYOUTS_BANK_LIMITER
+    limiter_class = import_string(config["BACKEND"])
+    return limiter_class(**config.get("OPTIONS", {}))
+
+
+@receiver(setting_changed)
+def reset_bank_limiter(setting: str | None = None, **kwargs) -> None:
+    if setting in (None, "PAYOUTS_BANK_LIMITER"):
+        get_bank_limiter.cache_clear()
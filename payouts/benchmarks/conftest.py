@@ -0,0 +1,64 @@
+"""
+Общие фикстуры бенчмарков.
+
+Бенчмарки запускаются отдельно от тестов (см. make bench) с настройками app.settings_tests:
+PostgreSQL и синхронное выполнение задач Celery.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from payouts.models import Payout, RecipientDetails
+
+
+RECIPIENTS_COUNT = 100
+
+
+def make_recipient_data(index: int) -> dict[str, str]:
+    return {
+        "full_name": f"ООО Получатель {index}",
+        "bank_name": "Сбербанк",
+        "account_number": f"{40817810000000000000 + index:020d}",
+        "inn": f"{7700000000 + index:010d}",
+        "kpp": "770101001",
+        "bik": "044525225",
+        "corr_account": "30101810400000000225",
+    }
+
+
+@pytest.fixture
+def recipients(db) -> list[RecipientDetails]:
+    return RecipientDetails.objects.bulk_create(
+        RecipientDetails(**make_recipient_data(index)) for index in range(RECIPIENTS_COUNT)
+    )
+
+
+@pytest.fixture
+def create_payouts(recipients):
+    """Пакетное создание count заявок в статусе PENDING."""
+
+    def _create(count: int) -> list[Payout]:
+        return Payout.objects.bulk_create(
+            (
+                Payout(
+                    amount=Decimal("1000.00") + index,
+                    currency=Payout.Currency.RUB,
+                    recipient_details=recipients[index % len(recipients)],
+                    description=f"Выплата по договору №{index}",
+                )
+                for index in range(count)
+            ),
+            batch_size=1000,
+        )
+
+    return _create
+
+
+@pytest.fixture
+def instant_gateway(settings):
+    """Шлюз-заглушка без задержки и без ошибок, чтобы измерять только код сервиса."""
+    settings.PAYOUTS_BANK_GATEWAY = {
+        "BACKEND": "payouts.gateways.StubBankGateway",
+        "OPTIONS": {"min_latency": 0, "max_latency": 0, "error_rate": 0},
+    }
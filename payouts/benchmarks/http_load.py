@@ -0,0 +1,86 @@
+"""
+Нагрузочный прогон HTTP-эндпоинта для сравнения WSGI- и ASGI-путей.
+
+    python -m payouts.benchmarks.http_load http://localhost:8000/api/payouts/<id>/ -c 64 -n 5000
+    python -m payouts.benchmarks.http_load http://localhost:8001/api/async/payouts/ \\
+        -X POST -d '{"amount": "10.00", "currency": "RUB", "recipient_details": "<id>"}'
+
+Каждый из concurrency потоков держит свое keep-alive соединение и отправляет запросы
+подряд; в конце печатаются пропускная способность и перцентили задержки.
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def run_worker(url: str, method: str, body: bytes | None, count: int) -> tuple[list[float], int]:
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+
+    latencies, errors = [], 0
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    return latencies, errors
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percent) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон HTTP-эндпоинта")
+    parser.add_argument("url")
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-X", "--method", default="GET")
+    parser.add_argument("-d", "--data", help="Тело запроса JSON")
+    args = parser.parse_args()
+
+    body = args.data.encode() if args.data else None
+    per_worker = max(args.requests // args.concurrency, 1)
+    start = threading.Event()
+
+    def task() -> tuple[list[float], int]:
+        start.wait()
+        return run_worker(args.url, args.method, body, per_worker)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(task) for _ in range(args.concurrency)]
+        started = time.perf_counter()
+        start.set()
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+    latencies = [latency for worker_latencies, _ in results for latency in worker_latencies]
+    errors = sum(worker_errors for _, worker_errors in results)
+    print(f"requests: {len(latencies) + errors}, errors: {errors}, time: {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    for percent in (50, 95, 99):
+        print(f"p{percent}: {percentile(latencies, percent) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
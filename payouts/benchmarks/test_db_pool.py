@@ -0,0 +1,48 @@
+"""
+Задержка обращения к базе в рамках одного запроса: новое соединение на каждый запрос
+(установка TCP, TLS и аутентификация) против соединения из пула psycopg.
+"""
+
+import pytest
+
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+
+pytestmark = pytest.mark.django_db
+
+
+def make_wrapper(alias: str, health_checks: bool = False, **options) -> DatabaseWrapper:
+    """Отдельное подключение к тестовой базе с теми же параметрами и своими OPTIONS."""
+    settings_dict = {
+        **connection.settings_dict,
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": health_checks,
+        "OPTIONS": {**connection.settings_dict["OPTIONS"], **options},
+    }
+    return DatabaseWrapper(settings_dict, alias=alias)
+
+
+def run_request(wrapper: DatabaseWrapper) -> None:
+    """Запрос к базе и закрытие соединения, как в конце HTTP-запроса или задачи."""
+    with wrapper.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    wrapper.close()
+
+
+def test_request_new_connection(benchmark):
+    """Соединение открывается и закрывается на каждый запрос"""
+    wrapper = make_wrapper("bench_direct")
+
+    benchmark(run_request, wrapper)
+
+
+def test_request_pooled_connection(benchmark):
+    """Соединение берется из пула с проверкой при выдаче и возвращается в него"""
+    # CONN_HEALTH_CHECKS включает проверку соединения пулом при выдаче, как в app.settings
+    wrapper = make_wrapper("bench_pool", health_checks=True, pool={"min_size": 1, "max_size": 1})
+    try:
+        benchmark(run_request, wrapper)
+    finally:
+        wrapper.close_pool()
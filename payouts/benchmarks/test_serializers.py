@@ -0,0 +1,43 @@
+import pytest
+
+from payouts.benchmarks.conftest import make_recipient_data
+from payouts.models import Payout
+from payouts.serializers import (
+    PayoutReadRepresentation,
+    PayoutSerializer,
+    RecipientDetailsSerializer,
+)
+
+
+@pytest.mark.parametrize("count", [1000, 10000])
+def test_payout_list_representation(benchmark, create_payouts, count):
+    """Сериализация count заявок с реквизитами получателя, как в ответе списка"""
+    create_payouts(count)
+    payouts = list(Payout.objects.select_related("recipient_details").order_by("created_at"))
+
+    data = benchmark(lambda: PayoutSerializer(payouts, many=True).data)
+
+    assert len(data) == count
+
+
+@pytest.mark.parametrize("count", [1000, 10000])
+def test_payout_list_fast_representation(benchmark, create_payouts, count):
+    """Быстрый путь списка: выборка .values() и сборка словарей без сериализаторов"""
+    create_payouts(count)
+    representation = PayoutReadRepresentation()
+    rows = list(representation.values(Payout.objects.order_by("created_at")))
+
+    data = benchmark(lambda: representation.to_list(rows))
+
+    assert len(data) == count
+
+
+def test_recipient_serializer_validation(benchmark, db):
+    """Валидация 1000 получателей сериализатором, как при создании через API"""
+    rows = [make_recipient_data(index) for index in range(1000)]
+
+    def validate():
+        serializer = RecipientDetailsSerializer(data=rows, many=True)
+        assert serializer.is_valid(), serializer.errors
+
+    benchmark(validate)
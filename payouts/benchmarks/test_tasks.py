@@ -0,0 +1,42 @@
+import pytest
+
+from payouts.models import Payout
+from payouts.tasks import process_payout_batch_logic, process_payout_task
+
+
+PAYOUTS_COUNT = 500
+
+pytestmark = pytest.mark.usefixtures("instant_gateway")
+
+
+def reset_to_pending(payouts: list[Payout]) -> None:
+    Payout.objects.filter(id__in=[payout.id for payout in payouts]).update(
+        status=Payout.Status.PENDING
+    )
+
+
+def test_process_payout_task_throughput(benchmark, create_payouts):
+    """Пропускная способность process_payout_task: по задаче на заявку"""
+    payouts = create_payouts(PAYOUTS_COUNT)
+    ids = [str(payout.id) for payout in payouts]
+
+    def run():
+        for payout_id in ids:
+            process_payout_task.delay(payout_id)
+
+    benchmark.pedantic(run, setup=lambda: reset_to_pending(payouts), rounds=5)
+
+    assert Payout.objects.filter(status=Payout.Status.COMPLETED).count() == PAYOUTS_COUNT
+
+
+def test_process_payout_batch_throughput(benchmark, create_payouts):
+    """Пропускная способность пакетной обработки одного пакета"""
+    payouts = create_payouts(PAYOUTS_COUNT)
+
+    def setup():
+        reset_to_pending(payouts)
+        return (PAYOUTS_COUNT,), {}
+
+    result = benchmark.pedantic(process_payout_batch_logic, setup=setup, rounds=5)
+
+    assert result["completed"] == PAYOUTS_COUNT
@@ -0,0 +1,17 @@
+from payouts.benchmarks.conftest import make_recipient_data
+from payouts.importers import validate_recipient_row
+
+
+RECIPIENTS_COUNT = 100_000
+
+
+def test_validate_recipient_rows(benchmark):
+    """Проверка 100 тыс. строк получателей валидаторами из payouts.validators"""
+    rows = [make_recipient_data(index) for index in range(RECIPIENTS_COUNT)]
+
+    def validate():
+        return sum(1 for row in rows if not validate_recipient_row(row)[1])
+
+    valid = benchmark.pedantic(validate, rounds=5, iterations=1)
+
+    assert valid == RECIPIENTS_COUNT
@@ -0,0 +1,58 @@
+"""
+Обслуживание пула соединений с базой данных (OPTIONS["pool"] в DATABASES).
+
+Пул psycopg создается в каждом процессе gunicorn и воркера Celery при первом запросе
+к базе. Django возвращает соединение в пул в конце HTTP-запроса, а воркер Celery -
+после каждой задачи: иначе соединение оставалось бы занятым процессом между задачами,
+не проверялось и не пересоздавалось по max_lifetime. Статистика пула выгружается
+в метрики не чаще раза в STATS_INTERVAL секунд на процесс.
+"""
+
+import time
+
+from typing import Iterator
+
+from celery.signals import task_postrun
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.dispatch import receiver
+
+from payouts.metrics import record_db_pool
+
+
+STATS_INTERVAL = 5.0
+
+_stats_recorded_at: dict[str, float] = {}
+
+
+def pooled_connections() -> Iterator[BaseDatabaseWrapper]:
+    """Открытые в процессе подключения к базам, для которых включен пул."""
+    for connection in connections.all(initialized_only=True):
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            yield connection
+
+
+def record_pool_stats(force: bool = False) -> None:
+    now = time.monotonic()
+    for connection in pooled_connections():
+        if not force and now - _stats_recorded_at.get(connection.alias, 0.0) < STATS_INTERVAL:
+            continue
+        _stats_recorded_at[connection.alias] = now
+        record_db_pool(connection.alias, connection.pool.pop_stats())
+
+
+@receiver(request_finished)
+def _on_request_finished(**kwargs) -> None:
+    record_pool_stats()
+
+
+@task_postrun.connect
+def _on_task_postrun(task=None, **kwargs) -> None:
+    # Eager-задачи выполняются внутри вызывающего кода и его транзакций
+    if task is not None and getattr(task.request, "is_eager", False):
+        return
+    for connection in pooled_connections():
+        if not connection.in_atomic_block:
+            connection.close()
+    record_pool_stats()
@@ -0,0 +1,178 @@
+from typing import Any
+
+from django.db.models import Q, QuerySet
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from payouts.models import Payout, PayoutStats
+from payouts.validators import validate_inn
+
+
+class PayoutFilterSerializer(serializers.Serializer):
+    """Параметры фильтрации списка заявок"""
+
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=Payout.Status.choices), required=False
+    )
+    currency = serializers.ListField(
+        child=serializers.ChoiceField(choices=Payout.Currency.choices), required=False
+    )
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    recipient_details = serializers.UUIDField(required=False)
+    recipient_inn = serializers.CharField(required=False, validators=[validate_inn])
+    # allow_null: без параметра в query string BooleanField иначе получил бы False
+    retry_scheduled = serializers.BooleanField(required=False, allow_null=True, default=None)
+    min_attempts = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        created_after = data.get("created_after")
+        created_before = data.get("created_before")
+        if created_after and created_before and created_after > created_before:
+            raise serializers.ValidationError(
+                {"created_before": "Конец периода не может быть раньше начала"}
+            )
+        return data
+
+
+def validate_filters(params: Any) -> dict[str, Any]:
+    """Проверенные параметры фильтра заявок; при ошибке в параметрах — ValidationError."""
+    serializer = PayoutFilterSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def filter_payouts(queryset: QuerySet[Payout], params: Any) -> QuerySet[Payout]:
+    """Фильтрация заявок по параметрам запроса; при ошибке в параметрах — ValidationError."""
+    return apply_filters(queryset, validate_filters(params))
+
+
+def apply_filters(queryset: QuerySet[Payout], data: dict[str, Any]) -> QuerySet[Payout]:
+    """Фильтрация заявок по проверенным параметрам validate_filters."""
+    if "status" in data:
+        queryset = queryset.filter(status__in=data["status"])
+    if "currency" in data:
+        queryset = queryset.filter(currency__in=data["currency"])
+    if "created_after" in data:
+        queryset = queryset.filter(created_at__gte=data["created_after"])
+    if "created_before" in data:
+        queryset = queryset.filter(created_at__lt=data["created_before"])
+    if "recipient_details" in data:
+        queryset = queryset.filter(recipient_details_id=data["recipient_details"])
+    if "recipient_inn" in data:
+        queryset = queryset.filter(recipient_details__inn=data["recipient_inn"])
+    if data.get("retry_scheduled") is not None:
+        scheduled = Q(status=Payout.Status.PENDING, next_attempt_at__isnull=False)
+        queryset = queryset.filter(scheduled if data["retry_scheduled"] else ~scheduled)
+    if "min_attempts" in data:
+        queryset = queryset.filter(attempt_count__gte=data["min_attempts"])
+    return queryset
+
+
+def match_row(row: dict[str, Any], data: dict[str, Any]) -> bool:
+    """
+    Проверка строки заявки в формате .values() карточки (например, архивной)
+    по параметрам validate_filters: те же условия, что и в apply_filters.
+    """
+    checks = [
+        "status" not in data or row["status"] in data["status"],
+        "currency" not in data or row["currency"] in data["currency"],
+        "created_after" not in data or row["created_at"] >= data["created_after"],
+        "created_before" not in data or row["created_at"] < data["created_before"],
+        "recipient_details" not in data
+        or str(row["recipient_details__id"]) == str(data["recipient_details"]),
+        "recipient_inn" not in data or row["recipient_details__inn"] == data["recipient_inn"],
+        "min_attempts" not in data or row["attempt_count"] >= data["min_attempts"],
+    ]
+    if data.get("retry_scheduled") is not None:
+        scheduled = row["status"] == Payout.Status.PENDING and row["next_attempt_at"] is not None
+        checks.append(scheduled == data["retry_scheduled"])
+    return all(checks)
+
+
+class PayoutStatsFilterSerializer(serializers.Serializer):
+    """Параметры выборки сводной статистики заявок"""
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=Payout.Status.choices), required=False
+    )
+    currency = serializers.ListField(
+        child=serializers.ChoiceField(choices=Payout.Currency.choices), required=False
+    )
+
+
+def filter_stats(queryset: QuerySet[PayoutStats], params: Any) -> QuerySet[PayoutStats]:
+    """Фильтрация статистики по периоду (включительно), статусу и валюте."""
+    serializer = PayoutStatsFilterSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    if "date_from" in data:
+        queryset = queryset.filter(day__gte=data["date_from"])
+    if "date_to" in data:
+        queryset = queryset.filter(day__lte=data["date_to"])
+    if "status" in data:
+        queryset = queryset.filter(status__in=data["status"])
+    if "currency" in data:
+        queryset = queryset.filter(currency__in=data["currency"])
+    return queryset
+
+
+class PayoutFilterBackend(BaseFilterBackend):
+    """Фильтр списка заявок по статусу, валюте, периоду создания и получателю"""
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action != "list":
+            return queryset
+        return filter_payouts(queryset, request.query_params)
+
+    def get_schema_operation_parameters(self, view):
+        def parameter(name, description, schema):
+            return {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": schema,
+            }
+
+        return [
+            parameter(
+                "status",
+                "Статус заявки, параметр можно повторять",
+                {"type": "array", "items": {"type": "string", "enum": Payout.Status.values}},
+            ),
+            parameter(
+                "currency",
+                "Валюта заявки, параметр можно повторять",
+                {"type": "array", "items": {"type": "string", "enum": Payout.Currency.values}},
+            ),
+            parameter(
+                "created_after",
+                "Заявки, созданные не раньше указанного момента",
+                {"type": "string", "format": "date-time"},
+            ),
+            parameter(
+                "created_before",
+                "Заявки, созданные раньше указанного момента",
+                {"type": "string", "format": "date-time"},
+            ),
+            parameter(
+                "recipient_details",
+                "ID реквизитов получателя",
+                {"type": "string", "format": "uuid"},
+            ),
+            parameter("recipient_inn", "ИНН получателя", {"type": "string"}),
+            parameter(
+                "retry_scheduled",
+                "Заявки в статусе pending с запланированной повторной попыткой",
+                {"type": "boolean"},
+            ),
+            parameter(
+                "min_attempts",
+                "Заявки не меньше чем с указанным числом неудачных попыток",
+                {"type": "integer", "minimum": 1},
+            ),
+        ]
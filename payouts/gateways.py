@@ -0,0 +1,65 @@
+import asyncio
+import random
+
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from payouts.models import Payout
+
+
+class BankGatewayError(Exception):
+    """Ошибка при выполнении банковской операции"""
+
+
+class BaseBankGateway(ABC):
+    """Базовый интерфейс асинхронного банковского шлюза"""
+
+    @abstractmethod
+    async def send_payout(self, payout: Payout) -> None:
+        """Отправка выплаты в банк; при отказе банка выбрасывает BankGatewayError."""
+
+
+class StubBankGateway(BaseBankGateway):
+    """Локальная заглушка банковского шлюза с настраиваемой задержкой и долей ошибок"""
+
+    def __init__(
+        self, min_latency: float = 2.0, max_latency: float = 5.0, error_rate: float = 0.1
+    ) -> None:
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.error_rate = error_rate
+
+    async def send_payout(self, payout: Payout) -> None:
+        # Имитация сетевого вызова
+        await asyncio.sleep(random.uniform(self.min_latency, self.max_latency))
+
+        if random.random() < self.error_rate:
+            raise BankGatewayError("Ошибка при выполнении банковской операции")
+
+
+def get_bank_gateway() -> BaseBankGateway:
+    """Создание банковского шлюза из настройки PAYOUTS_BANK_GATEWAY."""
+    config = settings.PAYOUTS_BANK_GATEWAY
+    gateway_class = import_string(config["BACKEND"])
+    return gateway_class(**config.get("OPTIONS", {}))
+
+
+async def send_payouts(
+    gateway: BaseBankGateway, payouts: Iterable[Payout], concurrency: int
+) -> list[BaseException | None]:
+    """
+    Конкурентная отправка выплат в банк, не более concurrency вызовов одновременно.
+
+    Возвращает список той же длины, что и payouts: None для успешной выплаты
+    или исключение, которым завершился вызов шлюза.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _send(payout: Payout) -> None:
+        async with semaphore:
+            await gateway.send_payout(payout)
+
+    return await asyncio.gather(*(_send(payout) for payout in payouts), return_exceptions=True)
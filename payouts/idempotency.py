@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+
+from payouts.models import IdempotencyKey
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+# Версия в префиксе отделяет записи кэша со старым форматом ответа
+CACHE_PREFIX = "payouts:idempotency:v2:"
+
+STORED_FIELDS = ("request_hash", "response_status", "response_body", "response_content_type")
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Ключ идемпотентности уже использован для другого запроса"
+    default_code = "idempotency_key_reused"
+
+
+def get_idempotency_key(request: Request) -> str | None:
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return None
+    max_length = IdempotencyKey._meta.get_field("key").max_length
+    if not key or len(key) > max_length:
+        raise ValidationError(
+            {IDEMPOTENCY_HEADER: f"Ключ должен содержать от 1 до {max_length} символов"}
+        )
+    return key
+
+
+def fingerprint(method: str, path: str, data: Any) -> str:
+    """Хеш метода, пути и тела запроса для сверки повторов с тем же ключом."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256()
+    for part in (method, path, payload):
+        digest.update(part.encode())
+    return digest.hexdigest()
+
+
+def request_fingerprint(request: Request) -> str:
+    return fingerprint(request.method, request.path, request.data)
+
+
+def _cache_get(key: str) -> dict[str, Any] | None:
+    try:
+        return cache.get(CACHE_PREFIX + key)
+    except Exception as exc:
+        logger.warning(f"Кэш ключей идемпотентности недоступен: {exc}")
+        return None
+
+
+def _cache_set(key: str, stored: dict[str, Any]) -> None:
+    try:
+        cache.set(CACHE_PREFIX + key, stored, timeout=settings.PAYOUTS_IDEMPOTENCY_TTL)
+    except Exception as exc:
+        logger.warning(f"Кэш ключей идемпотентности недоступен: {exc}")
+
+
+def lookup(key: str) -> dict[str, Any] | None:
+    """Поиск сохраненного ответа: сначала в кэше, затем в базе данных."""
+    stored = _cache_get(key)
+    if stored is not None:
+        return stored
+
+    stored = (
+        IdempotencyKey.objects.filter(key=key, expires_at__gt=timezone.now())
+        .values(*STORED_FIELDS)
+        .first()
+    )
+    if stored is not None:
+        stored["response_body"] = bytes(stored["response_body"])
+        _cache_set(key, stored)
+    return stored
+
+
+def replay(stored: dict[str, Any], fingerprint: str) -> HttpResponse:
+    """
+    Повтор сохраненного ответа байт в байт с исходным типом содержимого;
+    другой запрос с тем же ключом отклоняется.
+    """
+    if stored["request_hash"] != fingerprint:
+        raise IdempotencyKeyReused()
+    response = HttpResponse(
+        stored["response_body"],
+        status=stored["response_status"],
+        content_type=stored["response_content_type"],
+    )
+    response[REPLAY_HEADER] = "true"
+    return response
+
+
+def store(key: str, fingerprint: str, response_status: int, body: bytes, content_type: str) -> None:
+    """
+    Сохранение отрендеренного ответа под ключом; вызывается в транзакции создания заявки.
+
+    При параллельном запросе с тем же ключом уникальный индекс выбросит
+    IntegrityError, и транзакция создания заявки откатится целиком.
+    """
+    now = timezone.now()
+    IdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+    IdempotencyKey.objects.create(
+        key=key,
+        request_hash=fingerprint,
+        response_status=response_status,
+        response_body=body,
+        response_content_type=content_type,
+        expires_at=now + timedelta(seconds=settings.PAYOUTS_IDEMPOTENCY_TTL),
+    )
+    stored = {
+        "request_hash": fingerprint,
+        "response_status": response_status,
+        "response_body": body,
+        "response_content_type": content_type,
+    }
+    transaction.on_commit(lambda: _cache_set(key, stored))
+
+
+def prune_expired(batch_size: int) -> int:
+    """Удаление просроченных ключей порциями, чтобы не держать долгих блокировок."""
+    deleted = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
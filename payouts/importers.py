@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import uuid
+
+from itertools import islice
+from typing import Any, Iterable, Iterator, TextIO
+
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from payouts.models import RecipientDetails
+from payouts.validators import (
+    validate_bank_account,
+    validate_bik,
+    validate_corr_account,
+    validate_inn,
+    validate_kpp,
+)
+
+
+IMPORT_FORMAT_CSV = "csv"
+IMPORT_FORMAT_JSONL = "jsonl"
+IMPORT_FORMATS = (IMPORT_FORMAT_CSV, IMPORT_FORMAT_JSONL)
+
+RECIPIENT_FIELDS = (
+    "full_name",
+    "bank_name",
+    "account_number",
+    "inn",
+    "kpp",
+    "bik",
+    "corr_account",
+)
+
+FIELD_VALIDATORS = {
+    "account_number": validate_bank_account,
+    "inn": validate_inn,
+    "kpp": validate_kpp,
+    "bik": validate_bik,
+    "corr_account": validate_corr_account,
+}
+
+STAGING_TABLE = "recipient_import_staging"
+
+
+def iter_source_rows(source: TextIO, import_format: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Построчное чтение файла импорта: пары (номер строки, данные строки)."""
+    if import_format == IMPORT_FORMAT_CSV:
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_num, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            row = {"__error__": f"Некорректный JSON: {exc.msg}"}
+        if not isinstance(row, dict):
+            row = {"__error__": "Строка должна быть JSON-объектом"}
+        yield line_num, row
+
+
+def validate_recipient_row(row: dict[str, Any]) -> tuple[dict[str, str], dict[str, str]]:
+    """Проверка строки импорта правилами из payouts.validators: (данные, ошибки)."""
+    if "__error__" in row:
+        return {}, {"non_field_errors": row["__error__"]}
+
+    clean, errors = {}, {}
+    for field in RECIPIENT_FIELDS:
+        value = str(row.get(field) or "").strip()
+        max_length = RecipientDetails._meta.get_field(field).max_length
+        if not value:
+            errors[field] = "Обязательное поле"
+            continue
+        if len(value) > max_length:
+            errors[field] = f"Не более {max_length} символов"
+            continue
+        validator = FIELD_VALIDATORS.get(field)
+        if validator is not None:
+            try:
+                validator(value)
+            except serializers.ValidationError as exc:
+                errors[field] = "; ".join(str(message) for message in exc.detail)
+                continue
+        clean[field] = value
+    return clean, errors
+
+
+def iter_batches(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def copy_to_staging(cursor, rows: list[dict[str, str]]) -> None:
+    """Загрузка пакета валидных строк в промежуточную таблицу через COPY."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([uuid.uuid4(), *(row[field] for field in RECIPIENT_FIELDS)])
+
+    columns = ", ".join(("id", *RECIPIENT_FIELDS))
+    sql = f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    if hasattr(cursor, "copy_expert"):
+        # psycopg2
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+class RecipientImporter:
+    """
+    Импорт реквизитов получателей из CSV/JSONL.
+
+    Строки проверяются пакетами, валидные загружаются через COPY во временную
+    таблицу и одним INSERT ... ON CONFLICT (inn) DO UPDATE переносятся в
+    payouts_recipientdetails. Невалидные строки и повторы ИНН внутри файла
+    записываются в файл отказов.
+    """
+
+    def __init__(self, batch_size: int, rejects: TextIO | None = None) -> None:
+        self.batch_size = batch_size
+        self.rejects = csv.writer(rejects) if rejects is not None else None
+        self.seen_inns: set[str] = set()
+        self.stats = {"loaded": 0, "created": 0, "updated": 0, "rejected": 0}
+
+    def reject(self, line_num: int, row: dict[str, Any], errors: dict[str, str]) -> None:
+        self.stats["rejected"] += 1
+        if self.rejects is not None:
+            values = [row.get(field, "") for field in RECIPIENT_FIELDS]
+            self.rejects.writerow([line_num, *values, json.dumps(errors, ensure_ascii=False)])
+
+    def run(self, rows: Iterable[tuple[int, dict[str, Any]]]) -> dict[str, int]:
+        if self.rejects is not None:
+            self.rejects.writerow(["line", *RECIPIENT_FIELDS, "errors"])
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {STAGING_TABLE} "
+                f"(LIKE {RecipientDetails._meta.db_table} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+
+            for batch in iter_batches(rows, self.batch_size):
+                valid = []
+                for line_num, row in batch:
+                    clean, errors = validate_recipient_row(row)
+                    if not errors and clean["inn"] in self.seen_inns:
+                        errors = {"inn": "Повтор ИНН в файле импорта"}
+                    if errors:
+                        self.reject(line_num, row, errors)
+                        continue
+                    self.seen_inns.add(clean["inn"])
+                    valid.append(clean)
+
+                if valid:
+                    copy_to_staging(cursor, valid)
+                    self.stats["loaded"] += len(valid)
+
+            self.upsert(cursor)
+
+        return self.stats
+
+    def upsert(self, cursor) -> None:
+        """Перенос строк из временной таблицы с обновлением существующих получателей по ИНН."""
+        columns = ", ".join(("id", *RECIPIENT_FIELDS))
+        updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in RECIPIENT_FIELDS)
+        cursor.execute(
+            f"WITH upserted AS ("
+            f"INSERT INTO {RecipientDetails._meta.db_table} ({columns}) "
+            f"SELECT {columns} FROM {STAGING_TABLE} "
+            f"ON CONFLICT (inn) DO UPDATE SET {updates} "
+            # xmax = 0 только у вставленных строк, у обновленных — id транзакции
+            f"RETURNING (xmax = 0) AS inserted) "
+            f"SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) "
+            f"FROM upserted"
+        )
+        self.stats["created"], self.stats["updated"] = cursor.fetchone()
@@ -0,0 +1,140 @@
+"""
+Аренда заявок воркерами.
+
+Захватывая заявку, воркер записывает в нее свой идентификатор и срок аренды
+lease_expires_at. Во время банковского вызова фоновый поток продлевает аренду,
+а заявки с истекшей арендой (воркер завершился или потерял связь с базой)
+периодически возвращаются в очередь задачей recover_expired_leases_task.
+"""
+
+import logging
+import os
+import socket
+import threading
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from payouts.models import Payout
+from payouts.partitions import active_since
+from payouts.retries import schedule_retries
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseExpired(Exception):
+    """Аренда заявки истекла до завершения обработки"""
+
+
+def worker_id() -> str:
+    """Идентификатор процесса воркера; вычисляется при вызове, так как процессы prefork - форки."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def lease_expires_at() -> datetime:
+    return timezone.now() + timedelta(seconds=settings.PAYOUTS_LEASE_DURATION)
+
+
+def lease_fields() -> dict:
+    """Поля захвата заявки текущим воркером для transition и bulk_transition."""
+    return {"worker_id": worker_id(), "lease_expires_at": lease_expires_at()}
+
+
+def lease_owner() -> dict:
+    """
+    Условие перехода из PROCESSING для transition и bulk_transition: заявку все еще
+    арендует текущий воркер. Если аренда истекла и заявку захватил другой воркер,
+    переход не применяется.
+    """
+    return {"worker_id": worker_id()}
+
+
+def extend_leases(payouts: list[Payout]) -> int:
+    """
+    Продление аренды заявок, которые все еще обрабатывает текущий воркер.
+
+    Нижняя граница created_at - самая ранняя из заявок, а не active_since(): заявку
+    из старой секции, опубликованную sweep_stale_payouts_task или захваченную до смены
+    месяца, тоже нужно продлевать, иначе ее вернут в очередь и отправят в банк повторно.
+    """
+    if not payouts:
+        return 0
+    return Payout.objects.filter(
+        id__in=[payout.id for payout in payouts],
+        created_at__gte=min(payout.created_at for payout in payouts),
+        status=Payout.Status.PROCESSING,
+        worker_id=worker_id(),
+    ).update(lease_expires_at=lease_expires_at())
+
+
+@contextmanager
+def lease_heartbeat(payouts: Iterable[Payout]) -> Iterator[None]:
+    """
+    Продление аренды заявок каждые PAYOUTS_LEASE_HEARTBEAT_INTERVAL секунд, пока
+    выполняется блок: банковский вызов может длиться дольше срока аренды.
+
+    Продление выполняется в отдельном потоке со своим соединением с базой.
+    """
+    payouts = list(payouts)
+    stopped = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stopped.wait(settings.PAYOUTS_LEASE_HEARTBEAT_INTERVAL):
+                try:
+                    extended = extend_leases(payouts)
+                except Exception as exc:
+                    logger.warning(f"Не удалось продлить аренду заявок: {exc}")
+                    continue
+                if extended < len(payouts):
+                    logger.warning(
+                        f"Аренда {len(payouts) - extended} заявок потеряна воркером {worker_id()}"
+                    )
+        finally:
+            # Соединения потока не переиспользуются после его завершения
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name="payouts-lease-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def recover_expired_leases(batch_size: int, *, stale: bool = False) -> dict[str, int]:
+    """
+    Возврат пакета заявок с истекшей арендой из PROCESSING в очередь.
+
+    Результат банковского вызова таких заявок неизвестен, поэтому возврат расходует
+    попытку: заявка получает время следующей попытки или, исчерпав попытки, FAILED.
+    Строки блокируются через SKIP LOCKED, параллельные проходы не пересекаются.
+    При stale просматриваются только заявки старше active_since().
+    """
+    since = active_since()
+    recent = Q(created_at__lt=since) if stale else Q(created_at__gte=since)
+    with transaction.atomic():
+        payouts = list(
+            Payout.objects.select_for_update(skip_locked=True)
+            .filter(recent, status=Payout.Status.PROCESSING, lease_expires_at__lt=timezone.now())
+            .order_by("lease_expires_at")[:batch_size]
+        )
+        if not payouts:
+            return {Payout.Status.PENDING: 0, Payout.Status.FAILED: 0}
+
+        errors = [LeaseExpired(f"Истек срок аренды воркера {p.worker_id}") for p in payouts]
+        counts = schedule_retries(payouts, errors)
+
+    logger.warning(
+        f"Возвращено в очередь заявок с истекшей арендой: {counts[Payout.Status.PENDING]}, "
+        f"исчерпали попытки: {counts[Payout.Status.FAILED]}"
+    )
+    return counts
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payouts.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = "Переносит завершенные заявки старше срока хранения в архив Parquet пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.PAYOUTS_ARCHIVE_AFTER_DAYS,
+            help="Возраст заявок в днях, после которого они переносятся в архив",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PAYOUTS_ARCHIVE_BATCH_SIZE,
+            help="Количество заявок, переносимых в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+        older_than = timezone.now() - timedelta(days=options["older_than_days"])
+
+        total = 0
+        while archived := archive_batch(older_than, options["batch_size"]):
+            total += archived
+            self.stdout.write(f"Перенесено в архив: {total}")
+
+        self.stdout.write(self.style.SUCCESS(f"Заявок перенесено в архив: {total}"))
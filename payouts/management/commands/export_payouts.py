@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from payouts.archive import iter_archived_export_rows
+from payouts.exporters import EXPORT_FORMAT_CSV, EXPORT_FORMATS, iter_export
+from payouts.filters import apply_filters, validate_filters
+from payouts.models import Payout
+
+
+class Command(BaseCommand):
+    help = "Выгружает заявки в CSV или NDJSON потоково, с фильтрами списка заявок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=EXPORT_FORMATS,
+            default=EXPORT_FORMAT_CSV,
+            help="Формат выгрузки",
+        )
+        parser.add_argument(
+            "--output",
+            help="Путь к файлу выгрузки (по умолчанию stdout)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.PAYOUTS_EXPORT_CHUNK_SIZE,
+            help="Количество строк, читаемых из курсора за один раз",
+        )
+        parser.add_argument("--status", action="append", default=[], help="Статус заявки")
+        parser.add_argument("--currency", action="append", default=[], help="Валюта заявки")
+        parser.add_argument("--created-after", help="Начало периода создания (ISO 8601)")
+        parser.add_argument("--created-before", help="Конец периода создания (ISO 8601)")
+        parser.add_argument("--recipient-details", help="ID реквизитов получателя")
+        parser.add_argument("--recipient-inn", help="ИНН получателя")
+        parser.add_argument(
+            "--id",
+            dest="ids",
+            action="append",
+            default=[],
+            help=(
+                "ID заявки; заявки, перенесенные в архив, ищутся по индексу архива "
+                "и отбираются теми же фильтрами"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        params.setlist("status", options["status"])
+        params.setlist("currency", options["currency"])
+        for name in ("created_after", "created_before", "recipient_details", "recipient_inn"):
+            if options[name]:
+                params[name] = options[name]
+
+        try:
+            filters = validate_filters(params)
+        except ValidationError as exc:
+            raise CommandError(f"Некорректные параметры фильтра: {exc.detail}") from exc
+        queryset = apply_filters(Payout.objects.all(), filters)
+
+        extra_rows = ()
+        if options["ids"]:
+            try:
+                queryset = queryset.filter(id__in=options["ids"])
+            except DjangoValidationError as exc:
+                raise CommandError(f"Некорректный ID заявки: {exc.messages[0]}") from exc
+            extra_rows = iter_archived_export_rows(options["ids"], filters)
+
+        chunks = iter_export(queryset, options["export_format"], options["chunk_size"], extra_rows)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Выгрузка сохранена в {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
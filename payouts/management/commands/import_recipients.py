@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from payouts.importers import (
+    IMPORT_FORMAT_CSV,
+    IMPORT_FORMAT_JSONL,
+    IMPORT_FORMATS,
+    RecipientImporter,
+    iter_source_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Импортирует реквизиты получателей из CSV/JSONL через COPY с upsert по ИНН"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу CSV или JSONL")
+        parser.add_argument(
+            "--format",
+            dest="import_format",
+            choices=IMPORT_FORMATS,
+            help="Формат файла (по умолчанию определяется по расширению)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Количество строк в пакете проверки и COPY",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Путь к файлу отказов (по умолчанию <path>.rejects.csv)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Импорт через COPY поддерживается только для PostgreSQL")
+
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Файл {path} не найден")
+
+        import_format = options["import_format"] or (
+            IMPORT_FORMAT_JSONL if path.suffix in (".jsonl", ".ndjson") else IMPORT_FORMAT_CSV
+        )
+        rejects_path = Path(options["rejects"] or f"{path}.rejects.csv")
+
+        with (
+            open(path, encoding="utf-8-sig", newline="") as source,
+            open(rejects_path, "w", encoding="utf-8", newline="") as rejects,
+        ):
+            importer = RecipientImporter(batch_size=options["batch_size"], rejects=rejects)
+            stats = importer.run(iter_source_rows(source, import_format))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Загружено: {stats['loaded']} (создано {stats['created']}, "
+                f"обновлено {stats['updated']}), отклонено: {stats['rejected']}"
+            )
+        )
+        if stats["rejected"]:
+            self.stdout.write(self.style.WARNING(f"Отклоненные строки: {rejects_path}"))
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from payouts.partitions import create_partitions, expire_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает секции таблицы заявок на будущие месяцы и отсоединяет (или удаляет) "
+        "секции старше срока хранения"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.PAYOUTS_PARTITION_PREMAKE_MONTHS,
+            help="Количество месяцев после текущего, для которых создаются секции",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.PAYOUTS_PARTITION_RETENTION_MONTHS,
+            help="Срок хранения заявок в месяцах (0 - секции не отсоединяются)",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Удалять отсоединенные секции вместо того, чтобы оставлять их таблицами",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("Таблица заявок не секционирована (нужны PostgreSQL и миграции)")
+        if options["ahead"] < 0 or options["retention_months"] < 0:
+            raise CommandError("--ahead и --retention-months не могут быть отрицательными")
+        if 0 < options["retention_months"] < settings.PAYOUTS_PARTITION_ACTIVE_MONTHS:
+            raise CommandError(
+                "--retention-months не может быть меньше PAYOUTS_PARTITION_ACTIVE_MONTHS"
+            )
+
+        for name in create_partitions(options["ahead"]):
+            self.stdout.write(f"Создана секция {name}")
+
+        expired = []
+        if options["retention_months"]:
+            expired = expire_partitions(options["retention_months"], drop=options["drop"])
+        action = "Удалено" if options["drop"] else "Отсоединено"
+        for name in expired:
+            self.stdout.write(f"{action}: {name}")
+
+        self.stdout.write(self.style.SUCCESS(f"{action} секций: {len(expired)}"))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from payouts.task_results import prune_results
+
+
+class Command(BaseCommand):
+    help = "Удаляет устаревшие итоги обработки заявок порциями, без долгих блокировок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.PAYOUTS_TASK_RESULTS_TTL,
+            help="Возраст итогов в секундах, старше которого они удаляются",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PAYOUTS_TASK_RESULTS_PRUNE_BATCH_SIZE,
+            help="Количество строк, удаляемых одним запросом",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+        deleted = prune_results(options["batch_size"], ttl=options["older_than"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено итогов обработки: {deleted}"))
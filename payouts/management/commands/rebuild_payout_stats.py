@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from payouts.archive import archived_bounds
+from payouts.models import Payout
+from payouts.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводную статистику заявок по таблице заявок и архиву порциями по дням"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date-from",
+            type=date.fromisoformat,
+            help="Первый день пересчета (по умолчанию день самой ранней заявки, включая архив)",
+        )
+        parser.add_argument(
+            "--date-to",
+            type=date.fromisoformat,
+            help="Последний день пересчета (по умолчанию день самой поздней заявки, включая архив)",
+        )
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=7,
+            help="Количество дней, пересчитываемых в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days должен быть не меньше 1")
+
+        bounds = Payout.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+        created = [value for value in bounds.values() if value is not None]
+        # Заявки старше срока хранения лежат только в архиве
+        created.extend(archived_bounds() or ())
+        first, last = min(created, default=None), max(created, default=None)
+        date_from = options["date_from"] or (first and timezone.localdate(first))
+        date_to = options["date_to"] or (last and timezone.localdate(last))
+        if date_from is None or date_to is None:
+            self.stdout.write(self.style.WARNING("Заявок нет, пересчитывать нечего"))
+            return
+        if date_from > date_to:
+            raise CommandError("--date-from не может быть позже --date-to")
+
+        chunk = timedelta(days=options["chunk_days"])
+        start = date_from
+        buckets = 0
+        while start <= date_to:
+            end = min(start + chunk - timedelta(days=1), date_to)
+            buckets += rebuild_stats(start, end)
+            self.stdout.write(f"Пересчитано {start} — {end}")
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Статистика пересчитана, строк: {buckets}"))
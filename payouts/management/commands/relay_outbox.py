@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payouts.tasks import relay_outbox
+
+
+class Command(BaseCommand):
+    help = "Публикует сообщения outbox о новых заявках в брокер пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PAYOUTS_OUTBOX_BATCH_SIZE,
+            help="Количество сообщений в одном пакете",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.PAYOUTS_OUTBOX_RELAY_INTERVAL,
+            help="Пауза в секундах, когда неотправленных сообщений нет",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Опубликовать все накопившиеся сообщения и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+
+        while True:
+            sent = relay_outbox(batch_size)
+            total += sent
+            if sent:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Опубликовано сообщений: {total}"))
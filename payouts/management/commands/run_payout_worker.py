@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.celery import app
+
+
+class Command(BaseCommand):
+    help = "Запускает воркер Celery для очереди заявок с параллельностью из PAYOUTS_QUEUES"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queue", help="Имя очереди из PAYOUTS_QUEUES")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Число процессов воркера вместо значения из PAYOUTS_QUEUES",
+        )
+        parser.add_argument(
+            "--with-default",
+            action="store_true",
+            help="Также обрабатывать очередь служебных задач Celery (релей, очистка, пакеты)",
+        )
+        parser.add_argument("--loglevel", default="info")
+
+    def build_argv(self, options) -> list[str]:
+        queue = options["queue"]
+        config = settings.PAYOUTS_QUEUES.get(queue)
+        if config is None:
+            raise CommandError(
+                f"Неизвестная очередь {queue}, доступны: {', '.join(settings.PAYOUTS_QUEUES)}"
+            )
+
+        queues = [queue]
+        if options["with_default"]:
+            queues.append(app.conf.task_default_queue)
+        concurrency = options["concurrency"] or config["concurrency"]
+        return [
+            "worker",
+            "-Q",
+            ",".join(queues),
+            "-c",
+            str(concurrency),
+            "-n",
+            f"{queue}@%h",
+            f"--loglevel={options['loglevel']}",
+            "-E",
+        ]
+
+    def handle(self, *args, **options):
+        argv = self.build_argv(options)
+        self.stdout.write(f"celery {' '.join(argv)}")
+        app.worker_main(argv=argv)
@@ -0,0 +1,290 @@
+"""
+Метрики Prometheus для API и воркеров Celery.
+
+При запуске в нескольких процессах (gunicorn, prefork-воркеры Celery) переменная окружения
+PROMETHEUS_MULTIPROC_DIR указывает каталог, через который процессы делят значения метрик.
+"""
+
+import logging
+import os
+import shutil
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import (
+    celeryd_init,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_process_shutdown,
+    worker_ready,
+)
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUEST_LATENCY = Histogram(
+    "payouts_api_request_duration_seconds",
+    "Время обработки запроса к API",
+    ["view", "action", "method", "status"],
+)
+TASK_DURATION = Histogram(
+    "payouts_task_duration_seconds",
+    "Время выполнения задачи Celery",
+    ["task"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+TASK_OUTCOMES = Counter(
+    "payouts_task_outcomes_total",
+    "Результаты выполнения задач Celery",
+    ["task", "outcome"],
+)
+TASK_RETRIES = Counter(
+    "payouts_task_retries_total",
+    "Повторные попытки задач Celery",
+    ["task"],
+)
+BANK_DEFERRALS = Counter(
+    "payouts_bank_deferrals_total",
+    "Заявки, отложенные лимитом частоты или выключателем банка",
+    ["bik"],
+)
+STATUS_TRANSITIONS = Counter(
+    "payouts_status_transitions_total",
+    "Переходы заявок между статусами",
+    ["from_status", "to_status"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "payouts_db_pool_connections",
+    "Соединения пула базы данных: открытые, свободные и ожидающие выдачи запросы",
+    ["alias", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_EVENTS = Counter(
+    "payouts_db_pool_events_total",
+    "События пула соединений базы данных",
+    ["alias", "event"],
+)
+DB_POOL_WAIT = Counter(
+    "payouts_db_pool_wait_seconds_total",
+    "Суммарное время ожидания свободного соединения пула",
+    ["alias"],
+)
+
+# Показатель статистики psycopg_pool -> состояние или событие в метриках
+DB_POOL_STATES = {"pool_size": "open", "pool_available": "idle", "requests_waiting": "waiting"}
+DB_POOL_EVENT_NAMES = {
+    "requests_num": "checkouts",
+    "requests_queued": "queued",
+    "requests_errors": "timeouts",
+    "returns_bad": "bad_returns",
+    "connections_num": "connects",
+    "connections_errors": "connect_errors",
+    "connections_lost": "lost",
+}
+
+_task_started: dict[str, float] = {}
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def reset_multiprocess_dir() -> None:
+    """Очистка каталога метрик при старте мастер-процесса, чтобы не учитывать прошлые запуски."""
+    path = os.environ.get(MULTIPROC_DIR_ENV)
+    if not path:
+        return
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
+
+
+def get_registry() -> CollectorRegistry:
+    """Реестр для выгрузки: в многопроцессном режиме собирает значения всех процессов."""
+    if not is_multiprocess():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def record_deferral(bik: str) -> None:
+    BANK_DEFERRALS.labels(bik).inc()
+
+
+def record_db_pool(alias: str, stats: dict[str, int]) -> None:
+    """Метрики пула по статистике pop_stats(): счетчики накоплены с прошлого вызова."""
+    for key, state in DB_POOL_STATES.items():
+        DB_POOL_CONNECTIONS.labels(alias, state).set(stats.get(key, 0))
+    for key, event in DB_POOL_EVENT_NAMES.items():
+        if stats.get(key):
+            DB_POOL_EVENTS.labels(alias, event).inc(stats[key])
+    if stats.get("requests_wait_ms"):
+        DB_POOL_WAIT.labels(alias).inc(stats["requests_wait_ms"] / 1000)
+
+
+def record_transitions(old_status: str, new_status: str, count: int = 1) -> None:
+    if count:
+        STATUS_TRANSITIONS.labels(old_status, new_status).inc(count)
+
+
+class QueueDepthCollector(Collector):
+    """Глубина очередей, вычисляемая при каждом запросе /metrics"""
+
+    def collect(self):
+        from payouts.models import Payout, PayoutOutbox  # noqa: PLC0415
+        from payouts.partitions import active_since  # noqa: PLC0415
+
+        depth = GaugeMetricFamily(
+            "payouts_queue_depth", "Число заявок, ожидающих обработки", labels=["queue"]
+        )
+        # Активные заявки ищутся только в последних секциях таблицы
+        active = Payout.objects.filter(created_at__gte=active_since())
+        depth.add_metric(["pending"], active.filter(status=Payout.Status.PENDING).count())
+        depth.add_metric(["processing"], active.filter(status=Payout.Status.PROCESSING).count())
+        depth.add_metric(["outbox"], PayoutOutbox.objects.filter(sent_at__isnull=True).count())
+        depth.add_metric(
+            ["expired_leases"],
+            active.filter(
+                status=Payout.Status.PROCESSING, lease_expires_at__lt=timezone.now()
+            ).count(),
+        )
+
+        for queue, length in _broker_queue_lengths().items():
+            depth.add_metric([f"broker:{queue}"], length)
+        yield depth
+
+
+def _broker_queue_lengths() -> dict[str, int]:
+    """Длина очереди служебных задач Celery и очередей заявок из PAYOUTS_QUEUES."""
+    from app.celery import app  # noqa: PLC0415
+
+    lengths = {}
+    try:
+        with app.connection_for_read() as connection:
+            for name in (app.conf.task_default_queue, *settings.PAYOUTS_QUEUES):
+                queue = connection.default_channel.queue_declare(name, passive=True)
+                lengths[name] = queue.message_count
+    except Exception as exc:
+        logger.warning(f"Не удалось получить длину очереди брокера: {exc}")
+    return lengths
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    registry = get_registry()
+    output = generate_latest(registry)
+    queue_registry = CollectorRegistry()
+    queue_registry.register(QueueDepthCollector())
+    output += generate_latest(queue_registry)
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """Гистограмма времени ответа по действиям viewset-ов DRF и обработчикам приложения"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    @staticmethod
+    def observe(request: HttpRequest, response: HttpResponse, started: float) -> None:
+        labels = getattr(request, "_metrics_labels", None)
+        if labels is not None:
+            REQUEST_LATENCY.labels(*labels, response.status_code).observe(
+                time.perf_counter() - started
+            )
+
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs) -> None:
+        if not view_func.__module__.startswith("payouts."):
+            return None
+        view_class = getattr(view_func, "cls", None)
+        actions = getattr(view_func, "actions", None)
+        if view_class is not None and actions is not None:
+            labels = (view_class.__name__, actions.get(request.method.lower(), "unknown"))
+        else:
+            labels = (view_func.__name__, request.resolver_match.url_name or "unknown")
+        request._metrics_labels = (*labels, request.method)
+        return None
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, **kwargs) -> None:
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, retval=None, state=None, **kwargs) -> None:
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name).observe(time.perf_counter() - started)
+
+    if isinstance(retval, dict) and "status" in retval:
+        outcome = retval["status"]
+    else:
+        outcome = (state or "unknown").lower()
+    TASK_OUTCOMES.labels(task.name, outcome).inc()
+
+
+@task_retry.connect
+def _on_task_retry(sender=None, **kwargs) -> None:
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+@celeryd_init.connect
+def _on_worker_init(**kwargs) -> None:
+    reset_multiprocess_dir()
+
+
+@worker_ready.connect
+def _on_worker_ready(**kwargs) -> None:
+    port = settings.PAYOUTS_METRICS_WORKER_PORT
+    if port:
+        start_http_server(port, registry=get_registry())
+        logger.info(f"Метрики воркера доступны на порту {port}")
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(pid=None, **kwargs) -> None:
+    mark_process_dead(pid or os.getpid())
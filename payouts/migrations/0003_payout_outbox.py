@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0002_load_recipients'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата отправки в брокер')),
+                ('payout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='payouts.payout', verbose_name='Заявка на выплату')),
+            ],
+            options={
+                'verbose_name': 'Сообщение outbox',
+                'verbose_name_plural': 'Сообщения outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['id'], name='payouts_outbox_unsent_idx')],
+            },
+        ),
+    ]
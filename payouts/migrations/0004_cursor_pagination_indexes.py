@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 11:01
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payouts', '0003_payout_outbox'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(fields=['created_at', 'id'], name='payouts_pay_created_id_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='payout',
+            name='payouts_pay_created_b65d12_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='recipientdetails',
+            index=models.Index(fields=['full_name', 'id'], name='payouts_rec_name_id_idx'),
+        ),
+    ]
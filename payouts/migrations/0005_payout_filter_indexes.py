@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 11:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payouts', '0004_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(fields=['status', 'created_at'], name='payouts_pay_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(fields=['currency', 'created_at'], name='payouts_pay_curr_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(fields=['recipient_details', 'created_at'], name='payouts_pay_recip_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['created_at', 'id'], name='payouts_pay_active_created_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='payout',
+            name='payouts_pay_status_a5ad2e_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='payout',
+            name='payouts_pay_currenc_42f9c2_idx',
+        ),
+    ]
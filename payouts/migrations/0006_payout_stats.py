@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 11:05
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0005_payout_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День создания заявок')),
+                ('currency', models.CharField(choices=[('USD', 'Доллар США'), ('EUR', 'Евро'), ('GBP', 'Фунт стерлингов'), ('JPY', 'Японская иена'), ('CNY', 'Китайский юань'), ('CHF', 'Швейцарский франк'), ('CAD', 'Канадский доллар'), ('AUD', 'Австралийский доллар'), ('NZD', 'Новозеландский доллар'), ('RUB', 'Российский рубль')], verbose_name='Валюта')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'В обработке'), ('completed', 'Выполнена'), ('failed', 'Ошибка'), ('cancelled', 'Отменена')], verbose_name='Статус заявки')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Количество заявок')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=20, verbose_name='Сумма заявок')),
+            ],
+            options={
+                'verbose_name': 'Статистика заявок',
+                'verbose_name_plural': 'Статистика заявок',
+                'ordering': ['-day', 'currency', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'currency', 'status'), name='payouts_stats_bucket_unique')],
+            },
+        ),
+    ]
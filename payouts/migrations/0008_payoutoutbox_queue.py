@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0007_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payoutoutbox',
+            name='queue',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Очередь Celery'),
+        ),
+    ]
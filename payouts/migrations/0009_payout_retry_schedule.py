@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 16:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payouts', '0008_payoutoutbox_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='attempt_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Неудачных попыток'),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Время следующей попытки'),
+        ),
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(condition=models.Q(('next_attempt_at__isnull', False), ('status', 'pending')), fields=['next_attempt_at'], name='payouts_pay_retry_due_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 16:50
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payouts', '0009_payout_retry_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='worker_id',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Воркер, захвативший заявку'),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Срок аренды заявки воркером'),
+        ),
+        AddIndexConcurrently(
+            model_name='payout',
+            index=models.Index(condition=models.Q(('lease_expires_at__isnull', False), ('status', 'processing')), fields=['lease_expires_at'], name='payouts_pay_lease_idx'),
+        ),
+    ]
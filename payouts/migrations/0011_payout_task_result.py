@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0010_payout_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutTaskResult',
+            fields=[
+                ('payout_id', models.UUIDField(primary_key=True, serialize=False, verbose_name='ID заявки')),
+                ('outcome', models.CharField(max_length=32, verbose_name='Итог обработки')),
+                ('finished_at', models.DateTimeField(db_index=True, verbose_name='Время завершения')),
+            ],
+            options={
+                'verbose_name': 'Итог обработки заявки',
+                'verbose_name_plural': 'Итоги обработки заявок',
+            },
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 6.0 on 2026-10-18 18:05
+
+from datetime import UTC, datetime
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.utils import timezone
+
+
+TABLE = 'payouts_payout'
+LEGACY = 'payouts_payout_legacy'
+# Секции, создаваемые вперед при переходе; дальше их создает manage_payout_partitions
+PREMAKE_MONTHS = 3
+
+
+def month_start(value, months=0):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=UTC)
+
+
+def partition_payouts(apps, schema_editor):
+    """
+    Перевод payouts_payout в секционированную по месяцам created_at таблицу.
+
+    Существующая таблица не копируется, а подключается секцией payouts_payout_legacy
+    с диапазоном до начала следующего месяца. Долгие шаги (уникальный индекс и проверка
+    диапазона) выполняются без блокировки записи, под эксклюзивной блокировкой -
+    только переименования и ATTACH PARTITION без сканирования таблицы.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE])
+        if cursor.fetchone():
+            return
+
+    Payout = apps.get_model('payouts', 'Payout')
+    quote = schema_editor.quote_name
+    upper = month_start(timezone.now(), 1)
+
+    # Первичный ключ секционированной таблицы обязан включать ключ секционирования
+    schema_editor.execute(
+        f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS payouts_payout_id_created_uniq '
+        f'ON {TABLE} (id, created_at)'
+    )
+    schema_editor.execute(
+        f'CREATE TABLE {TABLE}_partitioned (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE (created_at)'
+    )
+    # Проверенное ограничение диапазона позволяет ATTACH PARTITION не сканировать таблицу
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {LEGACY}_range "
+        f"CHECK (created_at < '{upper.isoformat()}') NOT VALID"
+    )
+    schema_editor.execute(f'ALTER TABLE {TABLE} VALIDATE CONSTRAINT {LEGACY}_range')
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [TABLE],
+        )
+        (pkey,) = cursor.fetchone()
+        schema_editor.execute(
+            f'ALTER TABLE {TABLE} DROP CONSTRAINT {quote(pkey)}, '
+            f'ADD CONSTRAINT {LEGACY}_pkey PRIMARY KEY USING INDEX payouts_payout_id_created_uniq'
+        )
+        schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {LEGACY}')
+        for index in Payout._meta.indexes:
+            schema_editor.execute(f'ALTER INDEX {index.name} RENAME TO {index.name}_legacy')
+
+        schema_editor.execute(f'ALTER TABLE {TABLE}_partitioned RENAME TO {TABLE}')
+        schema_editor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)')
+        schema_editor.execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_recipient_details_fk '
+            f'FOREIGN KEY (recipient_details_id) REFERENCES payouts_recipientdetails (id) '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {TABLE}_recipient_details_idx ON {TABLE} (recipient_details_id)'
+        )
+        for index in Payout._meta.indexes:
+            schema_editor.execute(index.create_sql(Payout, schema_editor))
+
+        # Индексы и ограничения родительской таблицы сопоставляются с существующими индексами секции
+        schema_editor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{upper.isoformat()}')"
+        )
+        schema_editor.execute(f'ALTER TABLE {LEGACY} DROP CONSTRAINT {LEGACY}_range')
+
+        for offset in range(PREMAKE_MONTHS):
+            start, end = month_start(upper, offset), month_start(upper, offset + 1)
+            schema_editor.execute(
+                f"CREATE TABLE {TABLE}_p{start:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payouts', '0011_payout_task_result'),
+    ]
+
+    operations = [
+        # Внешний ключ не может ссылаться только на id секционированной таблицы
+        migrations.AlterField(
+            model_name='payoutoutbox',
+            name='payout',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='payouts.payout', verbose_name='Заявка на выплату'),
+        ),
+        migrations.RunPython(partition_payouts, elidable=False),
+    ]
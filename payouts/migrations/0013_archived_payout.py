@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0012_payout_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPayout',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False, verbose_name='ID заявки')),
+                ('path', models.CharField(max_length=255, verbose_name='Файл архива')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата переноса в архив')),
+            ],
+            options={
+                'verbose_name': 'Архивная заявка',
+                'verbose_name_plural': 'Архивные заявки',
+            },
+        ),
+    ]
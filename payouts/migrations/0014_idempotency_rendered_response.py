@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 20:30
+
+import json
+
+from django.db import migrations, models
+
+
+def render_stored_responses(apps, schema_editor):
+    """Тела уже сохраненных ответов в JSON, как их рендерит JSONRenderer DRF."""
+    IdempotencyKey = apps.get_model('payouts', 'IdempotencyKey')
+    for key in IdempotencyKey.objects.only('response_json').iterator():
+        key.response_body = json.dumps(
+            key.response_json, ensure_ascii=False, separators=(',', ':')
+        ).encode()
+        key.save(update_fields=['response_body'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0013_archived_payout'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='idempotencykey',
+            old_name='response_body',
+            new_name='response_json',
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response_body',
+            field=models.BinaryField(default=b'', verbose_name='Тело ответа'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response_content_type',
+            field=models.CharField(default='application/json', max_length=255, verbose_name='Тип содержимого ответа'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(render_stored_responses, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='response_json',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 21:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('payouts', '0014_idempotency_rendered_response'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payoutoutbox',
+            index=models.Index(condition=models.Q(('sent_at__isnull', False)), fields=['sent_at'], name='payouts_outbox_sent_idx'),
+        ),
+    ]
@@ -32,6 +32,7 @@ class RecipientDetails(BaseModel):
         ordering = ["full_name"]
         indexes = [
             models.Index(fields=["inn"]),
+            models.Index(fields=["full_name", "id"], name="payouts_rec_name_id_idx"),
         ]
 
     def __str__(self):
@@ -39,7 +40,11 @@ class RecipientDetails(BaseModel):
 
 
 class Payout(BaseModel):
-    """Модель для хранения заявок на выплаты"""
+    """
+    Модель для хранения заявок на выплаты.
+
+    В PostgreSQL таблица секционирована по месяцам created_at (payouts/partitions.py).
+    """
 
     class Currency(models.TextChoices):
         """ENUM для основных валют мира"""
@@ -85,16 +90,159 @@ class Payout(BaseModel):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
     error_message = models.TextField(blank=True, verbose_name="Сообщение об ошибке")
+    attempt_count = models.PositiveIntegerField(default=0, verbose_name="Неудачных попыток")
+    next_attempt_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Время следующей попытки"
+    )
+    worker_id = models.CharField(
+        max_length=255, blank=True, verbose_name="Воркер, захвативший заявку"
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Срок аренды заявки воркером"
+    )
 
     class Meta:
         verbose_name = "Заявка на выплату"
         verbose_name_plural = "Заявки на выплату"
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["status"]),
-            models.Index(fields=["created_at"]),
-            models.Index(fields=["currency"]),
+            models.Index(fields=["created_at", "id"], name="payouts_pay_created_id_idx"),
+            models.Index(fields=["status", "created_at"], name="payouts_pay_status_created_idx"),
+            models.Index(fields=["currency", "created_at"], name="payouts_pay_curr_created_idx"),
+            models.Index(
+                fields=["recipient_details", "created_at"], name="payouts_pay_recip_created_idx"
+            ),
+            # Активные заявки: очередь обработки и мониторинг зависших
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status__in=["pending", "processing"]),
+                name="payouts_pay_active_created_idx",
+            ),
+            # Запланированные повторные попытки для периодической публикации
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending", next_attempt_at__isnull=False),
+                name="payouts_pay_retry_due_idx",
+            ),
+            # Аренды захваченных заявок для поиска истекших
+            models.Index(
+                fields=["lease_expires_at"],
+                condition=models.Q(status="processing", lease_expires_at__isnull=False),
+                name="payouts_pay_lease_idx",
+            ),
         ]
 
     def __str__(self):
         return f"Заявка #{self.id} - {self.amount} {self.currency}"
+
+
+class PayoutOutbox(models.Model):
+    """Исходящие сообщения на обработку заявок (transactional outbox)"""
+
+    # Без ограничения в базе: первичный ключ секционированной таблицы заявок - (id, created_at)
+    payout = models.ForeignKey(
+        Payout,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="outbox_messages",
+        verbose_name="Заявка на выплату",
+    )
+    queue = models.CharField(max_length=64, blank=True, verbose_name="Очередь Celery")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки в брокер")
+
+    class Meta:
+        verbose_name = "Сообщение outbox"
+        verbose_name_plural = "Сообщения outbox"
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(sent_at__isnull=True),
+                name="payouts_outbox_unsent_idx",
+            ),
+            # Отправленные сообщения для удаления по сроку хранения
+            models.Index(
+                fields=["sent_at"],
+                condition=models.Q(sent_at__isnull=False),
+                name="payouts_outbox_sent_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.id} - {self.payout_id}"
+
+
+class PayoutStats(models.Model):
+    """Сводная статистика заявок по дням, валютам и статусам, обновляется инкрементально"""
+
+    day = models.DateField(verbose_name="День создания заявок")
+    currency = models.CharField(choices=Payout.Currency.choices, verbose_name="Валюта")
+    status = models.CharField(choices=Payout.Status.choices, verbose_name="Статус заявки")
+    count = models.BigIntegerField(default=0, verbose_name="Количество заявок")
+    total_amount = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal("0"), verbose_name="Сумма заявок"
+    )
+
+    class Meta:
+        verbose_name = "Статистика заявок"
+        verbose_name_plural = "Статистика заявок"
+        ordering = ["-day", "currency", "status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "currency", "status"], name="payouts_stats_bucket_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.currency} {self.status}: {self.count}"
+
+
+class IdempotencyKey(models.Model):
+    """Ключи идемпотентности запросов на создание заявок с сохраненным ответом"""
+
+    key = models.CharField(max_length=255, unique=True, verbose_name="Ключ идемпотентности")
+    request_hash = models.CharField(max_length=64, verbose_name="Хеш запроса")
+    response_status = models.PositiveSmallIntegerField(verbose_name="HTTP статус ответа")
+    # Отрендеренное тело ответа: повтор отдает его байт в байт
+    response_body = models.BinaryField(verbose_name="Тело ответа")
+    response_content_type = models.CharField(max_length=255, verbose_name="Тип содержимого ответа")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Срок действия")
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Ключи идемпотентности"
+
+    def __str__(self):
+        return self.key
+
+
+class PayoutTaskResult(models.Model):
+    """Итог последнего выполнения задачи обработки заявки, одна строка на заявку"""
+
+    payout_id = models.UUIDField(primary_key=True, verbose_name="ID заявки")
+    outcome = models.CharField(max_length=32, verbose_name="Итог обработки")
+    finished_at = models.DateTimeField(db_index=True, verbose_name="Время завершения")
+
+    class Meta:
+        verbose_name = "Итог обработки заявки"
+        verbose_name_plural = "Итоги обработки заявок"
+
+    def __str__(self):
+        return f"{self.payout_id}: {self.outcome}"
+
+
+class ArchivedPayout(models.Model):
+    """Индекс заявок, перенесенных в архив: файл, в котором лежит строка заявки"""
+
+    id = models.UUIDField(primary_key=True, verbose_name="ID заявки")
+    path = models.CharField(max_length=255, verbose_name="Файл архива")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата переноса в архив")
+
+    class Meta:
+        verbose_name = "Архивная заявка"
+        verbose_name_plural = "Архивные заявки"
+
+    def __str__(self):
+        return f"{self.id} ({self.path})"
@@ -0,0 +1,123 @@
+import json
+
+from typing import Any
+
+from django.db.models import F, Q, QuerySet
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация по кортежу всех полей ordering.
+
+    Курсор DRF хранит значение только первого поля сортировки и смещение среди строк
+    с тем же значением, ограниченное offset_cutoff: при большом числе совпадений
+    страницы повторяются или пропускают строки, а запрос дорожает. Здесь позиция -
+    значения всех полей ordering (последнее уникально), и следующая страница
+    выбирается сравнением кортежей (a, b) > (x, y) по составному индексу, поэтому
+    смещение не нужно и стоимость запроса не зависит от глубины страницы.
+
+    Все поля ordering сортируются в одном направлении.
+    """
+
+    def get_ordering(self, request, queryset, view) -> tuple:
+        ordering = super().get_ordering(request, queryset, view)
+        assert len({field.startswith("-") for field in ordering}) == 1, (
+            "Все поля ordering должны сортироваться в одном направлении"
+        )
+        return ordering
+
+    def _fields(self) -> list[str]:
+        return [field.lstrip("-") for field in self.ordering]
+
+    def _get_position_from_instance(self, instance: Any, ordering: tuple) -> str:
+        values = []
+        for name in self._fields():
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values, ensure_ascii=False)
+
+    def _filter_position(self, queryset: QuerySet, position: str, reverse: bool) -> QuerySet:
+        """Строки после позиции курсора в направлении обхода."""
+        model = queryset.model
+        try:
+            raw = json.loads(position)
+            values = tuple(
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self._fields(), raw, strict=True)
+            )
+        except (TypeError, ValueError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+        first = self._fields()[0]
+        # Обход назад по убыванию или вперед по возрастанию (XOR), как в CursorPagination
+        if reverse != self.ordering[0].startswith("-"):
+            lookup, bound = TupleLessThan, Q(**{f"{first}__lte": values[0]})
+        else:
+            lookup, bound = TupleGreaterThan, Q(**{f"{first}__gte": values[0]})
+        # Условие на первое поле отдельно позволяет отсечь секции таблицы заявок
+        columns = Tuple(*(F(name) for name in self._fields()))
+        return queryset.filter(bound, lookup(columns, values))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        ordering = [field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering]
+        queryset = queryset.order_by(*(ordering if reverse else self.ordering))
+        if current_position is not None:
+            queryset = self._filter_position(queryset, current_position, reverse)
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position
+            else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class PayoutCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация заявок от новых к старым по (created_at, id)."""
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class RecipientCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация реквизитов получателей по (full_name, id)."""
+
+    ordering = ("full_name", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
@@ -0,0 +1,173 @@
+"""
+Секционирование таблицы заявок по месяцам (PostgreSQL, декларативные секции по created_at).
+
+Таблица payouts_payout секционирована по диапазону created_at: секция на каждый месяц
+(payouts_payout_pГГГГ_ММ, границы - начало месяца по UTC) и секция payouts_payout_legacy
+со всеми заявками, созданными до перехода (миграция 0012_payout_partitioning).
+
+Команда manage_payout_partitions заранее создает секции будущих месяцев и отсоединяет
+или удаляет секции старше срока хранения. Запросы воркеров к активным заявкам
+ограничены снизу active_since(), поэтому затрагивают только последние секции;
+активные заявки старых секций раз в час обрабатывает tasks.sweep_stale_payouts_task.
+"""
+
+import logging
+import re
+
+from datetime import UTC, date, datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from payouts.models import Payout
+
+
+logger = logging.getLogger(__name__)
+
+TABLE = Payout._meta.db_table
+
+BOUND_RE = re.compile(r"FROM \((MINVALUE|'[^']+')\) TO \((MAXVALUE|'[^']+')\)")
+
+
+class Partition(NamedTuple):
+    """Секция таблицы заявок: [start, end); start None - без нижней границы"""
+
+    name: str
+    start: datetime | None
+    end: datetime | None
+
+
+def month_start(value: date, months: int = 0) -> datetime:
+    """Начало месяца value, сдвинутого на months месяцев, по UTC."""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=UTC)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{TABLE}_p{start:%Y_%m}"
+
+
+def active_since() -> datetime:
+    """
+    Нижняя граница created_at для запросов к активным заявкам.
+
+    Начало месяца, отстоящего от текущего на PAYOUTS_PARTITION_ACTIVE_MONTHS - 1:
+    заявки в PENDING и PROCESSING не живут дольше нескольких часов повторных попыток,
+    а условие по created_at позволяет планировщику отбросить старые секции.
+    """
+    return month_start(timezone.now(), 1 - settings.PAYOUTS_PARTITION_ACTIVE_MONTHS)
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def _parse_bound(value: str) -> datetime | None:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'")).astimezone(UTC)
+
+
+def list_partitions() -> list[Partition]:
+    """Секции таблицы заявок по возрастанию границ."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_RE.search(bound)
+        if match is None:
+            logger.warning(f"Секция {name} с неподдерживаемой границей пропущена: {bound}")
+            continue
+        start, end = (_parse_bound(value) for value in match.groups())
+        partitions.append(Partition(name, start, end))
+    return sorted(partitions, key=lambda p: p.start or datetime.min.replace(tzinfo=UTC))
+
+
+def missing_months(partitions: list[Partition], today: date, ahead: int) -> list[datetime]:
+    """Начала месяцев от текущего до today + ahead, не покрытые существующими секциями."""
+    months = []
+    for offset in range(ahead + 1):
+        start, end = month_start(today, offset), month_start(today, offset + 1)
+        covered = any(
+            (p.start is None or p.start < end) and (p.end is None or p.end > start)
+            for p in partitions
+        )
+        if not covered:
+            months.append(start)
+    return months
+
+
+def expired_partitions(
+    partitions: list[Partition], today: date, retention_months: int
+) -> list[Partition]:
+    """Секции, все заявки которых созданы раньше retention_months полных месяцев назад."""
+    cutoff = month_start(today, -retention_months)
+    return [p for p in partitions if p.end is not None and p.end <= cutoff]
+
+
+def create_partitions(ahead: int) -> list[str]:
+    """Создание секций текущего месяца и ahead следующих, если их еще нет."""
+    quote = connection.ops.quote_name
+    created = []
+    for start in missing_months(list_partitions(), timezone.now(), ahead):
+        name = partition_name(start)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} "
+                f"FOR VALUES FROM ('{start.isoformat()}') "
+                f"TO ('{month_start(start, 1).isoformat()}')"
+            )
+        logger.info(f"Создана секция {name}")
+        created.append(name)
+    return created
+
+
+def has_active_payouts(partition: Partition) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT 1 FROM {connection.ops.quote_name(partition.name)} "
+            "WHERE status IN (%s, %s) LIMIT 1",
+            [Payout.Status.PENDING, Payout.Status.PROCESSING],
+        )
+        return cursor.fetchone() is not None
+
+
+def expire_partitions(retention_months: int, *, drop: bool = False) -> list[str]:
+    """
+    Отсоединение секций старше retention_months месяцев, при drop - с удалением.
+
+    DETACH PARTITION CONCURRENTLY не блокирует запись в остальные секции, но не
+    выполняется внутри транзакции. Отсоединенная таблица остается в базе для выгрузки
+    в архив. Секции с заявками в PENDING или PROCESSING пропускаются, пока их
+    не завершит tasks.sweep_stale_payouts_task.
+    """
+    quote = connection.ops.quote_name
+    expired = []
+    for partition in expired_partitions(list_partitions(), timezone.now(), retention_months):
+        if has_active_payouts(partition):
+            logger.error(f"Секция {partition.name} содержит активные заявки и не отсоединена")
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(partition.name)} CONCURRENTLY"
+            )
+            if drop:
+                cursor.execute(f"DROP TABLE {quote(partition.name)}")
+        logger.info(f"Секция {partition.name} {'удалена' if drop else 'отсоединена'}")
+        expired.append(partition.name)
+    return expired
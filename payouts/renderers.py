@@ -0,0 +1,71 @@
+import decimal
+
+import msgpack
+import orjson
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+# Разделители строк JavaScript экранируются так же, как в JSONRenderer DRF
+JS_LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+_drf_encoder = JSONEncoder()
+
+
+def _orjson_default(obj):
+    """
+    Типы, которые orjson не кодирует сам: Decimal выводится точным числом без
+    промежуточного float, остальное (даты, ленивые строки и т.д.) — как в JSONEncoder DRF.
+    """
+    if isinstance(obj, decimal.Decimal):
+        if not obj.is_finite():
+            raise TypeError(f"Недопустимое значение Decimal в JSON: {obj}")
+        return orjson.Fragment(str(obj).encode())
+    return _drf_encoder.default(obj)
+
+
+def _msgpack_default(obj):
+    """Decimal передается строкой без потери точности, даты — в формате JSON-ответов."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    return _drf_encoder.default(obj)
+
+
+class OrjsonRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с тем же выводом, что и JSONRenderer DRF.
+
+    Запросы с отступом (application/json; indent=4 и Browsable API) отдаются стандартным
+    JSONRenderer, так как orjson поддерживает только отступ в 2 пробела.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_orjson_default, option=ORJSON_OPTIONS)
+        for separator, escaped in JS_LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Рендерер application/msgpack для внутренних сервисов, выбирается по заголовку Accept"""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
@@ -0,0 +1,122 @@
+"""
+Повторные попытки обработки заявок, запланированные в базе данных.
+
+Вместо отложенных сообщений брокера (ETA), которые воркер держит в памяти до наступления
+срока, заявка возвращается в PENDING со временем следующей попытки next_attempt_at.
+Периодическая задача sweep_retries_task публикует заявки, срок которых наступил.
+
+Заявка в PENDING использует lease_expires_at как срок аренды опубликованного сообщения:
+пока он не истек, заявка не публикуется повторно. При возврате в PENDING аренда снимается.
+"""
+
+import random
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from payouts.models import Payout
+from payouts.state_machine import bulk_transition
+
+
+# Разброс задержки отложенных заявок, чтобы они не возвращались к банку одной волной
+DEFER_JITTER = 0.2
+
+RETRY_FIELDS = ["attempt_count", "next_attempt_at", "error_message", "lease_expires_at"]
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Задержка в секундах после attempt неудачных попыток.
+
+    Растет экспоненциально от PAYOUTS_RETRY_BASE_DELAY до PAYOUTS_RETRY_MAX_DELAY;
+    случайный разброс в верхней половине интервала разводит повторы заявок,
+    упавших одновременно.
+    """
+    delay = min(
+        settings.PAYOUTS_RETRY_MAX_DELAY,
+        settings.PAYOUTS_RETRY_BASE_DELAY * 2 ** max(attempt - 1, 0),
+    )
+    return random.uniform(delay / 2, delay)
+
+
+def retry_fields(payout: Payout, error: str) -> tuple[str, dict]:
+    """Статус и поля заявки после неудачной попытки: новая попытка или окончательная ошибка."""
+    attempt = payout.attempt_count + 1
+    if attempt >= settings.PAYOUTS_RETRY_MAX_ATTEMPTS:
+        next_attempt_at, new_status = None, Payout.Status.FAILED
+    else:
+        next_attempt_at = timezone.now() + timedelta(seconds=backoff_delay(attempt))
+        new_status = Payout.Status.PENDING
+    return new_status, {
+        "attempt_count": attempt,
+        "next_attempt_at": next_attempt_at,
+        "error_message": error,
+        "lease_expires_at": None,
+    }
+
+
+def schedule_retries(
+    payouts: list[Payout], errors: list[BaseException], expected: dict | None = None
+) -> dict[str, int]:
+    """
+    Планирование следующей попытки заявок в PROCESSING после ошибки банковской операции.
+
+    Заявки, исчерпавшие PAYOUTS_RETRY_MAX_ATTEMPTS попыток, переводятся в FAILED.
+    Статусы меняются bulk_transition с условиями expected, а номер и время попытки
+    каждой заявки записываются одним bulk_update. Возвращает число заявок по новым
+    статусам; заявки, статус которых успели изменить параллельно, не учитываются.
+    """
+    planned: dict[str, list[tuple[Payout, dict]]] = {
+        Payout.Status.PENDING: [],
+        Payout.Status.FAILED: [],
+    }
+    for payout, error in zip(payouts, errors, strict=True):
+        new_status, fields = retry_fields(payout, str(error))
+        planned[new_status].append((payout, fields))
+
+    counts = {}
+    with transaction.atomic():
+        for new_status, items in planned.items():
+            changed = {
+                payout.id
+                for payout in bulk_transition(
+                    [payout for payout, _ in items], new_status, system=True, expected=expected
+                )
+            }
+            updated = []
+            for payout, fields in items:
+                if payout.id in changed:
+                    for name, value in fields.items():
+                        setattr(payout, name, value)
+                    updated.append(payout)
+            Payout.objects.bulk_update(updated, RETRY_FIELDS)
+            counts[new_status] = len(updated)
+    return counts
+
+
+def defer(payouts: list[Payout], delays: list[float], expected: dict | None = None) -> None:
+    """
+    Перенос заявок на delay секунд без расхода попыток, пока банк не принимает вызовы.
+
+    Захваченные заявки возвращаются из PROCESSING в PENDING при условиях expected,
+    для незахваченных время попытки меняется, только пока они остаются в PENDING.
+    """
+    now = timezone.now()
+    for payout, delay in zip(payouts, delays, strict=True):
+        payout.next_attempt_at = now + timedelta(
+            seconds=delay * random.uniform(1, 1 + DEFER_JITTER)
+        )
+        payout.lease_expires_at = None
+
+    with transaction.atomic():
+        claimed = [payout for payout in payouts if payout.status == Payout.Status.PROCESSING]
+        returned = bulk_transition(claimed, Payout.Status.PENDING, system=True, expected=expected)
+        Payout.objects.bulk_update(returned, ["next_attempt_at", "lease_expires_at"])
+        for payout in payouts:
+            if payout not in claimed:
+                Payout.objects.filter(
+                    id=payout.id, created_at=payout.created_at, status=Payout.Status.PENDING
+                ).update(next_attempt_at=payout.next_attempt_at, lease_expires_at=None)
@@ -0,0 +1,45 @@
+from decimal import Decimal
+from typing import Any, NamedTuple
+
+from django.conf import settings
+
+from payouts.models import Payout
+
+
+class Route(NamedTuple):
+    """Очередь Celery и приоритет сообщения внутри нее"""
+
+    queue: str
+    priority: int
+
+
+def get_route(queue: str) -> Route:
+    """Маршрут по имени очереди; очередь, удаленная из настроек, заменяется очередью по умолчанию."""
+    config = settings.PAYOUTS_QUEUES.get(queue)
+    if config is None:
+        queue = settings.PAYOUTS_DEFAULT_QUEUE
+        config = settings.PAYOUTS_QUEUES[queue]
+    return Route(queue, config["priority"])
+
+
+def default_route() -> Route:
+    return get_route(settings.PAYOUTS_DEFAULT_QUEUE)
+
+
+def rule_matches(rule: dict[str, Any], payout: Payout) -> bool:
+    """Все заданные в правиле условия должны выполняться; пустое правило подходит любой заявке."""
+    if "min_amount" in rule and payout.amount < Decimal(rule["min_amount"]):
+        return False
+    if "max_amount" in rule and payout.amount >= Decimal(rule["max_amount"]):
+        return False
+    if "currencies" in rule and payout.currency not in rule["currencies"]:
+        return False
+    return not ("biks" in rule and payout.recipient_details.bik not in rule["biks"])
+
+
+def route_payout(payout: Payout) -> Route:
+    """Очередь заявки по первому подходящему правилу PAYOUTS_QUEUE_ROUTES."""
+    for rule in settings.PAYOUTS_QUEUE_ROUTES:
+        if rule_matches(rule, payout):
+            return get_route(rule["queue"])
+    return default_route()
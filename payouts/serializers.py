@@ -1,6 +1,14 @@
-from rest_framework import serializers
+from functools import cache
+from typing import Any, Iterable
 
-from payouts.models import Payout, RecipientDetails
+from django.db import transaction
+from django.db.models import QuerySet
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from payouts.models import Payout, PayoutStats, RecipientDetails
+from payouts.state_machine import can_transition, transition
+from payouts.stats import record_created
 from payouts.validators import (
     validate_bank_account,
     validate_bik,
@@ -10,6 +18,12 @@ from payouts.validators import (
 )
 
 
+class PayoutStatusConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Статус заявки был изменен параллельно, повторите запрос"
+    default_code = "status_conflict"
+
+
 class RecipientDetailsSerializer(serializers.ModelSerializer):
     """Сериализатор для реквизитов получателя"""
 
@@ -50,11 +64,42 @@ class RecipientDetailsSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class PayoutListSerializer(serializers.ListSerializer):
+    """Пакетный сериализатор заявок: невалидные элементы не отклоняют весь пакет"""
+
+    BULK_CREATE_BATCH_SIZE = 1000
+
+    def run_validation(self, data=serializers.empty):
+        self.item_errors = []
+        return super().run_validation(data)
+
+    def run_child_validation(self, data):
+        try:
+            validated = super().run_child_validation(data)
+        except serializers.ValidationError as exc:
+            self.item_errors.append(exc.detail)
+            return None
+        self.item_errors.append({})
+        return validated
+
+    def to_internal_value(self, data):
+        return [item for item in super().to_internal_value(data) if item is not None]
+
+    def create(self, validated_data):
+        """Вставка всех валидных заявок одним bulk_create в одной транзакции"""
+        payouts = [Payout(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            Payout.objects.bulk_create(payouts, batch_size=self.BULK_CREATE_BATCH_SIZE)
+            record_created(payouts)
+        return payouts
+
+
 class PayoutSerializer(serializers.ModelSerializer):
     """Сериализатор для заявок на выплату"""
 
     class Meta:
         model = Payout
+        list_serializer_class = PayoutListSerializer
         fields = [
             "id",
             "amount",
@@ -65,8 +110,17 @@ class PayoutSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "error_message",
+            "attempt_count",
+            "next_attempt_at",
+        ]
+        read_only_fields = [
+            "id",
+            "created_at",
+            "updated_at",
+            "error_message",
+            "attempt_count",
+            "next_attempt_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at", "error_message"]
 
     def validate(self, data):
         # Устанавливаем статус PENDING по умолчанию при создании
@@ -75,34 +129,130 @@ class PayoutSerializer(serializers.ModelSerializer):
         return data
 
     def validate_status(self, value):
-        # Разрешаем только: pending -> processing -> completed/failed/cancelled
-        if self.instance is not None:
-            old = self.instance.status
-            allowed = {
-                Payout.Status.PENDING: [Payout.Status.PROCESSING, Payout.Status.CANCELLED],
-                Payout.Status.PROCESSING: [
-                    Payout.Status.COMPLETED,
-                    Payout.Status.FAILED,
-                    Payout.Status.CANCELLED,
-                ],
-                Payout.Status.COMPLETED: [],
-                Payout.Status.FAILED: [],
-                Payout.Status.CANCELLED: [],
-            }
-            if value not in allowed.get(old, []):
-                raise serializers.ValidationError(f"Нельзя перейти из {old} в {value}")
+        if self.instance is not None and not can_transition(self.instance.status, value):
+            raise serializers.ValidationError(f"Нельзя перейти из {self.instance.status} в {value}")
         return value
 
     def create(self, validated_data):
         """Создание заявки с реквизитами"""
-        payout = Payout.objects.create(**validated_data)
+        with transaction.atomic():
+            payout = Payout.objects.create(**validated_data)
+            record_created([payout])
         return payout
 
     def update(self, instance, validated_data):
-        """Обновление заявки"""
-        return super().update(instance, validated_data)
+        """
+        Обновление заявки.
+
+        Статус меняется условным UPDATE от прочитанного значения, остальные поля
+        сохраняются через update_fields, чтобы не перезаписать параллельную смену статуса.
+        """
+        new_status = validated_data.pop("status", instance.status)
+        with transaction.atomic():
+            if new_status != instance.status and not transition(instance, new_status):
+                raise PayoutStatusConflict()
+            if validated_data:
+                for field, value in validated_data.items():
+                    setattr(instance, field, value)
+                instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
 
     def to_representation(self, instance: Payout):
         data = super().to_representation(instance)
         data["recipient_details"] = RecipientDetailsSerializer(instance.recipient_details).data
         return data
+
+
+class PayoutStatsSerializer(serializers.ModelSerializer):
+    """Сериализатор сводной статистики заявок"""
+
+    class Meta:
+        model = PayoutStats
+        fields = ["day", "currency", "status", "count", "total_amount"]
+
+
+def _field_converters(serializer: serializers.Serializer) -> dict[str, Any]:
+    """
+    Функции приведения значений из .values() к представлению DRF.
+
+    Строковые поля и поля выбора возвращают строку без изменений, поэтому не приводятся.
+    """
+    return {
+        name: None
+        if isinstance(field, (serializers.CharField, serializers.ChoiceField))
+        else field.to_representation
+        for name, field in serializer.fields.items()
+    }
+
+
+@cache
+def _read_converters() -> tuple[dict[str, Any], dict[str, Any]]:
+    return _field_converters(PayoutSerializer()), _field_converters(RecipientDetailsSerializer())
+
+
+def _convert(converter, value):
+    if value is None or converter is None:
+        return value
+    return converter(value)
+
+
+class PayoutReadRepresentation:
+    """
+    Быстрое представление заявок для списка и карточки.
+
+    Выбирает из базы только нужные колонки через .values() и собирает словари напрямую,
+    без создания PayoutSerializer и вложенного RecipientDetailsSerializer на каждую строку.
+    Вывод совпадает с PayoutSerializer; параметр fields сужает набор полей, и широкие
+    текстовые колонки (description, error_message) не читаются, если их нет в ответе.
+    """
+
+    # Колонки, нужные курсорной пагинации независимо от набора полей ответа
+    REQUIRED_COLUMNS = ("id", "created_at")
+
+    def __init__(self, fields: Iterable[str] | None = None) -> None:
+        payout_converters, recipient_converters = _read_converters()
+        requested = set(fields) if fields else None
+        self.fields = [
+            name for name in PayoutSerializer.Meta.fields if requested is None or name in requested
+        ]
+        self.payout_converters = {
+            name: payout_converters[name] for name in self.fields if name != "recipient_details"
+        }
+        self.recipient_converters = (
+            recipient_converters if "recipient_details" in self.fields else {}
+        )
+
+    @classmethod
+    def from_query_params(cls, params: Any) -> "PayoutReadRepresentation":
+        """Набор полей из параметра fields=a,b,c; неизвестные поля — ValidationError."""
+        raw = params.get("fields")
+        if not raw:
+            return cls()
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = sorted(set(fields) - set(PayoutSerializer.Meta.fields))
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Неизвестные поля: {', '.join(unknown)}"})
+        return cls(fields)
+
+    def values(self, queryset: QuerySet[Payout]) -> QuerySet:
+        columns = dict.fromkeys(self.REQUIRED_COLUMNS)
+        columns.update(dict.fromkeys(self.payout_converters))
+        columns.update(
+            dict.fromkeys(f"recipient_details__{name}" for name in self.recipient_converters)
+        )
+        return queryset.values(*columns)
+
+    def to_representation(self, row: dict[str, Any]) -> dict[str, Any]:
+        data = {}
+        for name in self.fields:
+            if name == "recipient_details":
+                data[name] = {
+                    field: _convert(converter, row[f"recipient_details__{field}"])
+                    for field, converter in self.recipient_converters.items()
+                }
+            else:
+                data[name] = _convert(self.payout_converters[name], row[name])
+        return data
+
+    def to_list(self, rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        return [self.to_representation(row) for row in rows]
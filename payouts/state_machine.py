@@ -0,0 +1,162 @@
+from collections import defaultdict
+from typing import Any, Iterable
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from payouts.metrics import record_transitions
+from payouts.models import Payout
+from payouts.stats import record_changes
+from payouts.status_events import notify_payouts
+
+
+Status = Payout.Status
+
+# Переходы, доступные через API: pending -> processing -> completed/failed/cancelled
+ALLOWED_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    Status.PENDING: (Status.PROCESSING, Status.CANCELLED),
+    Status.PROCESSING: (Status.COMPLETED, Status.FAILED, Status.CANCELLED),
+    Status.COMPLETED: (),
+    Status.FAILED: (),
+    Status.CANCELLED: (),
+}
+
+# Дополнительные переходы воркеров: возврат в очередь и окончательная ошибка до обработки
+SYSTEM_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    Status.PENDING: (Status.FAILED,),
+    Status.PROCESSING: (Status.PENDING,),
+}
+
+UPDATE_CHUNK_SIZE = 1000
+
+
+class InvalidTransitionError(Exception):
+    """Переход между статусами не разрешен"""
+
+
+def can_transition(old_status: str, new_status: str, *, system: bool = False) -> bool:
+    allowed = ALLOWED_TRANSITIONS.get(old_status, ())
+    if system:
+        allowed += SYSTEM_TRANSITIONS.get(old_status, ())
+    return new_status in allowed
+
+
+def _check(old_status: str, new_status: str, system: bool) -> None:
+    if not can_transition(old_status, new_status, system=system):
+        raise InvalidTransitionError(f"Нельзя перейти из {old_status} в {new_status}")
+
+
+def transition(
+    payout: Payout,
+    new_status: str,
+    *,
+    system: bool = False,
+    expected: dict[str, Any] | None = None,
+    **fields: Any,
+) -> bool:
+    """
+    Атомарный переход заявки из наблюдаемого статуса payout.status в new_status.
+
+    Выполняется одним UPDATE ... WHERE id = %s AND status = <наблюдаемый статус>
+    без блокировки строки; условие по created_at оставляет в запросе одну секцию
+    таблицы. expected - дополнительные условия на значения полей, например владелец
+    аренды worker_id. Возвращает False, если статус или поля expected успели изменить
+    параллельно; при успехе обновляет payout и статистику и уведомляет подписчиков
+    о новом статусе.
+    """
+    old_status = payout.status
+    _check(old_status, new_status, system)
+
+    values = {"status": new_status, "updated_at": timezone.now(), **fields}
+    with transaction.atomic():
+        updated = Payout.objects.filter(
+            id=payout.id, created_at=payout.created_at, status=old_status, **(expected or {})
+        ).update(**values)
+        if not updated:
+            return False
+        record_changes([(payout, old_status, new_status)])
+        notify_payouts([payout], values)
+    record_transitions(old_status, new_status)
+
+    for name, value in values.items():
+        setattr(payout, name, value)
+    return True
+
+
+def _update_returning(
+    payouts: list[Payout],
+    old_status: str,
+    values: dict[str, Any],
+    expected: dict[str, Any],
+    cursor,
+) -> set:
+    """
+    UPDATE заявок из old_status с возвратом id фактически обновленных строк.
+
+    Нижняя граница created_at пакета отсекает секции старше самой ранней заявки.
+    """
+    meta = Payout._meta
+    quote = connection.ops.quote_name
+    assignments = ", ".join(f"{quote(meta.get_field(name).column)} = %s" for name in values)
+    params = [
+        meta.get_field(name).get_db_prep_save(value, connection) for name, value in values.items()
+    ]
+    params += [meta.pk.get_db_prep_value(payout.id, connection) for payout in payouts]
+    params.append(old_status)
+    created_at = meta.get_field("created_at")
+    params.append(created_at.get_db_prep_value(min(p.created_at for p in payouts), connection))
+    conditions = "".join(f"AND {quote(meta.get_field(name).column)} = %s " for name in expected)
+    params += [
+        meta.get_field(name).get_db_prep_value(value, connection)
+        for name, value in expected.items()
+    ]
+    placeholders = ", ".join(["%s"] * len(payouts))
+
+    cursor.execute(
+        f"UPDATE {quote(meta.db_table)} SET {assignments} "
+        f"WHERE {quote(meta.pk.column)} IN ({placeholders}) AND {quote('status')} = %s "
+        f"AND {quote(created_at.column)} >= %s {conditions}"
+        f"RETURNING {quote(meta.pk.column)}",
+        params,
+    )
+    return {meta.pk.to_python(row[0]) for row in cursor.fetchall()}
+
+
+def bulk_transition(
+    payouts: Iterable[Payout],
+    new_status: str,
+    *,
+    system: bool = False,
+    expected: dict[str, Any] | None = None,
+    **fields: Any,
+) -> list[Payout]:
+    """
+    Пакетный вариант transition: один UPDATE ... RETURNING id на наблюдаемый статус.
+
+    Возвращает заявки, которые действительно перешли в new_status; заявки,
+    статус или поля expected которых успели изменить параллельно, пропускаются.
+    """
+    by_status: dict[str, list[Payout]] = defaultdict(list)
+    for payout in payouts:
+        _check(payout.status, new_status, system)
+        by_status[payout.status].append(payout)
+    if not by_status:
+        return []
+
+    values = {"status": new_status, "updated_at": timezone.now(), **fields}
+    changed: list[Payout] = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for old_status, group in by_status.items():
+            for start in range(0, len(group), UPDATE_CHUNK_SIZE):
+                chunk = group[start : start + UPDATE_CHUNK_SIZE]
+                updated = _update_returning(chunk, old_status, values, expected or {}, cursor)
+                changed.extend(p for p in chunk if p.id in updated)
+                record_transitions(old_status, new_status, len(updated))
+
+        record_changes((payout, payout.status, new_status) for payout in changed)
+        notify_payouts(changed, values)
+
+    for payout in changed:
+        for name, value in values.items():
+            setattr(payout, name, value)
+    return changed
@@ -0,0 +1,128 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from payouts.archive import read_archived_period
+from payouts.models import Payout, PayoutStats
+
+
+def _bucket(payout: Payout, status: str) -> tuple:
+    return timezone.localdate(payout.created_at), payout.currency, status
+
+
+def record_changes(changes: Iterable[tuple[Payout, str | None, str | None]]) -> None:
+    """
+    Инкрементальное обновление статистики по изменениям (заявка, старый статус, новый статус).
+
+    Старый статус None означает создание заявки, новый статус None — удаление.
+    Вызывается в той же транзакции, что и изменение заявок.
+    """
+    deltas: dict[tuple, list] = defaultdict(lambda: [0, Decimal("0")])
+    for payout, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        if old_status is not None:
+            delta = deltas[_bucket(payout, old_status)]
+            delta[0] -= 1
+            delta[1] -= payout.amount
+        if new_status is not None:
+            delta = deltas[_bucket(payout, new_status)]
+            delta[0] += 1
+            delta[1] += payout.amount
+
+    apply_deltas(deltas)
+
+
+def record_created(payouts: Iterable[Payout]) -> None:
+    record_changes((payout, None, payout.status) for payout in payouts)
+
+
+def record_transition(payout: Payout, old_status: str | None, new_status: str | None) -> None:
+    record_changes([(payout, old_status, new_status)])
+
+
+def apply_deltas(deltas: dict[tuple, list]) -> None:
+    """Применение приращений одним INSERT ... ON CONFLICT DO UPDATE."""
+    rows = [(key, delta) for key, delta in sorted(deltas.items()) if delta[0] or delta[1]]
+    if not rows:
+        return
+
+    table = PayoutStats._meta.db_table
+    values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+    params = [
+        param
+        for (day, currency, status), (count, amount) in rows
+        for param in (day, currency, status, count, amount)
+    ]
+    # Ключи отсортированы, чтобы параллельные транзакции блокировали строки в одном порядке
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (day, currency, status, count, total_amount) "
+            f"VALUES {values} "
+            f"ON CONFLICT (day, currency, status) DO UPDATE SET "
+            f"count = {table}.count + EXCLUDED.count, "
+            f"total_amount = {table}.total_amount + EXCLUDED.total_amount",
+            params,
+        )
+
+
+def lock_stats(mode: str) -> None:
+    """
+    Блокировка таблицы статистики в текущей транзакции (только PostgreSQL).
+
+    SHARE ROW EXCLUSIVE пересчета конфликтует с ROW EXCLUSIVE, который берет
+    INSERT ... ON CONFLICT в apply_deltas, поэтому приращения и пересчет выполняются
+    по очереди.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {PayoutStats._meta.db_table} IN {mode} MODE")
+
+
+def rebuild_stats(date_from: date, date_to: date) -> int:
+    """
+    Пересчет статистики за дни [date_from, date_to] в одной транзакции.
+
+    Учитываются заявки таблицы и заявки, перенесенные в архив: перенос в архив
+    статистику не меняет, и пересчет не должен терять архивные дни.
+
+    Чтение и замена строк выполняются под блокировкой таблицы статистики: транзакции,
+    уже записавшие приращения, завершаются до чтения, и их изменения попадают
+    в пересчет, а остальные ждут его коммита и применяют приращения поверх.
+    """
+    tz = timezone.get_current_timezone()
+    start = datetime.combine(date_from, time.min, tzinfo=tz)
+    end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+
+    with transaction.atomic():
+        lock_stats("SHARE ROW EXCLUSIVE")
+        rows = (
+            Payout.objects.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(day=TruncDate("created_at"))
+            .values("day", "currency", "status")
+            .annotate(count=Count("id"), total_amount=Sum("amount"))
+            .order_by()
+        )
+        buckets: dict[tuple, list] = {
+            (row["day"], row["currency"], row["status"]): [row["count"], row["total_amount"]]
+            for row in rows
+        }
+        for row in read_archived_period(start, end):
+            key = timezone.localdate(row["created_at"]), row["currency"], row["status"]
+            bucket = buckets.setdefault(key, [0, Decimal(0)])
+            bucket[0] += 1
+            bucket[1] += row["amount"]
+
+        PayoutStats.objects.filter(day__gte=date_from, day__lte=date_to).delete()
+        created = PayoutStats.objects.bulk_create(
+            PayoutStats(day=day, currency=currency, status=status, count=count, total_amount=total)
+            for (day, currency, status), (count, total) in buckets.items()
+        )
+    return len(created)
@@ -0,0 +1,233 @@
+"""
+Уведомления об изменении статусов заявок через PostgreSQL LISTEN/NOTIFY.
+
+Переходы статусов (state_machine.transition и bulk_transition) и удаление заявки
+в той же транзакции выполняют pg_notify в канал CHANNEL: PostgreSQL доставляет
+уведомления только после коммита и в порядке коммитов. Каждый процесс ASGI держит
+одно соединение с LISTEN (StatusListener) и раздает уведомления очередям
+подписчиков - потоков SSE async_views.payout_events, поэтому ожидающие клиенты
+не занимают соединений с базой и не выполняют запросов.
+"""
+
+import asyncio
+import logging
+
+from collections import defaultdict
+from typing import Any, AsyncIterator, Iterable
+from weakref import WeakKeyDictionary
+
+import orjson
+import psycopg
+
+from django.conf import settings
+from django.db import connection, connections
+from rest_framework import serializers
+
+from payouts.models import Payout
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "payouts_status"
+
+# Поля события; error_message не передается: размер уведомления ограничен 8000 байт
+EVENT_FIELDS = ["id", "status", "updated_at", "attempt_count", "next_attempt_at"]
+
+FINAL_STATUSES = {Payout.Status.COMPLETED, Payout.Status.FAILED, Payout.Status.CANCELLED}
+
+# Задержка повторного подключения слушателя после обрыва соединения, секунды
+RECONNECT_DELAY = 1.0
+
+# Задержка переподключения клиента после закрытия потока (поле retry SSE), миллисекунды
+CLIENT_RETRY = 3000
+
+# Сигнал подписчикам перечитать статусы: уведомления во время переподключения потеряны
+RESYNC = object()
+
+# Даты выводятся так же, как в ответах API
+_datetime = serializers.DateTimeField()
+
+CONVERTERS = {
+    "id": str,
+    "updated_at": _datetime.to_representation,
+    "next_attempt_at": _datetime.to_representation,
+}
+
+
+def event_payload(row: dict[str, Any]) -> str:
+    """Событие заявки в JSON: поля EVENT_FIELDS в представлении API."""
+    data = {}
+    for name in EVENT_FIELDS:
+        value, converter = row[name], CONVERTERS.get(name)
+        data[name] = converter(value) if converter is not None and value is not None else value
+    return orjson.dumps(data).decode()
+
+
+def payload_id(payload: str) -> str:
+    return orjson.loads(payload)["id"]
+
+
+def notify_payouts(payouts: Iterable[Payout], values: dict[str, Any] | None = None) -> None:
+    """
+    Уведомление о новых статусах заявок; values - еще не записанные в payouts значения.
+
+    Вызывается внутри транзакции перехода; вне PostgreSQL ничего не делает.
+    """
+    if connection.vendor != "postgresql":
+        return
+    values = values or {}
+    payloads = [
+        event_payload({name: values.get(name, getattr(payout, name)) for name in EVENT_FIELDS})
+        for payout in payouts
+    ]
+    if not payloads:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+            [CHANNEL, payloads],
+        )
+
+
+def notify_deleted(payout: Payout) -> None:
+    """Уведомление об удалении заявки: событие со статусом null."""
+    notify_payouts([payout], {"status": None})
+
+
+class StatusListener:
+    """
+    Соединение с LISTEN CHANNEL и очереди подписчиков по id заявок.
+
+    Один экземпляр на цикл событий; соединение открывается при первой подписке
+    и восстанавливается после обрыва, после чего подписчики получают RESYNC.
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self.ready = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self, payout_ids: Iterable[str]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for payout_id in payout_ids:
+            self.subscribers[payout_id].add(queue)
+        self.start()
+        return queue
+
+    def unsubscribe(self, payout_ids: Iterable[str], queue: asyncio.Queue) -> None:
+        for payout_id in payout_ids:
+            queues = self.subscribers.get(payout_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[payout_id]
+
+    def dispatch(self, payload: str) -> None:
+        """Передача уведомления очередям подписчиков заявки."""
+        for queue in self.subscribers.get(payload_id(payload), ()):
+            queue.put_nowait(payload)
+
+    def resync(self) -> None:
+        for queue in {queue for queues in self.subscribers.values() for queue in queues}:
+            queue.put_nowait(RESYNC)
+
+    def start(self) -> None:
+        if self.task is not None:
+            return
+        if connections["default"].vendor != "postgresql":
+            # Без PostgreSQL уведомлений нет: подписчики получают только текущие статусы
+            self.ready.set()
+            return
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        params = connections["default"].get_connection_params()
+        params.pop("cursor_factory", None)
+        reconnected = False
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(**params, autocommit=True)
+                async with conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    self.ready.set()
+                    if reconnected:
+                        self.resync()
+                    async for notify in conn.notifies():
+                        self.dispatch(notify.payload)
+            except Exception as exc:
+                logger.warning(f"Соединение LISTEN {CHANNEL} потеряно: {exc}")
+            self.ready.clear()
+            reconnected = True
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+_listeners: "WeakKeyDictionary[asyncio.AbstractEventLoop, StatusListener]" = WeakKeyDictionary()
+
+
+def get_listener() -> StatusListener:
+    """Слушатель текущего цикла событий, один на процесс ASGI."""
+    loop = asyncio.get_running_loop()
+    listener = _listeners.get(loop)
+    if listener is None:
+        listener = _listeners[loop] = StatusListener()
+    return listener
+
+
+async def read_events(payout_ids: Iterable[str]) -> list[str]:
+    """Текущие статусы заявок в виде событий."""
+    queryset = Payout.objects.filter(id__in=payout_ids).values(*EVENT_FIELDS)
+    return [event_payload(row) async for row in queryset]
+
+
+def sse(event: str, data: str) -> bytes:
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+def is_final(payload: str) -> bool:
+    """Событие о финальном статусе или удалении заявки."""
+    status = orjson.loads(payload)["status"]
+    return status is None or status in FINAL_STATUSES
+
+
+async def stream_events(
+    listener: StatusListener, queue: asyncio.Queue, payout_ids: list[str], snapshot: list[str]
+) -> AsyncIterator[bytes]:
+    """
+    Поток SSE: текущие статусы, затем изменения до перехода всех заявок в финальный статус.
+
+    Пока изменений нет, каждые PAYOUTS_EVENTS_HEARTBEAT_INTERVAL секунд отправляется
+    комментарий, чтобы прокси не закрыли соединение. Через PAYOUTS_EVENTS_MAX_DURATION
+    секунд поток закрывается, клиент переподключается и снова получает текущие статусы.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.PAYOUTS_EVENTS_MAX_DURATION
+    pending = set(payout_ids)
+    try:
+        yield f"retry: {CLIENT_RETRY}\n\n".encode()
+        while True:
+            for payload in snapshot:
+                yield sse("status", payload)
+                if is_final(payload):
+                    pending.discard(payload_id(payload))
+            snapshot = []
+            if not pending:
+                yield sse("end", "{}")
+                return
+
+            timeout = min(settings.PAYOUTS_EVENTS_HEARTBEAT_INTERVAL, deadline - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if item is RESYNC:
+                snapshot = await read_events(pending)
+                # Заявки, удаленные за время переподключения, больше не ожидаются
+                pending &= {payload_id(payload) for payload in snapshot}
+            else:
+                snapshot = [item]
+    finally:
+        listener.unsubscribe(payout_ids, queue)
@@ -0,0 +1,162 @@
+"""
+Компактное хранение итогов обработки заявок.
+
+Полные результаты задач Celery (аргументы, трассировка, отдельная строка на каждый
+запуск и повтор) не сохраняются: CELERY_TASK_IGNORE_RESULT включен. Вместо них после
+каждого выполнения process_payout_task записывается только итог по заявке, после
+process_payout_batch_task - итог каждой заявки пакета:
+
+- DatabaseResultStore - одна строка на заявку в таблице PayoutTaskResult, старые строки
+  удаляются порциями командой prune_task_results;
+- RedisResultStore - ключ на заявку со сроком жизни PAYOUTS_TASK_RESULTS_TTL, очистка
+  не требуется.
+"""
+
+import json
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import cache
+from typing import Any
+
+import redis
+
+from celery.signals import task_postrun
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from payouts.models import PayoutTaskResult
+
+
+KEY_PREFIX = "payouts:result:"
+
+RECORDED_TASKS = {"payouts.tasks.process_payout_task", "payouts.tasks.process_payout_batch_task"}
+
+
+class BaseResultStore(ABC):
+    """Базовый интерфейс хранилища итогов обработки"""
+
+    @abstractmethod
+    def record(self, payout_id: str, outcome: str) -> None:
+        """Сохранение итога, предыдущий итог заявки перезаписывается."""
+
+    @abstractmethod
+    def get(self, payout_id: str) -> dict[str, Any] | None:
+        """Итог последней обработки заявки: outcome и finished_at."""
+
+    def record_many(self, outcomes: dict[str, str]) -> None:
+        """Сохранение итогов нескольких заявок: {ID заявки: итог}."""
+        for payout_id, outcome in outcomes.items():
+            self.record(payout_id, outcome)
+
+    def prune(self, older_than: datetime, batch_size: int) -> int:
+        """Удаление итогов, записанных раньше older_than; возвращает число удаленных."""
+        return 0
+
+
+class DatabaseResultStore(BaseResultStore):
+    """Итоги в таблице PayoutTaskResult"""
+
+    def record(self, payout_id: str, outcome: str) -> None:
+        self.record_many({payout_id: outcome})
+
+    def record_many(self, outcomes: dict[str, str]) -> None:
+        """Итоги пакета записываются одним INSERT ... ON CONFLICT DO UPDATE."""
+        finished_at = timezone.now()
+        PayoutTaskResult.objects.bulk_create(
+            [
+                PayoutTaskResult(payout_id=payout_id, outcome=outcome, finished_at=finished_at)
+                for payout_id, outcome in outcomes.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["payout_id"],
+            update_fields=["outcome", "finished_at"],
+        )
+
+    def get(self, payout_id: str) -> dict[str, Any] | None:
+        return (
+            PayoutTaskResult.objects.filter(payout_id=payout_id)
+            .values("outcome", "finished_at")
+            .first()
+        )
+
+    def prune(self, older_than: datetime, batch_size: int) -> int:
+        """
+        Удаление порциями по batch_size строк: каждая порция - отдельный короткий запрос,
+        блокировки не копятся на время всей очистки.
+        """
+        deleted = 0
+        while True:
+            ids = list(
+                PayoutTaskResult.objects.filter(finished_at__lt=older_than).values_list(
+                    "payout_id", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                return deleted
+            deleted += PayoutTaskResult.objects.filter(payout_id__in=ids).delete()[0]
+
+
+class RedisResultStore(BaseResultStore):
+    """Итоги в ключах Redis, которые истекают сами через ttl секунд"""
+
+    def __init__(self, url: str, ttl: int | None = None) -> None:
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl or settings.PAYOUTS_TASK_RESULTS_TTL
+
+    def record(self, payout_id: str, outcome: str) -> None:
+        self.record_many({payout_id: outcome})
+
+    def record_many(self, outcomes: dict[str, str]) -> None:
+        """Итоги пакета записываются одним конвейером команд SET."""
+        finished_at = timezone.now().isoformat()
+        with self.client.pipeline(transaction=False) as pipe:
+            for payout_id, outcome in outcomes.items():
+                value = {"outcome": outcome, "finished_at": finished_at}
+                pipe.set(KEY_PREFIX + str(payout_id), json.dumps(value), ex=self.ttl)
+            pipe.execute()
+
+    def get(self, payout_id: str) -> dict[str, Any] | None:
+        raw = self.client.get(KEY_PREFIX + str(payout_id))
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        value["finished_at"] = datetime.fromisoformat(value["finished_at"])
+        return value
+
+
+@cache
+def get_result_store() -> BaseResultStore:
+    """Хранилище итогов из настройки PAYOUTS_TASK_RESULTS, один экземпляр на процесс."""
+    config = settings.PAYOUTS_TASK_RESULTS
+    store_class = import_string(config["BACKEND"])
+    return store_class(**config.get("OPTIONS", {}))
+
+
+@receiver(setting_changed)
+def reset_result_store(setting: str | None = None, **kwargs) -> None:
+    if setting in (None, "PAYOUTS_TASK_RESULTS"):
+        get_result_store.cache_clear()
+
+
+def prune_results(batch_size: int, ttl: int | None = None) -> int:
+    """Удаление итогов старше ttl секунд (по умолчанию PAYOUTS_TASK_RESULTS_TTL)."""
+    ttl = settings.PAYOUTS_TASK_RESULTS_TTL if ttl is None else ttl
+    return get_result_store().prune(timezone.now() - timedelta(seconds=ttl), batch_size)
+
+
+@task_postrun.connect
+def on_task_postrun(task=None, args=None, kwargs=None, retval=None, state=None, **extra):
+    if task is None or task.name not in RECORDED_TASKS or not isinstance(retval, dict):
+        return
+    if "outcomes" in retval:
+        # Пакетная задача возвращает итог каждой захваченной заявки
+        if retval["outcomes"]:
+            get_result_store().record_many(retval["outcomes"])
+        return
+    payout_id = (args or [None])[0] or (kwargs or {}).get("payout_id")
+    if payout_id and "status" in retval:
+        get_result_store().record(payout_id, retval["status"])
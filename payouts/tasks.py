@@ -1,57 +1,115 @@
+import asyncio
 import logging
-import random
-import time
 
-from typing import Any, Dict
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, Iterable
 
-from celery import shared_task
-from celery.exceptions import MaxRetriesExceededError
+from celery import group, shared_task
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
-from payouts.models import Payout
+from payouts.bank_limits import get_bank_limiter
+from payouts.gateways import get_bank_gateway, send_payouts
+from payouts.idempotency import prune_expired
+from payouts.leases import lease_fields, lease_heartbeat, lease_owner, recover_expired_leases
+from payouts.metrics import record_deferral
+from payouts.models import Payout, PayoutOutbox
+from payouts.partitions import active_since, create_partitions, is_partitioned
+from payouts.retries import backoff_delay, defer, schedule_retries
+from payouts.routing import Route, default_route, get_route, route_payout
+from payouts.state_machine import bulk_transition, transition
+from payouts.task_results import prune_results
 
 
 logger = logging.getLogger(__name__)
 
+PROCESSING_MODE_SINGLE = "single"
+PROCESSING_MODE_BATCH = "batch"
+
+DISPATCH_MODE_OUTBOX = "outbox"
+DISPATCH_MODE_DIRECT = "direct"
+
+VALIDATION_ERROR_MESSAGE = "Проверка данных не пройдена"
+
+
+def execute_payout(payout: Payout) -> bool:
+    """
+    Выполнение заявки, уже переведенной в PROCESSING.
+
+    Возвращает False, если заявка не прошла проверку данных,
+    и выбрасывает BankGatewayError при ошибке банковской операции.
+    """
+    if not validate_payout(payout):
+        return False
+
+    limiter = get_bank_limiter()
+    bik = payout.recipient_details.bik
+    try:
+        with lease_heartbeat([payout]):
+            asyncio.run(get_bank_gateway().send_payout(payout))
+    except Exception:
+        limiter.record_failure(bik)
+        raise
+    limiter.record_success(bik)
+    return True
+
 
 def process_payout_logic(payout_id: str) -> Dict[str, Any]:
-    """Логика обработки заявки на выплату."""
+    """
+    Логика обработки заявки на выплату.
+
+    Смена статусов выполняется атомарными условными UPDATE без блокировки строки
+    на время банковской операции.
+    """
     try:
-        with transaction.atomic():
-            payout = Payout.objects.select_for_update().get(id=payout_id)
+        payout = Payout.objects.select_related("recipient_details").get(id=payout_id)
+
+        if payout.status == Payout.Status.PENDING and not is_due(payout):
+            logger.info(f"Время следующей попытки заявки {payout_id} еще не наступило")
+            return {"status": "skipped", "payout_id": payout_id}
 
-            if payout.status != Payout.Status.PENDING:
-                logger.warning(
-                    f"Задача process_payout_task: заявка {payout_id} не в статусе PENDING, текущий статус: {payout.status}"
-                )
-                return {"status": "skipped", "payout_id": payout_id}
+        # Захват при неизменном времени попытки: параллельный перенос заявки не теряется
+        if payout.status != Payout.Status.PENDING or not transition(
+            payout,
+            Payout.Status.PROCESSING,
+            expected={"next_attempt_at": payout.next_attempt_at},
+            next_attempt_at=None,
+            **lease_fields(),
+        ):
+            logger.warning(
+                f"Задача process_payout_task: заявка {payout_id} не в статусе PENDING, текущий статус: {payout.status}"
+            )
+            return {"status": "skipped", "payout_id": payout_id}
 
-            payout.status = Payout.Status.PROCESSING
-            payout.save(update_fields=["status"])
+        # Токен лимита банка берется после захвата: воркер, проигравший гонку за заявку,
+        # не расходует квоту. Отложенная заявка возвращается в PENDING без расхода попытки
+        delay = get_bank_limiter().acquire(payout.recipient_details.bik)
+        if delay:
+            record_deferral(payout.recipient_details.bik)
+            defer([payout], [delay], expected=lease_owner())
+            return {"status": "deferred", "payout_id": payout_id, "countdown": delay}
 
         logger.info(f"Начата обработка заявки {payout_id}")
 
-        # Имитация обработки
-        time.sleep(random.uniform(2, 5))
+        # Проверка данных и банковская операция
+        if execute_payout(payout):
+            outcome, new_status, fields = "completed", Payout.Status.COMPLETED, {}
+        else:
+            outcome, new_status = "failed", Payout.Status.FAILED
+            fields = {"error_message": VALIDATION_ERROR_MESSAGE}
 
-        # Проверка данных
-        if not validate_payout(payout):
-            payout.status = Payout.Status.FAILED
-            payout.error_message = "Проверка данных не пройдена"
-            payout.save(update_fields=["status", "error_message"])
+        # Если аренда истекла и заявку захватил другой воркер, результат не записывается
+        if not transition(payout, new_status, expected=lease_owner(), **fields):
+            return _conflict(payout_id)
+        if outcome == "failed":
             logger.warning(f"Заявка {payout_id} не прошла валидацию")
-            return {"status": "failed", "payout_id": payout_id}
-
-        # Имитация банковской операции (10% ошибок)
-        if random.random() < 0.1:
-            raise Exception("Ошибка при выполнении банковской операции")
-
-        # Успешное завершение
-        payout.status = Payout.Status.COMPLETED
-        payout.save(update_fields=["status"])
-        logger.info(f"Заявка {payout_id} успешно обработана")
+        else:
+            logger.info(f"Заявка {payout_id} успешно обработана")
 
-        return {"status": "completed", "payout_id": payout_id}
+        return {"status": outcome, "payout_id": payout_id}
 
     except Payout.DoesNotExist:
         logger.error(f"Задача process_payout_task: заявка с ID {payout_id} не найдена")
@@ -61,24 +119,397 @@ def process_payout_logic(payout_id: str) -> Dict[str, Any]:
         raise
 
 
+def is_due(payout: Payout) -> bool:
+    """Время следующей попытки заявки не назначено или уже наступило."""
+    return payout.next_attempt_at is None or payout.next_attempt_at <= timezone.now()
+
+
+def _conflict(payout_id: str) -> Dict[str, Any]:
+    logger.error(f"Статус заявки {payout_id} изменен параллельно во время обработки")
+    return {"status": "conflict", "payout_id": payout_id}
+
+
 @shared_task(bind=True, max_retries=3)
 def process_payout_task(self, payout_id: str) -> None | dict[str, Any] | dict[str, str]:
-    """Celery задача-обертка для process_payout_logic."""
+    """
+    Celery задача-обертка для process_payout_logic.
+
+    После ошибки задача не откладывается в брокере: следующая попытка планируется
+    в базе, и заявку опубликует sweep_retries_task. Повтор задачи через брокер
+    остается только на случай, когда запланировать попытку в базе не удалось.
+    """
     try:
         return process_payout_logic(payout_id)
     except Exception as exc:
         logger.exception(f"Ошибка при обработке заявки {payout_id}: {exc}")
         try:
-            self.retry(exc=exc, countdown=60)
-        except MaxRetriesExceededError:
-            try:
-                p = Payout.objects.get(id=payout_id)
-                p.status = Payout.Status.FAILED
-                p.error_message = str(exc)
-                p.save(update_fields=["status", "error_message"])
-            except Exception as save_exc:
-                logger.error(f"Не удалось пометить заявку как FAILED: {save_exc}")
-            return {"status": "failed_final", "payout_id": payout_id, "error": str(exc)}
+            return retry_payout(payout_id, exc)
+        except Exception as schedule_exc:
+            logger.exception(f"Не удалось запланировать повтор заявки {payout_id}: {schedule_exc}")
+            raise self.retry(
+                exc=exc, countdown=backoff_delay(self.request.retries + 1)
+            ) from schedule_exc
+
+
+def retry_payout(payout_id: str, exc: BaseException) -> Dict[str, Any]:
+    """Планирование следующей попытки заявки после ошибки обработки."""
+    payout = Payout.objects.get(id=payout_id)
+    if payout.status == Payout.Status.PENDING:
+        # Ошибка до захвата заявки: попытка не расходуется
+        defer([payout], [backoff_delay(1)])
+        return {"status": "deferred", "payout_id": payout_id}
+    if payout.status != Payout.Status.PROCESSING:
+        return {"status": "skipped", "payout_id": payout_id}
+
+    counts = schedule_retries([payout], [exc], expected=lease_owner())
+    if counts[Payout.Status.FAILED]:
+        logger.error(f"Заявка {payout_id} исчерпала попытки: {exc}")
+        return {"status": "failed_final", "payout_id": payout_id, "error": str(exc)}
+    if counts[Payout.Status.PENDING]:
+        return {
+            "status": "retry_scheduled",
+            "payout_id": payout_id,
+            "attempt_count": payout.attempt_count,
+            "next_attempt_at": payout.next_attempt_at.isoformat(),
+        }
+    return _conflict(payout_id)
+
+
+def claim_pending_payouts(limit: int) -> list[Payout]:
+    """
+    Захват до limit заявок в статусе PENDING для пакетной обработки.
+
+    Строки блокируются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому параллельные
+    воркеры получают непересекающиеся пакеты, и переводятся в PROCESSING одним UPDATE.
+    Заявки, время следующей попытки которых еще не наступило, пропускаются.
+    """
+    with transaction.atomic():
+        payouts = list(
+            Payout.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("recipient_details")
+            .filter(status=Payout.Status.PENDING, created_at__gte=active_since())
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()))
+            .order_by("created_at")[:limit]
+        )
+        return bulk_transition(
+            payouts, Payout.Status.PROCESSING, next_attempt_at=None, **lease_fields()
+        )
+
+
+def process_payout_batch_logic(limit: int) -> Dict[str, Any]:
+    """Логика пакетной обработки: захват пакета заявок и групповая фиксация результатов."""
+    payouts = claim_pending_payouts(limit)
+    if not payouts:
+        return {"status": "empty", "claimed": 0}
+
+    logger.info(f"Начата пакетная обработка {len(payouts)} заявок")
+
+    limiter = get_bank_limiter()
+    valid, failed, deferred, delays = [], [], [], []
+    for payout in payouts:
+        if not validate_payout(payout):
+            failed.append(payout)
+        elif delay := limiter.acquire(payout.recipient_details.bik):
+            record_deferral(payout.recipient_details.bik)
+            deferred.append(payout)
+            delays.append(delay)
+        else:
+            valid.append(payout)
+
+    # Банковские вызовы всего пакета выполняются конкурентно в одном event loop
+    with lease_heartbeat(valid):
+        results = asyncio.run(
+            send_payouts(get_bank_gateway(), valid, settings.PAYOUTS_BANK_CONCURRENCY)
+        )
+
+    completed, errored, errors = [], [], []
+    for payout, error in zip(valid, results, strict=True):
+        if error is None:
+            limiter.record_success(payout.recipient_details.bik)
+            completed.append(payout)
+        else:
+            limiter.record_failure(payout.recipient_details.bik)
+            logger.error(f"Ошибка при обработке заявки {payout.id}: {error}")
+            errored.append(payout)
+            errors.append(error)
+
+    # Результаты записываются только для заявок, аренда которых осталась за воркером
+    owner = lease_owner()
+    with transaction.atomic():
+        done = bulk_transition(completed, Payout.Status.COMPLETED, expected=owner)
+        rejected = bulk_transition(
+            failed, Payout.Status.FAILED, expected=owner, error_message=VALIDATION_ERROR_MESSAGE
+        )
+        # Заявки с ошибкой банковской операции возвращаются в очередь со временем
+        # следующей попытки, отложенные лимитами банка - без расхода попыток
+        retried = schedule_retries(errored, errors, expected=owner)
+        defer(deferred, delays, expected=owner)
+
+    # Итог каждой заявки пакета для хранилища итогов, как у process_payout_task
+    outcomes = {str(payout.id): "conflict" for payout in payouts}
+    outcomes.update((str(payout.id), "completed") for payout in done)
+    outcomes.update((str(payout.id), "failed") for payout in rejected)
+    outcomes.update((str(payout.id), "deferred") for payout in deferred)
+    for payout in errored:
+        if payout.status == Payout.Status.PENDING:
+            outcomes[str(payout.id)] = "retry_scheduled"
+        elif payout.status == Payout.Status.FAILED:
+            outcomes[str(payout.id)] = "failed_final"
+
+    lost = len(completed) - len(done) + len(failed) - len(rejected)
+    lost += len(errored) - retried[Payout.Status.PENDING] - retried[Payout.Status.FAILED]
+    if lost:
+        logger.error(f"Статус {lost} заявок пакета изменен параллельно во время обработки")
+
+    logger.info(
+        f"Пакет обработан: выполнено {len(done)}, ошибок проверки {len(rejected)}, "
+        f"возвращено в очередь {retried[Payout.Status.PENDING]}, "
+        f"исчерпали попытки {retried[Payout.Status.FAILED]}, отложено {len(deferred)}"
+    )
+    return {
+        "status": "processed",
+        "claimed": len(payouts),
+        "completed": len(done),
+        "failed": len(rejected),
+        "requeued": retried[Payout.Status.PENDING],
+        "failed_final": retried[Payout.Status.FAILED],
+        "deferred": len(deferred),
+        "conflicts": lost,
+        "outcomes": outcomes,
+    }
+
+
+@shared_task
+def process_payout_batch_task(limit: int | None = None) -> Dict[str, Any]:
+    """Celery задача пакетной обработки заявок (режим PAYOUTS_PROCESSING_MODE=batch)."""
+    return process_payout_batch_logic(limit or settings.PAYOUTS_BATCH_SIZE)
+
+
+def enqueue_payouts(payout_ids: list[str], route: Route | None = None) -> None:
+    """
+    Постановка заявок в очередь с учетом режима обработки.
+
+    В режиме single каждая заявка получает свою задачу process_payout_task в очереди
+    и с приоритетом route, пакет публикуется одной группой Celery. В режиме batch
+    публикуется по одной задаче process_payout_batch_task на каждые PAYOUTS_BATCH_SIZE
+    заявок в очереди по умолчанию: пакетный захват не учитывает маршруты.
+    """
+    if settings.PAYOUTS_PROCESSING_MODE == PROCESSING_MODE_BATCH:
+        batches = -(-len(payout_ids) // settings.PAYOUTS_BATCH_SIZE)
+        signatures = [process_payout_batch_task.s() for _ in range(batches)]
+        options = {}
+    else:
+        route = route or default_route()
+        options = {"queue": route.queue, "priority": route.priority}
+        if len(payout_ids) == 1:
+            process_payout_task.apply_async(args=[payout_ids[0]], **options)
+            return
+        signatures = [process_payout_task.s(payout_id) for payout_id in payout_ids]
+
+    if signatures:
+        group(signatures).apply_async(**options)
+
+
+def enqueue_routed(messages: Iterable[tuple[str, str]]) -> None:
+    """Публикация пар (ID заявки, очередь) группами по очереди."""
+    by_queue: dict[str, list[str]] = defaultdict(list)
+    for payout_id, queue in messages:
+        by_queue[queue].append(payout_id)
+    for queue, payout_ids in by_queue.items():
+        route = get_route(queue) if queue else default_route()
+        enqueue_payouts(payout_ids, route)
+
+
+def schedule_payouts(payouts: list[Payout]) -> None:
+    """
+    Планирование обработки заявок; вызывается в транзакции, создающей заявки.
+
+    Очередь каждой заявки выбирается правилами PAYOUTS_QUEUE_ROUTES в момент создания.
+    В режиме outbox очередь сохраняется в сообщении PayoutOutbox в той же транзакции,
+    и API не обращается к брокеру. В режиме direct задачи публикуются после коммита.
+    """
+    messages = [(str(payout.id), route_payout(payout).queue) for payout in payouts]
+    if settings.PAYOUTS_DISPATCH_MODE == DISPATCH_MODE_OUTBOX:
+        PayoutOutbox.objects.bulk_create(
+            [PayoutOutbox(payout_id=payout_id, queue=queue) for payout_id, queue in messages],
+            batch_size=settings.PAYOUTS_OUTBOX_BATCH_SIZE,
+        )
+    else:
+        transaction.on_commit(lambda: enqueue_routed(messages))
+
+
+def relay_outbox(batch_size: int) -> int:
+    """
+    Публикация пакета неотправленных сообщений outbox в брокер.
+
+    Сообщения блокируются через SKIP LOCKED, поэтому несколько ретрансляторов
+    не публикуют одно сообщение дважды. При ошибке брокера транзакция
+    откатывается и сообщения будут опубликованы следующим проходом.
+    """
+    with transaction.atomic():
+        messages = list(
+            PayoutOutbox.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True)
+            .order_by("id")
+            .values_list("id", "payout_id", "queue")[:batch_size]
+        )
+        if not messages:
+            return 0
+
+        enqueue_routed((str(payout_id), queue) for _, payout_id, queue in messages)
+        PayoutOutbox.objects.filter(id__in=[message[0] for message in messages]).update(
+            sent_at=timezone.now()
+        )
+
+    logger.info(f"Опубликовано {len(messages)} сообщений outbox")
+    return len(messages)
+
+
+@shared_task
+def relay_outbox_task() -> Dict[str, int]:
+    """Celery задача ретрансляции outbox: публикует сообщения, пока они есть."""
+    sent = 0
+    while relayed := relay_outbox(settings.PAYOUTS_OUTBOX_BATCH_SIZE):
+        sent += relayed
+    return {"sent": sent}
+
+
+def prune_outbox(retention: int, batch_size: int) -> int:
+    """
+    Удаление сообщений outbox, отправленных больше retention секунд назад.
+
+    Сообщения удаляются порциями по batch_size, чтобы не держать долгих блокировок.
+    """
+    sent = PayoutOutbox.objects.filter(sent_at__lt=timezone.now() - timedelta(seconds=retention))
+    deleted = 0
+    while True:
+        ids = list(sent.order_by("sent_at").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += PayoutOutbox.objects.filter(id__in=ids).delete()[0]
+
+
+def sweep_retries(batch_size: int, *, stale: bool = False) -> int:
+    """
+    Публикация пакета заявок, время следующей попытки которых наступило.
+
+    Заявки блокируются через SKIP LOCKED, поэтому параллельные проходы не публикуют
+    одну заявку дважды. Опубликованная заявка арендуется на PAYOUTS_RETRY_REDELIVERY_TIMEOUT
+    (lease_expires_at): если задача потеряется до захвата заявки, проход после истечения
+    аренды опубликует ее снова. Время попытки не меняется, поэтому захват заявки
+    в process_payout_logic видит, что оно наступило.
+
+    При stale просматриваются только заявки старше active_since(), невидимые обычным
+    проходам; такие заявки публикуются и без времени попытки - их сообщение потеряно.
+    """
+    now = timezone.now()
+    if stale:
+        due = Q(created_at__lt=active_since()) & (
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+        )
+    else:
+        due = Q(created_at__gte=active_since(), next_attempt_at__lte=now)
+    unleased = Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+    with transaction.atomic():
+        payouts = list(
+            Payout.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("recipient_details")
+            .filter(due, unleased, status=Payout.Status.PENDING)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not payouts:
+            return 0
+
+        enqueue_routed((str(payout.id), route_payout(payout).queue) for payout in payouts)
+        Payout.objects.filter(
+            id__in=[payout.id for payout in payouts],
+            created_at__gte=min(payout.created_at for payout in payouts),
+        ).update(
+            lease_expires_at=now + timedelta(seconds=settings.PAYOUTS_RETRY_REDELIVERY_TIMEOUT)
+        )
+
+    logger.info(f"Опубликовано {len(payouts)} заявок для повторной попытки")
+    return len(payouts)
+
+
+@shared_task
+def sweep_retries_task() -> Dict[str, int]:
+    """Celery задача публикации заявок, срок повторной попытки которых наступил."""
+    sent = 0
+    while swept := sweep_retries(settings.PAYOUTS_RETRY_SWEEP_BATCH_SIZE):
+        sent += swept
+    return {"sent": sent}
+
+
+@shared_task
+def recover_expired_leases_task() -> Dict[str, int]:
+    """Celery задача возврата в очередь заявок, аренда которых истекла."""
+    recovered = failed = 0
+    while True:
+        counts = recover_expired_leases(settings.PAYOUTS_LEASE_RECOVERY_BATCH_SIZE)
+        if not any(counts.values()):
+            break
+        recovered += counts[Payout.Status.PENDING]
+        failed += counts[Payout.Status.FAILED]
+    return {"recovered": recovered, "failed": failed}
+
+
+@shared_task
+def sweep_stale_payouts_task() -> Dict[str, int]:
+    """
+    Celery задача обработки активных заявок старше active_since().
+
+    Обычные проходы и захват заявок не видят старые секции, поэтому редкий полный
+    проход возвращает в очередь зависшие там заявки, иначе они остались бы активными
+    навсегда, а их секции - неотсоединяемыми.
+    """
+    stale = Payout.objects.filter(
+        status__in=[Payout.Status.PENDING, Payout.Status.PROCESSING],
+        created_at__lt=active_since(),
+    ).count()
+    if not stale:
+        return {"stale": 0, "sent": 0, "recovered": 0, "failed": 0}
+
+    logger.error(f"Найдено активных заявок старше {active_since():%Y-%m-%d}: {stale}")
+    sent = recovered = failed = 0
+    while True:
+        counts = recover_expired_leases(settings.PAYOUTS_LEASE_RECOVERY_BATCH_SIZE, stale=True)
+        if not any(counts.values()):
+            break
+        recovered += counts[Payout.Status.PENDING]
+        failed += counts[Payout.Status.FAILED]
+    while swept := sweep_retries(settings.PAYOUTS_RETRY_SWEEP_BATCH_SIZE, stale=True):
+        sent += swept
+    return {"stale": stale, "sent": sent, "recovered": recovered, "failed": failed}
+
+
+@shared_task
+def prune_idempotency_keys_task() -> Dict[str, int]:
+    """Celery задача удаления просроченных ключей идемпотентности."""
+    return {"deleted": prune_expired(batch_size=1000)}
+
+
+@shared_task
+def prune_outbox_task() -> Dict[str, int]:
+    """Celery задача удаления сообщений outbox старше PAYOUTS_OUTBOX_RETENTION."""
+    deleted = prune_outbox(
+        settings.PAYOUTS_OUTBOX_RETENTION, settings.PAYOUTS_OUTBOX_PRUNE_BATCH_SIZE
+    )
+    return {"deleted": deleted}
+
+
+@shared_task
+def prune_task_results_task() -> Dict[str, int]:
+    """Celery задача удаления итогов обработки старше PAYOUTS_TASK_RESULTS_TTL."""
+    return {"deleted": prune_results(settings.PAYOUTS_TASK_RESULTS_PRUNE_BATCH_SIZE)}
+
+
+@shared_task
+def create_payout_partitions_task() -> Dict[str, int]:
+    """Celery задача создания секций таблицы заявок на PAYOUTS_PARTITION_PREMAKE_MONTHS вперед."""
+    if not is_partitioned():
+        return {"created": 0}
+    return {"created": len(create_partitions(settings.PAYOUTS_PARTITION_PREMAKE_MONTHS))}
 
 
 def validate_payout(payout: Payout) -> bool:
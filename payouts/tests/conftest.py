@@ -4,9 +4,18 @@ import pytest
 
 from rest_framework.test import APIClient
 
+from payouts.bank_limits import reset_bank_limiter
 from payouts.models import Payout, RecipientDetails
 
 
+@pytest.fixture(autouse=True)
+def bank_limiter():
+    """Каждый тест начинает с незаполненными лимитами банков."""
+    reset_bank_limiter()
+    yield
+    reset_bank_limiter()
+
+
 @pytest.fixture
 def api():
     """Фикстура для API клиента."""
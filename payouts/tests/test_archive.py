@@ -0,0 +1,161 @@
+import json
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from payouts.archive import archive_batch, get_archived, write_file
+from payouts.models import ArchivedPayout, Payout, PayoutStats
+from payouts.stats import rebuild_stats
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(settings, tmp_path):
+    settings.PAYOUTS_ARCHIVE_URI = str(tmp_path / "archive")
+    return tmp_path / "archive"
+
+
+@pytest.fixture
+def old_payouts(recipient):
+    """Заявки годичной давности: завершенная, с ошибкой и необработанная."""
+    created_at = timezone.now() - timedelta(days=400)
+    payouts = [
+        Payout.objects.create(amount=Decimal("10.50"), recipient_details=recipient, status=status)
+        for status in (Payout.Status.COMPLETED, Payout.Status.FAILED, Payout.Status.PENDING)
+    ]
+    Payout.objects.filter(id__in=[p.id for p in payouts]).update(created_at=created_at)
+    return payouts
+
+
+@pytest.mark.django_db
+def test_archive_batch_moves_finished_payouts(old_payouts, archive_dir):
+    """Тест: в архив переносятся только завершенные заявки старше срока."""
+    completed, failed, pending = old_payouts
+
+    assert archive_batch(timezone.now() - timedelta(days=365), batch_size=10) == 2
+    assert archive_batch(timezone.now() - timedelta(days=365), batch_size=10) == 0
+
+    assert list(Payout.objects.values_list("id", flat=True)) == [pending.id]
+    assert set(ArchivedPayout.objects.values_list("id", flat=True)) == {completed.id, failed.id}
+    assert list(archive_dir.glob("created_month=*/*.parquet"))
+
+    row = get_archived(completed.id)
+    assert row["amount"] == Decimal("10.50")
+    assert row["status"] == Payout.Status.COMPLETED
+    assert row["recipient_details__inn"] == completed.recipient_details.inn
+    assert get_archived(pending.id) is None
+
+
+@pytest.mark.django_db
+def test_retrieve_archived_payout(api, old_payouts):
+    """Тест: карточка архивной заявки отдается в том же формате, что и из таблицы."""
+    completed = old_payouts[0]
+    expected = api.get(reverse("payout-detail", args=[completed.id])).data
+    call_command("archive_payouts", stdout=StringIO())
+
+    response = api.get(reverse("payout-detail", args=[completed.id]))
+
+    assert response.status_code == 200
+    assert response.data == expected
+
+
+@pytest.mark.django_db
+def test_export_payouts_command_archived(old_payouts):
+    """Тест: выгрузка по --id находит заявки и в таблице, и в архиве."""
+    completed, _, pending = old_payouts
+    call_command("archive_payouts", stdout=StringIO())
+
+    out = StringIO()
+    call_command(
+        "export_payouts",
+        "--format",
+        "ndjson",
+        "--id",
+        str(completed.id),
+        "--id",
+        str(pending.id),
+        stdout=out,
+    )
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in records] == [str(pending.id), str(completed.id)]
+    assert records[1]["recipient_id"] == str(completed.recipient_details_id)
+
+
+@pytest.mark.django_db
+def test_async_retrieve_archived_payout(client, old_payouts):
+    """Тест: асинхронные карточка и статус находят заявку в архиве."""
+    completed = old_payouts[0]
+    urls = [
+        reverse("async-payout-detail", args=[completed.id]),
+        reverse("async-payout-status", args=[completed.id]),
+    ]
+    expected = [client.get(url).json() for url in urls]
+    call_command("archive_payouts", stdout=StringIO())
+
+    assert [client.get(url).json() for url in urls] == expected
+
+
+@pytest.mark.django_db
+def test_export_payouts_command_archived_filters(old_payouts):
+    """Тест: архивные заявки выгрузки по --id отбираются остальными фильтрами."""
+    completed, failed, pending = old_payouts
+    call_command("archive_payouts", stdout=StringIO())
+
+    out = StringIO()
+    call_command(
+        "export_payouts",
+        "--format",
+        "ndjson",
+        "--status",
+        "failed",
+        *("--id", str(completed.id), "--id", str(failed.id), "--id", str(pending.id)),
+        stdout=out,
+    )
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in records] == [str(failed.id)]
+
+
+@pytest.mark.django_db
+def test_rebuild_stats_includes_archived(old_payouts):
+    """Тест: пересчет статистики учитывает архив, но не файлы прерванного переноса."""
+    completed = old_payouts[0]
+    day = timezone.localdate(Payout.objects.get(id=completed.id).created_at)
+    call_command("archive_payouts", stdout=StringIO())
+    # Файл, записанный до сбоя транзакции переноса: индекс на него не указывает
+    row = get_archived(completed.id)
+    write_file([row], f"{row['created_at']:%Y-%m}")
+
+    rebuild_stats(day, day)
+
+    stats = {
+        stat.status: (stat.count, stat.total_amount) for stat in PayoutStats.objects.filter(day=day)
+    }
+    assert stats == {
+        Payout.Status.COMPLETED: (1, Decimal("10.50")),
+        Payout.Status.FAILED: (1, Decimal("10.50")),
+        Payout.Status.PENDING: (1, Decimal("10.50")),
+    }
+
+
+@pytest.mark.django_db
+def test_rebuild_payout_stats_command_default_period_includes_archived(old_payouts, payout):
+    """Тест: период пересчета по умолчанию начинается с самой ранней архивной заявки."""
+    Payout.objects.filter(id=old_payouts[2].id).delete()
+    call_command("archive_payouts", stdout=StringIO())
+    PayoutStats.objects.all().delete()
+
+    call_command("rebuild_payout_stats", stdout=StringIO())
+
+    stats = {
+        stat.status: stat.count
+        for stat in PayoutStats.objects.filter(day__lt=timezone.localdate(payout.created_at))
+    }
+    assert stats == {Payout.Status.COMPLETED: 1, Payout.Status.FAILED: 1}
@@ -0,0 +1,82 @@
+import pytest
+
+from django.urls import reverse
+
+from payouts.models import Payout, PayoutOutbox
+from payouts.routing import default_route
+from payouts.serializers import PayoutSerializer, RecipientDetailsSerializer
+
+
+@pytest.mark.django_db
+def test_async_create_payout(client, valid_payout_data):
+    """Тест: асинхронное создание заявки пишет заявку и сообщение outbox."""
+    response = client.post(
+        reverse("async-payout-create"), valid_payout_data, content_type="application/json"
+    )
+
+    assert response.status_code == 201
+    payout = Payout.objects.get()
+    assert response.json() == PayoutSerializer(payout).data
+    assert PayoutOutbox.objects.filter(payout=payout).exists()
+
+
+@pytest.mark.django_db
+def test_async_create_payout_direct_publish(client, valid_payout_data, settings, mocker):
+    """Тест: в режиме direct задача публикуется после коммита."""
+    settings.PAYOUTS_DISPATCH_MODE = "direct"
+    enqueue = mocker.patch("payouts.async_views.enqueue_payouts")
+
+    response = client.post(
+        reverse("async-payout-create"), valid_payout_data, content_type="application/json"
+    )
+
+    assert response.status_code == 201
+    enqueue.assert_called_once_with([response.json()["id"]], default_route())
+
+
+@pytest.mark.django_db
+def test_async_create_payout_validation_and_idempotency(client, valid_payout_data):
+    """Тест: ошибки валидации в формате DRF, повтор с Idempotency-Key отдает тот же ответ."""
+    url = reverse("async-payout-create")
+    response = client.post(url, {"currency": "RUB"}, content_type="application/json")
+    assert response.status_code == 400
+    assert "amount" in response.json()
+
+    headers = {"Idempotency-Key": "async-key"}
+    first = client.post(url, valid_payout_data, content_type="application/json", headers=headers)
+    second = client.post(url, valid_payout_data, content_type="application/json", headers=headers)
+
+    assert second.status_code == 201
+    assert second.content == first.content
+    assert second["Idempotent-Replayed"] == "true"
+    assert Payout.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_async_retrieve_matches_sync(client, payout):
+    """Тест: асинхронная карточка, статус и получатель совпадают с синхронным API."""
+    sync = client.get(reverse("payout-detail", args=[payout.id]))
+    response = client.get(reverse("async-payout-detail", args=[payout.id]))
+    assert response.content == sync.content
+
+    response = client.get(reverse("async-payout-status", args=[payout.id]))
+    assert response.json() == {
+        "id": str(payout.id),
+        "status": payout.status,
+        "updated_at": sync.json()["updated_at"],
+        "error_message": "",
+        "attempt_count": 0,
+        "next_attempt_at": None,
+    }
+
+    response = client.get(reverse("async-recipient-detail", args=[payout.recipient_details_id]))
+    assert response.json() == RecipientDetailsSerializer(payout.recipient_details).data
+
+
+@pytest.mark.django_db
+def test_async_retrieve_not_found(client, recipient):
+    """Тест: несуществующая заявка — 404 в формате DRF."""
+    response = client.get(reverse("async-payout-detail", args=[recipient.id]))
+
+    assert response.status_code == 404
+    assert "detail" in response.json()
@@ -0,0 +1,120 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from payouts.bank_limits import LocalBankLimiter, get_bank_limiter
+from payouts.models import Payout
+from payouts.tasks import process_payout_batch_logic, process_payout_logic
+
+
+BIK = "044525225"
+OTHER_BIK = "044525974"
+
+
+@pytest.fixture
+def clock():
+    """Управляемое время для лимитов банков."""
+    with patch("payouts.bank_limits.time.time", return_value=1000.0) as mocked:
+        yield mocked
+
+
+def test_token_bucket(clock):
+    """Тест: не больше burst вызовов сразу, затем rate вызовов в секунду."""
+    limiter = LocalBankLimiter(rate=2, burst=2)
+
+    assert limiter.acquire(BIK) == 0
+    assert limiter.acquire(BIK) == 0
+    assert limiter.acquire(BIK) == pytest.approx(0.5)
+    assert limiter.acquire(OTHER_BIK) == 0
+
+    clock.return_value += 0.5
+    assert limiter.acquire(BIK) == 0
+
+
+def test_circuit_breaker(clock):
+    """Тест: выключатель размыкается после ошибок подряд и замыкается успешной пробой."""
+    limiter = LocalBankLimiter(failure_threshold=2, open_seconds=30, probe_timeout=60)
+
+    limiter.record_failure(BIK)
+    limiter.record_success(BIK)
+    limiter.record_failure(BIK)
+    assert limiter.acquire(BIK) == 0
+
+    limiter.record_failure(BIK)
+    assert limiter.acquire(BIK) == pytest.approx(30)
+    assert limiter.acquire(OTHER_BIK) == 0
+
+    # Пробная заявка пропускается одна, ее ошибка снова размыкает выключатель
+    clock.return_value += 30
+    assert limiter.acquire(BIK) == 0
+    assert limiter.acquire(BIK) == pytest.approx(60)
+    limiter.record_failure(BIK)
+    assert limiter.acquire(BIK) == pytest.approx(30)
+
+    clock.return_value += 30
+    assert limiter.acquire(BIK) == 0
+    limiter.record_success(BIK)
+    assert limiter.acquire(BIK) == 0
+
+
+@pytest.mark.django_db
+def test_process_payout_logic_deferred(recipient, settings):
+    """Тест: при разомкнутом выключателе заявка откладывается и остается в PENDING."""
+    settings.PAYOUTS_BANK_LIMITER = {
+        "BACKEND": "payouts.bank_limits.LocalBankLimiter",
+        "OPTIONS": {"failure_threshold": 1},
+    }
+    payout = Payout.objects.create(amount=Decimal("50"), recipient_details=recipient)
+
+    with (
+        patch("random.random", return_value=0.05),
+        pytest.raises(Exception, match="Ошибка при выполнении банковской операции"),
+    ):
+        process_payout_logic(str(payout.id))
+
+    pending = Payout.objects.create(amount=Decimal("50"), recipient_details=recipient)
+    result = process_payout_logic(str(pending.id))
+
+    assert result["status"] == "deferred"
+    assert result["countdown"] > 0
+    pending.refresh_from_db()
+    assert pending.status == Payout.Status.PENDING
+    assert pending.next_attempt_at is not None
+    assert pending.attempt_count == 0
+    assert pending.lease_expires_at is None
+
+
+@pytest.mark.django_db
+def test_process_payout_logic_lost_claim_keeps_token(recipient, settings):
+    """Тест: воркер, не захвативший заявку, не расходует токен лимита банка."""
+    settings.PAYOUTS_BANK_LIMITER = {
+        "BACKEND": "payouts.bank_limits.LocalBankLimiter",
+        "OPTIONS": {"rate": 0.001, "burst": 1},
+    }
+    payout = Payout.objects.create(amount=Decimal("50"), recipient_details=recipient)
+
+    with patch("payouts.tasks.transition", return_value=False):
+        assert process_payout_logic(str(payout.id))["status"] == "skipped"
+
+    assert get_bank_limiter().acquire(recipient.bik) == 0
+
+
+@pytest.mark.django_db
+def test_process_payout_batch_logic_deferred(recipient, settings):
+    """Тест: заявки сверх лимита частоты банка возвращаются в PENDING без вызова банка."""
+    settings.PAYOUTS_BANK_LIMITER = {
+        "BACKEND": "payouts.bank_limits.LocalBankLimiter",
+        "OPTIONS": {"rate": 0.001, "burst": 1},
+    }
+    for _ in range(3):
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+
+    with patch("random.random", return_value=0.5):
+        result = process_payout_batch_logic(limit=10)
+
+    assert result["completed"] == 1
+    assert result["deferred"] == 2
+    deferred = Payout.objects.filter(status=Payout.Status.PENDING)
+    assert deferred.count() == 2
+    assert all(payout.next_attempt_at and not payout.attempt_count for payout in deferred)
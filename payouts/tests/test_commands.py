@@ -0,0 +1,100 @@
+import csv
+import json
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from django.core.management import CommandError, call_command
+
+from payouts.models import Payout, PayoutOutbox, RecipientDetails
+from payouts.routing import route_payout
+from payouts.tasks import schedule_payouts
+
+
+@pytest.mark.django_db
+def test_relay_outbox_command(payout, mocker):
+    """Тест: команда relay_outbox --once публикует все накопившиеся сообщения."""
+    mocked = mocker.patch("payouts.tasks.enqueue_payouts")
+    schedule_payouts([payout])
+
+    out = StringIO()
+    call_command("relay_outbox", "--once", stdout=out)
+
+    mocked.assert_called_once_with([str(payout.id)], route_payout(payout))
+    assert "Опубликовано сообщений: 1" in out.getvalue()
+    assert not PayoutOutbox.objects.filter(sent_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_export_payouts_command_csv(payout, recipient, tmp_path):
+    """Тест: выгрузка в CSV файл с фильтром по статусу."""
+    Payout.objects.create(
+        amount=Decimal("5.00"), recipient_details=recipient, status=Payout.Status.COMPLETED
+    )
+    output = tmp_path / "payouts.csv"
+
+    call_command(
+        "export_payouts", "--status", "pending", "--output", str(output), stderr=StringIO()
+    )
+
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 1
+    assert rows[0]["id"] == str(payout.id)
+    assert rows[0]["amount"] == "1000.00"
+    assert rows[0]["recipient_inn"] == recipient.inn
+
+
+@pytest.mark.django_db
+def test_export_payouts_command_ndjson(payout):
+    """Тест: выгрузка в NDJSON в stdout."""
+    out = StringIO()
+    call_command("export_payouts", "--format", "ndjson", stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["id"] == str(payout.id)
+    assert record["amount"] == "1000.00"
+    assert record["status"] == Payout.Status.PENDING
+
+
+@pytest.mark.django_db
+def test_export_payouts_command_invalid_filter():
+    """Тест: некорректный фильтр завершает команду ошибкой."""
+    with pytest.raises(CommandError):
+        call_command("export_payouts", "--currency", "XYZ", stdout=StringIO())
+
+
+@pytest.mark.postgres
+@pytest.mark.django_db
+def test_import_recipients_command(recipient, valid_recipient_data, tmp_path):
+    """Тест: импорт через COPY создает новых, обновляет существующих и пишет отказы."""
+    fields = list(valid_recipient_data)
+    rows = [
+        valid_recipient_data,
+        {**valid_recipient_data, "full_name": "Повтор ИНН"},
+        {**valid_recipient_data, "inn": recipient.inn, "bank_name": "ВТБ"},
+        {**valid_recipient_data, "inn": "123", "full_name": "Невалидный"},
+    ]
+    path = tmp_path / "recipients.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    out = StringIO()
+    call_command("import_recipients", str(path), "--batch-size", "2", stdout=out)
+
+    assert "создано 1, обновлено 1), отклонено: 2" in out.getvalue()
+    assert RecipientDetails.objects.count() == 2
+    recipient.refresh_from_db()
+    assert recipient.bank_name == "ВТБ"
+
+    with open(f"{path}.rejects.csv", encoding="utf-8", newline="") as f:
+        rejects = list(csv.DictReader(f))
+    assert [r["line"] for r in rejects] == ["3", "5"]
+    assert "Повтор ИНН" in rejects[0]["errors"]
+    assert "inn" in rejects[1]["errors"]
@@ -0,0 +1,27 @@
+import copy
+
+import pytest
+
+from django.db import connection
+from django.db.utils import ConnectionHandler
+
+from app import settings as app_settings
+
+
+@pytest.mark.postgres
+@pytest.mark.django_db
+def test_production_pool_settings_open_connection():
+    """Тест: пул с параметрами DATABASES из app.settings открывает соединение и выполняет запрос."""
+    settings_dict = copy.deepcopy(app_settings.DATABASES["default"])
+    assert "pool" in settings_dict["OPTIONS"]
+    # Та же база, что и у тестов: settings_tests подменяет DATABASES целиком
+    settings_dict["NAME"] = connection.settings_dict["NAME"]
+
+    wrapper = ConnectionHandler({"default": settings_dict})["default"]
+    try:
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+        wrapper.close()
+    finally:
+        wrapper.close_pool()
@@ -0,0 +1,79 @@
+import asyncio
+
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from payouts.gateways import (
+    BankGatewayError,
+    BaseBankGateway,
+    StubBankGateway,
+    get_bank_gateway,
+    send_payouts,
+)
+from payouts.models import Payout
+
+
+class TrackingGateway(BaseBankGateway):
+    """Шлюз, запоминающий максимальное число одновременных вызовов"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_payout(self, payout):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if payout.amount == Decimal("13"):
+            raise BankGatewayError("Банк отклонил выплату")
+
+
+def test_gateway_requires_send_payout():
+    """Тест: шлюз без send_payout не создается."""
+
+    class IncompleteGateway(BaseBankGateway):
+        pass
+
+    with pytest.raises(TypeError, match="send_payout"):
+        IncompleteGateway()
+
+
+def test_stub_gateway_error():
+    """Тест: заглушка выбрасывает BankGatewayError с заданной вероятностью."""
+    gateway = StubBankGateway(min_latency=0, max_latency=0, error_rate=0.1)
+    payout = Payout(amount=Decimal("10"))
+
+    with patch("random.random", return_value=0.05), pytest.raises(BankGatewayError):
+        asyncio.run(gateway.send_payout(payout))
+
+    with patch("random.random", return_value=0.5):
+        asyncio.run(gateway.send_payout(payout))
+
+
+def test_get_bank_gateway_from_settings(settings):
+    """Тест: шлюз создается по настройке PAYOUTS_BANK_GATEWAY."""
+    settings.PAYOUTS_BANK_GATEWAY = {
+        "BACKEND": "payouts.gateways.StubBankGateway",
+        "OPTIONS": {"min_latency": 1, "max_latency": 2, "error_rate": 0},
+    }
+
+    gateway = get_bank_gateway()
+
+    assert isinstance(gateway, StubBankGateway)
+    assert (gateway.min_latency, gateway.max_latency, gateway.error_rate) == (1, 2, 0)
+
+
+def test_send_payouts_concurrency_limit():
+    """Тест: число одновременных вызовов не превышает лимит, ошибки возвращаются по элементам."""
+    gateway = TrackingGateway()
+    payouts = [Payout(amount=Decimal("13" if i == 3 else "10")) for i in range(10)]
+
+    results = asyncio.run(send_payouts(gateway, payouts, concurrency=4))
+
+    assert gateway.max_in_flight == 4
+    assert len(results) == 10
+    assert isinstance(results[3], BankGatewayError)
+    assert all(result is None for i, result in enumerate(results) if i != 3)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import pytest
+
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from payouts.idempotency import lookup, prune_expired, store
+from payouts.models import IdempotencyKey, Payout
+
+
+@pytest.fixture
+def payload(recipient):
+    return {"amount": "99.99", "currency": "RUB", "recipient_details": str(recipient.id)}
+
+
+@pytest.mark.django_db
+def test_create_with_idempotency_key_replays_response(api, payload, mocker):
+    """Тест: повтор запроса с тем же ключом возвращает исходный ответ без новой заявки"""
+    scheduled = mocker.patch("payouts.views.schedule_payouts")
+    url = reverse("payout-list")
+
+    first = api.post(url, payload, format="json", headers={"Idempotency-Key": "run-1"})
+    serializer = mocker.patch("payouts.views.PayoutViewSet.get_serializer")
+    second = api.post(url, payload, format="json", headers={"Idempotency-Key": "run-1"})
+
+    assert first.status_code == second.status_code == 201
+    assert second.content == first.content
+    assert second["Content-Type"] == first["Content-Type"]
+    assert second["Idempotent-Replayed"] == "true"
+    assert Payout.objects.count() == 1
+    scheduled.assert_called_once()
+    serializer.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_replay_identical_from_cache_and_database(api, payload, mocker, settings):
+    """Тест: повтор из кэша и из базы отдает исходное тело байт в байт"""
+    mocker.patch("payouts.views.schedule_payouts")
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    url = reverse("payout-list")
+    headers = {"Idempotency-Key": "run-tiers", "Accept": "application/msgpack"}
+
+    first = api.post(url, payload, format="json", headers=headers)
+    cached = api.post(url, payload, format="json", headers=headers)
+    caches["default"].clear()
+    from_database = api.post(url, payload, format="json", headers=headers)
+
+    assert first["Content-Type"] == "application/msgpack"
+    for replayed in (cached, from_database):
+        assert replayed.content == first.content
+        assert replayed["Content-Type"] == first["Content-Type"]
+        assert replayed["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.django_db
+def test_create_with_reused_idempotency_key(api, payload, mocker):
+    """Тест: тот же ключ с другим телом запроса отклоняется"""
+    mocker.patch("payouts.views.schedule_payouts")
+    url = reverse("payout-list")
+
+    api.post(url, payload, format="json", headers={"Idempotency-Key": "run-2"})
+    response = api.post(
+        url, {**payload, "amount": "1.00"}, format="json", headers={"Idempotency-Key": "run-2"}
+    )
+
+    assert response.status_code == 422
+    assert Payout.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_create_with_expired_idempotency_key(api, payload, mocker):
+    """Тест: после истечения срока ключ можно использовать заново"""
+    mocker.patch("payouts.views.schedule_payouts")
+    url = reverse("payout-list")
+
+    api.post(url, payload, format="json", headers={"Idempotency-Key": "run-3"})
+    IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    response = api.post(url, payload, format="json", headers={"Idempotency-Key": "run-3"})
+
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response
+    assert Payout.objects.count() == 2
+    assert IdempotencyKey.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_create_without_idempotency_key_not_stored(api, payload, mocker):
+    """Тест: без заголовка ключ не сохраняется"""
+    mocker.patch("payouts.views.schedule_payouts")
+
+    api.post(reverse("payout-list"), payload, format="json")
+
+    assert not IdempotencyKey.objects.exists()
+
+
+@pytest.mark.django_db
+def test_lookup_and_prune_expired():
+    """Тест: просроченные ключи не находятся и удаляются порциями"""
+    for i in range(3):
+        store(f"key-{i}", "hash", 201, b'{"id":%d}' % i, "application/json")
+    assert lookup("key-0")["response_body"] == b'{"id":0}'
+
+    IdempotencyKey.objects.exclude(key="key-2").update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+
+    assert lookup("key-0") is None
+    assert prune_expired(batch_size=1) == 2
+    assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["key-2"]
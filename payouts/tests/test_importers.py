@@ -0,0 +1,56 @@
+import io
+
+from payouts.importers import (
+    IMPORT_FORMAT_CSV,
+    IMPORT_FORMAT_JSONL,
+    iter_batches,
+    iter_source_rows,
+    validate_recipient_row,
+)
+
+
+def test_validate_recipient_row_valid(valid_recipient_data):
+    """Тест: валидная строка проходит проверку без ошибок"""
+    clean, errors = validate_recipient_row(valid_recipient_data)
+    assert errors == {}
+    assert clean == valid_recipient_data
+
+
+def test_validate_recipient_row_invalid(valid_recipient_data):
+    """Тест: ошибки собираются по каждому полю"""
+    row = {**valid_recipient_data, "inn": "123", "corr_account": "10101810400000000225"}
+    del row["full_name"]
+
+    clean, errors = validate_recipient_row(row)
+
+    assert set(errors) == {"inn", "corr_account", "full_name"}
+    assert "ИНН" in errors["inn"]
+    assert "inn" not in clean
+
+
+def test_iter_source_rows_csv(valid_recipient_data):
+    """Тест: чтение CSV с номерами строк"""
+    source = io.StringIO(
+        ",".join(valid_recipient_data) + "\n" + ",".join(valid_recipient_data.values()) + "\n"
+    )
+
+    rows = list(iter_source_rows(source, IMPORT_FORMAT_CSV))
+
+    assert rows == [(2, valid_recipient_data)]
+
+
+def test_iter_source_rows_jsonl_broken_line():
+    """Тест: некорректная строка JSONL превращается в ошибку, а не прерывает импорт"""
+    source = io.StringIO('{"inn": "7701000000"}\n\nnot json\n[1]\n')
+
+    rows = list(iter_source_rows(source, IMPORT_FORMAT_JSONL))
+
+    assert rows[0] == (1, {"inn": "7701000000"})
+    assert [line for line, _ in rows] == [1, 3, 4]
+    assert validate_recipient_row(rows[1][1])[1]["non_field_errors"].startswith("Некорректный JSON")
+    assert "non_field_errors" in validate_recipient_row(rows[2][1])[1]
+
+
+def test_iter_batches():
+    """Тест: разбиение на пакеты"""
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
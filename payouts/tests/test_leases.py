@@ -0,0 +1,171 @@
+import time
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from django.utils import timezone
+
+from payouts.leases import (
+    extend_leases,
+    lease_fields,
+    lease_heartbeat,
+    recover_expired_leases,
+    worker_id,
+)
+from payouts.models import Payout
+from payouts.partitions import active_since
+from payouts.state_machine import transition
+from payouts.tasks import (
+    claim_pending_payouts,
+    process_payout_batch_logic,
+    process_payout_logic,
+    recover_expired_leases_task,
+)
+
+
+def make_processing(recipient, **fields):
+    return Payout.objects.create(
+        amount=Decimal("10"), recipient_details=recipient, status=Payout.Status.PROCESSING, **fields
+    )
+
+
+@pytest.mark.django_db
+def test_claim_sets_lease(recipient, settings):
+    """Тест: захваченная заявка получает идентификатор воркера и срок аренды."""
+    Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+
+    (payout,) = claim_pending_payouts(limit=10)
+
+    payout.refresh_from_db()
+    assert payout.worker_id == worker_id()
+    assert payout.lease_expires_at > timezone.now() + timedelta(
+        seconds=settings.PAYOUTS_LEASE_DURATION - 5
+    )
+
+
+@pytest.mark.django_db
+def test_extend_leases_only_own(recipient):
+    """Тест: продлевается аренда только своих заявок в PROCESSING."""
+    expires = timezone.now() + timedelta(seconds=1)
+    own = make_processing(recipient, worker_id=worker_id(), lease_expires_at=expires)
+    foreign = make_processing(recipient, worker_id="other:1", lease_expires_at=expires)
+
+    assert extend_leases([own, foreign]) == 1
+
+    own.refresh_from_db()
+    foreign.refresh_from_db()
+    assert own.lease_expires_at > expires
+    assert foreign.lease_expires_at == expires
+
+
+def test_lease_heartbeat_extends_while_running(settings, mocker):
+    """Тест: пока выполняется блок, аренда продлевается фоновым потоком."""
+    settings.PAYOUTS_LEASE_HEARTBEAT_INTERVAL = 0.01
+    extend = mocker.patch("payouts.leases.extend_leases", return_value=1)
+    mocker.patch("payouts.leases.connections")
+    payout = Payout(id="00000000-0000-0000-0000-000000000001")
+
+    with lease_heartbeat([payout]):
+        time.sleep(0.1)
+    calls = extend.call_count
+    time.sleep(0.05)
+
+    assert calls > 0
+    assert extend.call_count == calls
+    extend.assert_called_with([payout])
+
+
+@pytest.mark.django_db
+def test_extend_lease_of_old_partition_payout(recipient):
+    """Тест: аренда заявки старше active_since() после захвата тоже продлевается."""
+    payout = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    Payout.objects.filter(id=payout.id).update(created_at=active_since() - timedelta(days=1))
+    payout.refresh_from_db()
+    assert transition(payout, Payout.Status.PROCESSING, **lease_fields())
+    expires = payout.lease_expires_at
+
+    assert extend_leases([payout]) == 1
+
+    payout.refresh_from_db()
+    assert payout.lease_expires_at > expires
+
+
+@pytest.mark.django_db
+def test_recover_expired_leases(recipient, settings):
+    """Тест: заявки с истекшей арендой возвращаются в очередь с расходом попытки."""
+    settings.PAYOUTS_RETRY_MAX_ATTEMPTS = 3
+    now = timezone.now()
+    expired = make_processing(recipient, worker_id="gone:1", lease_expires_at=now - timedelta(1))
+    exhausted = make_processing(
+        recipient, worker_id="gone:1", lease_expires_at=now - timedelta(1), attempt_count=2
+    )
+    alive = make_processing(recipient, worker_id="alive:1", lease_expires_at=now + timedelta(1))
+    manual = make_processing(recipient)
+
+    assert recover_expired_leases(batch_size=10) == {
+        Payout.Status.PENDING: 1,
+        Payout.Status.FAILED: 1,
+    }
+    assert recover_expired_leases_task() == {"recovered": 0, "failed": 0}
+
+    expired.refresh_from_db()
+    assert expired.status == Payout.Status.PENDING
+    assert expired.attempt_count == 1
+    assert expired.next_attempt_at is not None
+    assert "gone:1" in expired.error_message
+    assert Payout.objects.get(id=exhausted.id).status == Payout.Status.FAILED
+    assert Payout.objects.get(id=alive.id).status == Payout.Status.PROCESSING
+    assert Payout.objects.get(id=manual.id).status == Payout.Status.PROCESSING
+
+
+def recover_and_reclaim(payout_id) -> None:
+    """Аренда истекает, заявка возвращается в очередь и ее захватывает другой воркер."""
+    Payout.objects.filter(id=payout_id).update(lease_expires_at=timezone.now() - timedelta(1))
+    assert recover_expired_leases(batch_size=10)[Payout.Status.PENDING] == 1
+    with patch("payouts.leases.worker_id", return_value="other:1"):
+        payout = Payout.objects.get(id=payout_id)
+        assert transition(payout, Payout.Status.PROCESSING, next_attempt_at=None, **lease_fields())
+
+
+@pytest.mark.django_db
+def test_stale_worker_cannot_complete_reclaimed_payout(recipient, mocker):
+    """Тест: воркер с истекшей арендой не завершает заявку, захваченную другим воркером."""
+    payout = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+
+    def execute(claimed):
+        # Банковский вызов длится дольше аренды
+        recover_and_reclaim(claimed.id)
+        return True
+
+    mocker.patch("payouts.tasks.execute_payout", side_effect=execute)
+
+    assert process_payout_logic(str(payout.id))["status"] == "conflict"
+    payout.refresh_from_db()
+    assert payout.status == Payout.Status.PROCESSING
+    assert payout.worker_id == "other:1"
+
+
+@pytest.mark.django_db
+def test_stale_batch_worker_cannot_complete_reclaimed_payouts(recipient, mocker):
+    """Тест: пакетный воркер записывает результаты только заявок, аренда которых за ним."""
+    stale = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    own = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+
+    async def results(count):
+        return [None] * count
+
+    def send_payouts(gateway, payouts, concurrency):
+        recover_and_reclaim(stale.id)
+        return results(len(payouts))
+
+    mocker.patch("payouts.tasks.send_payouts", new=send_payouts)
+
+    result = process_payout_batch_logic(limit=10)
+
+    assert (result["completed"], result["conflicts"]) == (1, 1)
+    assert Payout.objects.get(id=own.id).status == Payout.Status.COMPLETED
+    stale.refresh_from_db()
+    assert (stale.status, stale.worker_id) == (Payout.Status.PROCESSING, "other:1")
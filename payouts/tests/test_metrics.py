@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+import pytest
+
+from prometheus_client import REGISTRY
+from rest_framework.reverse import reverse
+
+from payouts.metrics import record_db_pool
+from payouts.models import Payout
+from payouts.state_machine import bulk_transition, transition
+from payouts.tasks import process_payout_task
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(api, recipient):
+    """Тест: /metrics отдает гистограмму запросов по действиям и глубину очереди"""
+    Payout.objects.create(amount=Decimal("100"), recipient_details=recipient)
+    labels = {"view": "PayoutViewSet", "action": "list", "method": "GET", "status": "200"}
+    before = sample("payouts_api_request_duration_seconds_count", **labels)
+
+    api.get(reverse("payout-list"))
+    response = api.get("/metrics")
+
+    assert response.status_code == 200
+    assert sample("payouts_api_request_duration_seconds_count", **labels) == before + 1
+    assert 'payouts_queue_depth{queue="pending"} 1.0' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_transition_metrics(recipient):
+    """Тест: переходы статусов учитываются в счетчике"""
+    payouts = [
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient) for _ in range(3)
+    ]
+    labels = {"from_status": "pending", "to_status": "processing"}
+    before = sample("payouts_status_transitions_total", **labels)
+
+    transition(payouts[0], Payout.Status.PROCESSING)
+    bulk_transition(payouts[1:], Payout.Status.PROCESSING)
+
+    assert sample("payouts_status_transitions_total", **labels) == before + 3
+
+
+@pytest.mark.django_db
+def test_task_outcome_metrics(recipient, mocker):
+    """Тест: результат и длительность задачи учитываются по имени задачи"""
+    mocker.patch("payouts.tasks.validate_payout", return_value=False)
+    payout = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    task = process_payout_task.name
+    before = sample("payouts_task_outcomes_total", task=task, outcome="failed")
+    duration_before = sample("payouts_task_duration_seconds_count", task=task)
+
+    process_payout_task.delay(str(payout.id))
+
+    assert sample("payouts_task_outcomes_total", task=task, outcome="failed") == before + 1
+    assert sample("payouts_task_duration_seconds_count", task=task) == duration_before + 1
+
+
+def test_record_db_pool():
+    """Тест: статистика пула соединений переводится в состояния и накопительные события"""
+    before = sample("payouts_db_pool_events_total", alias="default", event="lost")
+
+    record_db_pool(
+        "default",
+        {"pool_size": 4, "pool_available": 3, "connections_lost": 2, "requests_wait_ms": 1500},
+    )
+
+    assert sample("payouts_db_pool_connections", alias="default", state="idle") == 3
+    assert sample("payouts_db_pool_events_total", alias="default", event="lost") == before + 2
+    assert sample("payouts_db_pool_wait_seconds_total", alias="default") >= 1.5
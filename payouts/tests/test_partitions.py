@@ -0,0 +1,156 @@
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import override_settings
+from django.utils import timezone
+
+from payouts.models import Payout
+from payouts.partitions import (
+    Partition,
+    active_since,
+    create_partitions,
+    expire_partitions,
+    expired_partitions,
+    is_partitioned,
+    list_partitions,
+    missing_months,
+    month_start,
+    partition_name,
+)
+from payouts.tasks import sweep_stale_payouts_task
+
+
+def utc(year: int, month: int) -> datetime:
+    return datetime(year, month, 1, tzinfo=UTC)
+
+
+def test_month_start():
+    """Тест: сдвиг на месяцы переходит через границу года в обе стороны."""
+    assert month_start(date(2026, 11, 18), 2) == utc(2027, 1)
+    assert month_start(date(2026, 1, 31), -1) == utc(2025, 12)
+    assert partition_name(utc(2027, 1)) == "payouts_payout_p2027_01"
+
+
+def test_missing_months_skips_covered():
+    """Тест: месяцы, покрытые секцией legacy или месячной секцией, не создаются повторно."""
+    partitions = [
+        Partition("payouts_payout_legacy", None, utc(2026, 11)),
+        Partition("payouts_payout_p2026_12", utc(2026, 12), utc(2027, 1)),
+    ]
+
+    assert missing_months(partitions, date(2026, 10, 18), ahead=3) == [
+        utc(2026, 11),
+        utc(2027, 1),
+    ]
+
+
+def test_expired_partitions():
+    """Тест: устаревшей считается секция, целиком лежащая раньше срока хранения."""
+    partitions = [
+        Partition("payouts_payout_legacy", None, utc(2025, 11)),
+        Partition("payouts_payout_p2025_11", utc(2025, 11), utc(2025, 12)),
+        Partition("payouts_payout_p2025_12", utc(2025, 12), utc(2026, 1)),
+    ]
+
+    expired = expired_partitions(partitions, date(2026, 12, 18), retention_months=12)
+
+    assert [p.name for p in expired] == ["payouts_payout_legacy", "payouts_payout_p2025_11"]
+
+
+@pytest.mark.django_db
+def test_manage_payout_partitions_requires_partitioned_table():
+    """Тест: без секционированной таблицы команда завершается ошибкой."""
+    with pytest.raises(CommandError, match="не секционирована"):
+        call_command("manage_payout_partitions")
+
+
+@pytest.mark.django_db
+def test_sweep_stale_payouts(recipient, mocker):
+    """Тест: активные заявки старше active_since() возвращаются в очередь полным проходом."""
+    mocked = mocker.patch("payouts.tasks.enqueue_payouts")
+    pending, processing, recent = (
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient) for _ in range(3)
+    )
+    old = active_since() - timedelta(days=1)
+    Payout.objects.filter(id=pending.id).update(created_at=old)
+    Payout.objects.filter(id=processing.id).update(
+        created_at=old,
+        status=Payout.Status.PROCESSING,
+        worker_id="lost:1",
+        lease_expires_at=timezone.now() - timedelta(minutes=1),
+    )
+
+    assert sweep_stale_payouts_task() == {"stale": 2, "sent": 1, "recovered": 1, "failed": 0}
+
+    assert mocked.call_args.args[0] == [str(pending.id)]
+    processing.refresh_from_db()
+    assert (processing.status, processing.attempt_count) == (Payout.Status.PENDING, 1)
+    recent.refresh_from_db()
+    assert recent.next_attempt_at is None
+
+
+MIGRATION_SCHEMA = "migration_check"
+
+
+@pytest.fixture
+def migration_schema():
+    """Пустая схема PostgreSQL первой в search_path: миграции выполняются с нуля."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {MIGRATION_SCHEMA}")
+        cursor.execute(f"SET search_path TO {MIGRATION_SCHEMA}")
+    try:
+        with override_settings(MIGRATION_MODULES={}):
+            yield MigrationExecutor(connection)
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("RESET search_path")
+            cursor.execute(f"DROP SCHEMA {MIGRATION_SCHEMA} CASCADE")
+
+
+@pytest.mark.postgres
+@pytest.mark.django_db(transaction=True)
+def test_partitioning_migration_and_management(migration_schema, mocker):
+    """
+    Тест: миграция 0012 подключает заполненную таблицу секцией legacy, после чего
+    секции создаются и отсоединяются; секция с активными заявками не отсоединяется.
+    """
+    executor = migration_schema
+    before = [("payouts", "0011_payout_task_result")]
+    executor.migrate(before)
+    apps = executor.loader.project_state(before).apps
+    recipient = apps.get_model("payouts", "RecipientDetails").objects.first()
+    OldPayout = apps.get_model("payouts", "Payout")
+    completed = OldPayout.objects.create(
+        amount=Decimal("10"), recipient_details=recipient, status=Payout.Status.COMPLETED
+    )
+    pending = OldPayout.objects.create(amount=Decimal("20"), recipient_details=recipient)
+    OldPayout.objects.update(created_at=datetime(2020, 1, 15, tzinfo=UTC))
+
+    executor.loader.build_graph()
+    executor.migrate(executor.loader.graph.leaf_nodes("payouts"))
+
+    assert is_partitioned()
+    partitions = list_partitions()
+    assert partitions[0].name == "payouts_payout_legacy"
+    assert len(partitions) == 4
+    assert set(Payout.objects.values_list("id", flat=True)) == {completed.id, pending.id}
+
+    created = create_partitions(ahead=4)
+    assert created == [partition_name(month_start(timezone.now(), 4))]
+
+    # Через три года все секции старше срока хранения
+    later = timezone.now() + timedelta(days=3 * 366)
+    mocker.patch("payouts.partitions.timezone.now", return_value=later)
+    detached = expire_partitions(retention_months=12)
+    assert "payouts_payout_legacy" not in detached
+    assert len(detached) == 4
+
+    Payout.objects.filter(id=pending.id).update(status=Payout.Status.CANCELLED)
+    assert expire_partitions(retention_months=12, drop=True) == ["payouts_payout_legacy"]
+
+    assert list_partitions() == []
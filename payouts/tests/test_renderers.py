@@ -0,0 +1,108 @@
+import datetime
+import io
+import uuid
+
+from decimal import Decimal
+
+import msgpack
+import pytest
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from payouts.parsers import MessagePackParser, OrjsonParser
+from payouts.renderers import MessagePackRenderer, OrjsonRenderer
+
+
+PAYLOAD = ReturnDict(
+    {
+        "id": uuid.UUID("e7c6c4e7-a094-466e-86f6-99e6da3426e3"),
+        "amount": "6542.02",
+        "created_at": datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.UTC),
+        "local": datetime.datetime(
+            2024, 5, 1, 15, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=3))
+        ),
+        "day": datetime.date(2024, 5, 1),
+        "description": "Выплата по договору №1",
+        "errors": [ErrorDetail("Обязательное поле.", code="required")],
+        "lazy": gettext_lazy("Ошибка"),
+        "nested": {"count": 3, "flag": True, "empty": None},
+    },
+    serializer=None,
+)
+
+
+def test_orjson_renderer_matches_drf():
+    """Тест: вывод orjson совпадает с JSONRenderer DRF побайтно"""
+    assert OrjsonRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+    assert OrjsonRenderer().render(None) == b""
+
+
+def test_orjson_renderer_indent_fallback():
+    """Тест: запрос с отступом обрабатывается стандартным рендерером"""
+    media_type = "application/json; indent=4"
+    assert OrjsonRenderer().render(PAYLOAD, media_type) == JSONRenderer().render(
+        PAYLOAD, media_type
+    )
+
+
+def test_orjson_renderer_exact_decimal():
+    """Тест: Decimal выводится точным числом без округления через float"""
+    data = {"amount": Decimal("12345678901234567.10")}
+
+    assert OrjsonRenderer().render(data) == b'{"amount":12345678901234567.10}'
+    with pytest.raises(TypeError):
+        OrjsonRenderer().render({"amount": Decimal("NaN")})
+
+
+def test_orjson_parser():
+    """Тест: парсер разбирает JSON и отклоняет некорректное тело"""
+    parser = OrjsonParser()
+
+    assert parser.parse(_stream(b'{"amount": 10.5, "currency": "RUB"}')) == {
+        "amount": 10.5,
+        "currency": "RUB",
+    }
+    with pytest.raises(ParseError):
+        parser.parse(_stream(b'{"amount": NaN}'))
+
+
+def test_msgpack_round_trip():
+    """Тест: msgpack кодирует Decimal строкой, а даты — как в JSON"""
+    data = {"amount": Decimal("10.50"), "created_at": timezone.now(), "id": uuid.uuid4()}
+
+    decoded = MessagePackParser().parse(_stream(MessagePackRenderer().render(data)))
+
+    assert decoded == {
+        "amount": "10.50",
+        "created_at": data["created_at"].isoformat().replace("+00:00", "Z"),
+        "id": str(data["id"]),
+    }
+
+
+@pytest.mark.django_db
+def test_msgpack_content_negotiation(api, recipient, payout, mocker):
+    """Тест: msgpack выбирается заголовком Accept и принимается в теле запроса"""
+    response = api.get(
+        reverse("payout-detail", args=[payout.id]), HTTP_ACCEPT="application/msgpack"
+    )
+
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["id"] == str(payout.id)
+
+    mocker.patch("payouts.views.schedule_payouts")
+    body = msgpack.packb(
+        {"amount": "10.00", "currency": "RUB", "recipient_details": str(recipient.id)}
+    )
+    response = api.post(reverse("payout-list"), body, content_type="application/msgpack")
+
+    assert response.status_code == 201
+    assert response.json()["amount"] == "10.00"
+
+
+def _stream(content: bytes):
+    return io.BytesIO(content)
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from payouts.models import Payout
+from payouts.retries import backoff_delay, schedule_retries
+from payouts.tasks import process_payout_logic, process_payout_task, sweep_retries
+
+
+def test_backoff_delay(settings):
+    """Тест: задержка растет экспоненциально и ограничена сверху."""
+    settings.PAYOUTS_RETRY_BASE_DELAY = 10
+    settings.PAYOUTS_RETRY_MAX_DELAY = 100
+
+    assert 5 <= backoff_delay(1) <= 10
+    assert 20 <= backoff_delay(3) <= 40
+    assert 50 <= backoff_delay(10) <= 100
+
+
+@pytest.mark.django_db
+def test_process_payout_task_schedules_retry(recipient):
+    """Тест: ошибка банка возвращает заявку в PENDING со временем следующей попытки."""
+    payout = Payout.objects.create(amount=Decimal("50"), recipient_details=recipient)
+
+    with patch("random.random", return_value=0.05):
+        result = process_payout_task.delay(str(payout.id)).get()
+
+    assert result["status"] == "retry_scheduled"
+    payout.refresh_from_db()
+    assert payout.status == Payout.Status.PENDING
+    assert payout.attempt_count == 1
+    assert payout.next_attempt_at > timezone.now()
+    assert payout.error_message == "Ошибка при выполнении банковской операции"
+
+
+@pytest.mark.django_db
+def test_process_payout_task_attempts_exhausted(recipient, settings):
+    """Тест: после PAYOUTS_RETRY_MAX_ATTEMPTS ошибок заявка переводится в FAILED."""
+    settings.PAYOUTS_RETRY_MAX_ATTEMPTS = 2
+    payout = Payout.objects.create(
+        amount=Decimal("50"), recipient_details=recipient, attempt_count=1
+    )
+
+    with patch("random.random", return_value=0.05):
+        result = process_payout_task.delay(str(payout.id)).get()
+
+    assert result["status"] == "failed_final"
+    payout.refresh_from_db()
+    assert payout.status == Payout.Status.FAILED
+    assert payout.attempt_count == 2
+    assert payout.next_attempt_at is None
+
+
+@pytest.mark.django_db
+def test_schedule_retries_per_payout_attempts(recipient, settings):
+    """Тест: пакетное планирование учитывает номер попытки каждой заявки."""
+    settings.PAYOUTS_RETRY_MAX_ATTEMPTS = 3
+    payouts = [
+        Payout.objects.create(
+            amount=Decimal("10"),
+            recipient_details=recipient,
+            status=Payout.Status.PROCESSING,
+            attempt_count=attempts,
+        )
+        for attempts in (0, 2)
+    ]
+
+    counts = schedule_retries(payouts, [ConnectionError("timeout")] * 2)
+
+    assert counts == {Payout.Status.PENDING: 1, Payout.Status.FAILED: 1}
+    retried, exhausted = (Payout.objects.get(id=payout.id) for payout in payouts)
+    assert (retried.status, retried.attempt_count) == (Payout.Status.PENDING, 1)
+    assert retried.next_attempt_at is not None
+    assert (exhausted.status, exhausted.attempt_count) == (Payout.Status.FAILED, 3)
+
+
+@pytest.mark.django_db
+def test_sweep_retries_publishes_due(recipient, settings, mocker):
+    """Тест: публикуются только заявки с наступившим сроком, срок сдвигается на время доставки."""
+    mocked = mocker.patch("payouts.tasks.enqueue_payouts")
+    now = timezone.now()
+    due = Payout.objects.create(
+        amount=Decimal("10"), recipient_details=recipient, next_attempt_at=now - timedelta(1)
+    )
+    Payout.objects.create(
+        amount=Decimal("10"), recipient_details=recipient, next_attempt_at=now + timedelta(1)
+    )
+    Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+
+    assert sweep_retries(batch_size=10) == 1
+    assert sweep_retries(batch_size=10) == 0
+
+    assert mocked.call_args.args[0] == [str(due.id)]
+    due.refresh_from_db()
+    assert due.next_attempt_at == now - timedelta(1)
+    assert due.lease_expires_at >= now + timedelta(
+        seconds=settings.PAYOUTS_RETRY_REDELIVERY_TIMEOUT
+    )
+
+
+@pytest.mark.django_db
+def test_process_payout_skips_until_next_attempt(recipient, mocker):
+    """Тест: заявка не захватывается до времени следующей попытки, после публикации - захватывается."""
+    mocker.patch("payouts.tasks.enqueue_payouts")
+    mocker.patch("payouts.tasks.execute_payout", return_value=True)
+    payout = Payout.objects.create(
+        amount=Decimal("10"),
+        recipient_details=recipient,
+        attempt_count=1,
+        next_attempt_at=timezone.now() + timedelta(minutes=5),
+    )
+
+    assert process_payout_logic(str(payout.id))["status"] == "skipped"
+    payout.refresh_from_db()
+    assert (payout.status, payout.attempt_count) == (Payout.Status.PENDING, 1)
+
+    Payout.objects.filter(id=payout.id).update(next_attempt_at=timezone.now() - timedelta(1))
+    assert sweep_retries(batch_size=10) == 1
+    assert process_payout_logic(str(payout.id))["status"] == "completed"
+
+
+@pytest.mark.django_db
+def test_list_payouts_retry_filters(api, recipient):
+    """Тест: состояние повторов доступно в API и по нему можно фильтровать список."""
+    scheduled = Payout.objects.create(
+        amount=Decimal("10"),
+        recipient_details=recipient,
+        attempt_count=2,
+        next_attempt_at=timezone.now(),
+    )
+    Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+
+    response = api.get(reverse("payout-list"), {"retry_scheduled": "true"})
+    assert [item["id"] for item in response.data["results"]] == [str(scheduled.id)]
+    assert response.data["results"][0]["attempt_count"] == 2
+
+    response = api.get(reverse("payout-list"), {"min_attempts": 1})
+    assert [item["id"] for item in response.data["results"]] == [str(scheduled.id)]
+
+    response = api.get(reverse("payout-list"), {"retry_scheduled": "false"})
+    assert str(scheduled.id) not in [item["id"] for item in response.data["results"]]
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+import pytest
+
+from django.core.management import CommandError, call_command
+
+from payouts.models import Payout, PayoutOutbox
+from payouts.routing import Route, get_route, route_payout
+from payouts.tasks import relay_outbox, schedule_payouts
+
+
+def make_payout(recipient, amount, currency="RUB"):
+    return Payout(amount=Decimal(amount), currency=currency, recipient_details=recipient)
+
+
+@pytest.mark.django_db
+def test_route_payout_default_rules(recipient):
+    """Тест: крупные заявки идут в срочную очередь, мелкие - в массовую."""
+    assert route_payout(make_payout(recipient, "1000000")) == Route("payouts_urgent", 0)
+    assert route_payout(make_payout(recipient, "999.99")) == Route("payouts_bulk", 9)
+    assert route_payout(make_payout(recipient, "1000")) == Route("payouts_default", 5)
+
+
+@pytest.mark.django_db
+def test_route_payout_first_matching_rule(recipient, settings):
+    """Тест: правила по валюте и БИК, срабатывает первое подходящее."""
+    settings.PAYOUTS_QUEUE_ROUTES = [
+        {"queue": "payouts_urgent", "biks": [recipient.bik], "currencies": ["USD"]},
+        {"queue": "payouts_bulk", "biks": [recipient.bik]},
+    ]
+
+    assert route_payout(make_payout(recipient, "10", "USD")).queue == "payouts_urgent"
+    assert route_payout(make_payout(recipient, "10")).queue == "payouts_bulk"
+
+
+def test_get_route_unknown_queue_falls_back_to_default():
+    """Тест: сообщение с очередью, удаленной из настроек, публикуется в очередь по умолчанию."""
+    assert get_route("removed") == Route("payouts_default", 5)
+
+
+@pytest.mark.django_db
+def test_relay_outbox_publishes_to_routed_queues(recipient, mocker):
+    """Тест: очередь выбирается при создании и используется при ретрансляции outbox."""
+    single = mocker.patch("payouts.tasks.process_payout_task.apply_async")
+    grouped = mocker.patch("payouts.tasks.group")
+    urgent = Payout.objects.create(amount=Decimal("2000000"), recipient_details=recipient)
+    bulk = [
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient) for _ in range(2)
+    ]
+    schedule_payouts([urgent, *bulk])
+
+    assert dict(PayoutOutbox.objects.values_list("payout_id", "queue")) == {
+        urgent.id: "payouts_urgent",
+        bulk[0].id: "payouts_bulk",
+        bulk[1].id: "payouts_bulk",
+    }
+    assert relay_outbox(batch_size=10) == 3
+
+    single.assert_called_once_with(args=[str(urgent.id)], queue="payouts_urgent", priority=0)
+    grouped.return_value.apply_async.assert_called_once_with(queue="payouts_bulk", priority=9)
+
+
+def test_run_payout_worker_command(mocker):
+    """Тест: воркер очереди запускается с параллельностью из настроек."""
+    worker_main = mocker.patch("payouts.management.commands.run_payout_worker.app.worker_main")
+
+    call_command("run_payout_worker", "payouts_urgent", "--with-default")
+
+    argv = worker_main.call_args.kwargs["argv"]
+    assert argv[:5] == ["worker", "-Q", "payouts_urgent,celery", "-c", "8"]
+    with pytest.raises(CommandError):
+        call_command("run_payout_worker", "missing")
@@ -150,3 +150,16 @@ def test_payout_serializer_update_description_only(valid_payout_data):
     updated = serializer.save()
     assert updated.description == "Обновлённое описание"
     assert updated.amount == payout.amount
+
+
+@pytest.mark.django_db
+def test_payout_list_serializer_bulk_create(valid_payout_data):
+    """Тест: пакетный сериализатор сохраняет только валидные элементы."""
+    serializer = PayoutSerializer(data=[valid_payout_data, {"amount": "5.00"}], many=True)
+    assert serializer.is_valid(), serializer.errors
+    assert serializer.item_errors[0] == {}
+    assert "recipient_details" in serializer.item_errors[1]
+
+    payouts = serializer.save()
+    assert len(payouts) == 1
+    assert Payout.objects.get().status == Payout.Status.PENDING
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+import pytest
+
+from rest_framework.reverse import reverse
+
+from payouts.models import Payout, PayoutStats
+from payouts.state_machine import (
+    InvalidTransitionError,
+    bulk_transition,
+    can_transition,
+    transition,
+)
+
+
+def test_can_transition_system_only():
+    """Тест: возврат в очередь доступен только воркерам"""
+    assert can_transition(Payout.Status.PENDING, Payout.Status.PROCESSING)
+    assert not can_transition(Payout.Status.PROCESSING, Payout.Status.PENDING)
+    assert can_transition(Payout.Status.PROCESSING, Payout.Status.PENDING, system=True)
+    assert not can_transition(Payout.Status.COMPLETED, Payout.Status.PENDING, system=True)
+
+
+@pytest.mark.django_db
+def test_transition_compare_and_set(recipient):
+    """Тест: переход применяется только от прочитанного статуса"""
+    payout = Payout.objects.create(amount=Decimal("100"), recipient_details=recipient)
+    stale = Payout.objects.get(id=payout.id)
+
+    assert transition(payout, Payout.Status.PROCESSING)
+    assert payout.status == Payout.Status.PROCESSING
+
+    # Устаревшая копия видит PENDING, но в базе уже PROCESSING
+    assert not transition(stale, Payout.Status.CANCELLED)
+    assert Payout.objects.get(id=payout.id).status == Payout.Status.PROCESSING
+
+
+@pytest.mark.django_db
+def test_transition_invalid(recipient):
+    """Тест: недопустимый переход отклоняется без запроса к базе"""
+    payout = Payout.objects.create(amount=Decimal("100"), recipient_details=recipient)
+
+    with pytest.raises(InvalidTransitionError):
+        transition(payout, Payout.Status.COMPLETED)
+
+
+@pytest.mark.django_db
+def test_bulk_transition_skips_changed(recipient):
+    """Тест: пакетный переход пропускает заявки, измененные параллельно"""
+    payouts = [
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient) for _ in range(3)
+    ]
+    Payout.objects.filter(id=payouts[0].id).update(status=Payout.Status.CANCELLED)
+
+    changed = bulk_transition(payouts, Payout.Status.PROCESSING)
+
+    assert {p.id for p in changed} == {payouts[1].id, payouts[2].id}
+    assert Payout.objects.filter(status=Payout.Status.PROCESSING).count() == 2
+    processing = PayoutStats.objects.get(status=Payout.Status.PROCESSING)
+    assert (processing.count, processing.total_amount) == (2, Decimal("20.00"))
+
+
+@pytest.mark.django_db
+def test_partial_update_status_conflict(api, recipient, mocker):
+    """Тест: смена статуса, потерявшая гонку, возвращает 409"""
+    payout = Payout.objects.create(amount=Decimal("100"), recipient_details=recipient)
+    mocker.patch("payouts.serializers.transition", return_value=False)
+
+    url = reverse("payout-detail", args=[payout.id])
+    response = api.patch(url, {"status": Payout.Status.CANCELLED}, format="json")
+
+    assert response.status_code == 409
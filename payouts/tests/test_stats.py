@@ -0,0 +1,140 @@
+import threading
+import time
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from payouts.models import Payout, PayoutStats
+from payouts.serializers import PayoutSerializer
+from payouts.stats import rebuild_stats, record_created, record_transition
+
+
+def stats_snapshot():
+    return {
+        (s.currency, s.status): (s.count, s.total_amount)
+        for s in PayoutStats.objects.exclude(count=0)
+    }
+
+
+@pytest.mark.django_db
+def test_stats_on_create_and_transition(valid_payout_data):
+    """Тест: статистика обновляется при создании заявки и смене статуса"""
+    serializer = PayoutSerializer(data=valid_payout_data)
+    assert serializer.is_valid(), serializer.errors
+    payout = serializer.save()
+
+    assert stats_snapshot() == {("RUB", "pending"): (1, Decimal("1000.00"))}
+
+    payout.status = Payout.Status.PROCESSING
+    payout.save(update_fields=["status"])
+    record_transition(payout, Payout.Status.PENDING, Payout.Status.PROCESSING)
+
+    assert stats_snapshot() == {("RUB", "processing"): (1, Decimal("1000.00"))}
+
+
+@pytest.mark.django_db
+def test_stats_on_partial_update_and_destroy(api, valid_payout_data, mocker):
+    """Тест: статистика учитывает смену статуса и удаление через API"""
+    mocker.patch("payouts.views.schedule_payouts")
+    response = api.post(reverse("payout-list"), valid_payout_data, format="json")
+    url = reverse("payout-detail", args=[response.data["id"]])
+
+    api.patch(url, {"status": Payout.Status.CANCELLED}, format="json")
+    assert stats_snapshot() == {("RUB", "cancelled"): (1, Decimal("1000.00"))}
+
+    api.delete(url)
+    assert stats_snapshot() == {}
+
+
+@pytest.mark.django_db
+def test_rebuild_stats_matches_incremental(recipient, valid_payout_data):
+    """Тест: пересчет дает тот же результат, что и инкрементальное обновление"""
+    serializer = PayoutSerializer(data=[valid_payout_data] * 3, many=True)
+    assert serializer.is_valid()
+    serializer.save()
+    incremental = stats_snapshot()
+
+    PayoutStats.objects.all().delete()
+    today = timezone.localdate()
+    assert rebuild_stats(today, today) == 1
+
+    assert stats_snapshot() == incremental == {("RUB", "pending"): (3, Decimal("3000.00"))}
+
+
+@pytest.mark.django_db
+def test_rebuild_payout_stats_command(payout):
+    """Тест: команда пересчета восстанавливает статистику по существующим заявкам"""
+    out = StringIO()
+    call_command("rebuild_payout_stats", stdout=out)
+
+    assert "строк: 1" in out.getvalue()
+    assert stats_snapshot() == {("RUB", "pending"): (1, Decimal("1000.00"))}
+
+
+@pytest.mark.django_db
+def test_rebuild_payout_stats_command_rejects_chunk_days(payout):
+    """Тест: размер порции меньше дня отклоняется, а не зацикливает пересчет"""
+    with pytest.raises(CommandError, match="--chunk-days"):
+        call_command("rebuild_payout_stats", "--chunk-days", "0", stdout=StringIO())
+
+
+@pytest.mark.postgres
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_stats_keeps_concurrent_changes(payout):
+    """Тест: приращение параллельной транзакции не теряется при пересчете"""
+    written, rebuilding = threading.Event(), threading.Event()
+
+    def create_payout():
+        try:
+            with transaction.atomic():
+                created = Payout.objects.create(
+                    amount=payout.amount, recipient_details=payout.recipient_details
+                )
+                record_created([created])
+                written.set()
+                # Пересчет успевает начаться, пока транзакция не закоммичена
+                rebuilding.wait(5)
+                time.sleep(0.2)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=create_payout)
+    thread.start()
+    written.wait(5)
+    rebuilding.set()
+    today = timezone.localdate()
+    rebuild_stats(today, today)
+    thread.join()
+
+    assert stats_snapshot() == {("RUB", "pending"): (2, 2 * payout.amount)}
+
+
+@pytest.mark.django_db
+def test_stats_endpoint(api, valid_payout_data):
+    """Тест: эндпоинт статистики читает сводную таблицу с фильтрами"""
+    serializer = PayoutSerializer(data=valid_payout_data)
+    assert serializer.is_valid()
+    serializer.save()
+    url = reverse("payout-stats")
+
+    response = api.get(url, {"currency": "RUB"})
+    assert response.status_code == 200
+    assert response.data == [
+        {
+            "day": timezone.localdate().isoformat(),
+            "currency": "RUB",
+            "status": "pending",
+            "count": 1,
+            "total_amount": "1000.00",
+        }
+    ]
+
+    assert api.get(url, {"currency": "USD"}).data == []
+    assert api.get(url, {"date_from": "not-a-date"}).status_code == 400
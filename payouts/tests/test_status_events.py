@@ -0,0 +1,112 @@
+import asyncio
+
+import orjson
+import pytest
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+
+from payouts.models import Payout
+from payouts.state_machine import transition
+from payouts.status_events import EVENT_FIELDS, event_payload, get_listener
+
+
+def fetch_events(url: str, events=()) -> tuple:
+    """Запрос потока SSE; events передаются слушателю после ответа, до чтения потока."""
+
+    async def fetch():
+        response = await AsyncClient().get(url)
+        if not hasattr(response, "streaming_content"):
+            return response, b""
+        for payload in events:
+            get_listener().dispatch(payload)
+        return response, b"".join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(fetch)()
+
+
+def parse_events(body: bytes) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.decode().split("\n\n"):
+        lines = dict(
+            line.split(": ", 1) for line in block.splitlines() if line.startswith(("event", "data"))
+        )
+        if "event" in lines:
+            events.append((lines["event"], orjson.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.django_db
+def test_events_snapshot_matches_status_endpoint(client, payout):
+    """Тест: поток начинается с текущего статуса в формате эндпоинта статуса."""
+    payout.status = Payout.Status.COMPLETED
+    payout.save()
+    status = client.get(reverse("async-payout-status", args=[payout.id])).json()
+
+    response, body = fetch_events(reverse("async-payout-detail-events", args=[payout.id]))
+
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["X-Accel-Buffering"] == "no"
+    assert parse_events(body) == [
+        ("status", {name: status[name] for name in EVENT_FIELDS}),
+        ("end", {}),
+    ]
+
+
+@pytest.mark.django_db
+def test_events_stream_until_final_status(payout, recipient):
+    """Тест: изменения статусов передаются до финального статуса всех заявок набора."""
+    other = Payout.objects.create(
+        amount=payout.amount, currency=payout.currency, recipient_details=recipient
+    )
+    processing = {
+        **{name: getattr(payout, name) for name in EVENT_FIELDS},
+        "status": Payout.Status.PROCESSING,
+    }
+    completed = {**processing, "status": Payout.Status.COMPLETED}
+    deleted = {**{name: getattr(other, name) for name in EVENT_FIELDS}, "status": None}
+
+    url = f"{reverse('async-payout-events')}?id={payout.id}&id={other.id}&id={recipient.id}"
+    _, body = fetch_events(url, [event_payload(row) for row in (processing, completed, deleted)])
+
+    events = parse_events(body)
+    assert [(event, data.get("status")) for event, data in events] == [
+        ("status", Payout.Status.PENDING),
+        ("status", Payout.Status.PENDING),
+        ("status", Payout.Status.PROCESSING),
+        ("status", Payout.Status.COMPLETED),
+        ("status", None),
+        ("end", None),
+    ]
+
+
+@pytest.mark.django_db
+def test_events_validation(recipient):
+    """Тест: некорректные id - 400, несуществующие заявки - 404."""
+    response, _ = fetch_events(f"{reverse('async-payout-events')}?id=bad")
+    assert response.status_code == 400
+    response, _ = fetch_events(reverse("async-payout-events"))
+    assert response.status_code == 400
+    response, _ = fetch_events(reverse("async-payout-detail-events", args=[recipient.id]))
+    assert response.status_code == 404
+
+
+@pytest.mark.postgres
+@pytest.mark.django_db(transaction=True)
+def test_transition_notifies_listener(payout):
+    """Тест: переход статуса после коммита доставляется подписчику через LISTEN/NOTIFY."""
+
+    async def listen():
+        listener = get_listener()
+        queue = listener.subscribe([str(payout.id)])
+        try:
+            await listener.ready.wait()
+            await sync_to_async(transition)(payout, Payout.Status.PROCESSING)
+            return await asyncio.wait_for(queue.get(), 5)
+        finally:
+            listener.task.cancel()
+
+    payload = orjson.loads(async_to_sync(listen)())
+    assert payload["id"] == str(payout.id)
+    assert payload["status"] == Payout.Status.PROCESSING
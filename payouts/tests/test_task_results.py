@@ -0,0 +1,69 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from payouts.models import Payout, PayoutTaskResult
+from payouts.task_results import get_result_store
+from payouts.tasks import process_payout_batch_task, process_payout_task
+
+
+@pytest.mark.django_db
+def test_process_payout_task_records_outcome(recipient):
+    """Тест: после каждого выполнения задачи хранится только последний итог заявки."""
+    payout = Payout.objects.create(amount=Decimal("50"), recipient_details=recipient)
+
+    with patch("random.random", return_value=0.05):
+        process_payout_task.delay(str(payout.id))
+    assert get_result_store().get(str(payout.id))["outcome"] == "retry_scheduled"
+
+    Payout.objects.filter(id=payout.id).update(next_attempt_at=None)
+    with patch("random.random", return_value=0.5):
+        process_payout_task.delay(str(payout.id))
+
+    assert get_result_store().get(str(payout.id))["outcome"] == Payout.Status.COMPLETED
+    assert PayoutTaskResult.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_process_payout_batch_task_records_outcome_per_payout(recipient):
+    """Тест: пакетная задача записывает итог каждой заявки пакета."""
+    ok = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    invalid = Payout.objects.create(amount=Decimal("0"), recipient_details=recipient)
+
+    with patch("random.random", return_value=0.5):
+        process_payout_batch_task.delay()
+
+    store = get_result_store()
+    assert store.get(str(ok.id))["outcome"] == "completed"
+    assert store.get(str(invalid.id))["outcome"] == "failed"
+
+    failing = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    with patch("random.random", return_value=0.05):
+        process_payout_batch_task.delay()
+
+    assert store.get(str(failing.id))["outcome"] == "retry_scheduled"
+    assert PayoutTaskResult.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_prune_task_results_command():
+    """Тест: команда удаляет порциями только итоги старше заданного возраста."""
+    now = timezone.now()
+    PayoutTaskResult.objects.bulk_create(
+        PayoutTaskResult(payout_id=uuid4(), outcome="completed", finished_at=now - timedelta(2))
+        for _ in range(5)
+    )
+    fresh = PayoutTaskResult.objects.create(payout_id=uuid4(), outcome="failed", finished_at=now)
+
+    out = StringIO()
+    call_command("prune_task_results", "--older-than", "86400", "--batch-size", "2", stdout=out)
+
+    assert "Удалено итогов обработки: 5" in out.getvalue()
+    assert list(PayoutTaskResult.objects.values_list("payout_id", flat=True)) == [fresh.payout_id]
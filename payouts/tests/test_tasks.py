@@ -1,10 +1,21 @@
+from datetime import timedelta
 from decimal import Decimal
 from unittest.mock import patch
 
 import pytest
 
-from payouts.models import Payout
-from payouts.tasks import process_payout_logic
+from django.utils import timezone
+
+from payouts.models import Payout, PayoutOutbox
+from payouts.tasks import (
+    claim_pending_payouts,
+    enqueue_payouts,
+    process_payout_batch_logic,
+    process_payout_logic,
+    prune_outbox,
+    relay_outbox,
+    schedule_payouts,
+)
 
 
 @pytest.mark.django_db
@@ -52,3 +63,122 @@ def test_process_payout_logic_validation_failed(recipient):
         assert payout.status == Payout.Status.FAILED
         assert result["status"] == "failed"
         assert "Проверка данных" in payout.error_message
+
+
+@pytest.mark.django_db
+def test_claim_pending_payouts_limit(recipient):
+    """Проверяем захват пакета: только PENDING, не больше limit, перевод в PROCESSING"""
+
+    payouts = [
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient) for _ in range(3)
+    ]
+    done = Payout.objects.create(
+        amount=Decimal("10"), recipient_details=recipient, status=Payout.Status.COMPLETED
+    )
+
+    claimed = claim_pending_payouts(limit=2)
+
+    assert len(claimed) == 2
+    assert {p.status for p in claimed} == {Payout.Status.PROCESSING}
+    assert Payout.objects.filter(status=Payout.Status.PENDING).count() == 1
+    assert done.id not in {p.id for p in claimed}
+    assert {p.id for p in claimed} <= {p.id for p in payouts}
+
+
+@pytest.mark.django_db
+def test_process_payout_batch_logic(recipient):
+    """Проверяем пакетную обработку: успешные выполнены, ошибочные возвращены в PENDING"""
+
+    ok = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    invalid = Payout.objects.create(amount=Decimal("0"), recipient_details=recipient)
+
+    with patch("random.random", return_value=0.5), patch("time.sleep", return_value=None):
+        result = process_payout_batch_logic(limit=10)
+
+    assert result["claimed"] == 2
+    assert result["completed"] == 1
+    assert result["failed"] == 1
+    ok.refresh_from_db()
+    invalid.refresh_from_db()
+    assert ok.status == Payout.Status.COMPLETED
+    assert invalid.status == Payout.Status.FAILED
+
+    failing = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    with patch("random.random", return_value=0.05), patch("time.sleep", return_value=None):
+        result = process_payout_batch_logic(limit=10)
+
+    assert result["requeued"] == 1
+    failing.refresh_from_db()
+    assert failing.status == Payout.Status.PENDING
+
+
+@pytest.mark.django_db
+def test_process_payout_batch_logic_empty():
+    """Проверяем пакетную обработку без заявок"""
+
+    assert process_payout_batch_logic(limit=10) == {"status": "empty", "claimed": 0}
+
+
+def test_enqueue_payouts_batch_mode(settings, mocker):
+    """Проверяем, что в режиме batch публикуется по задаче на каждые PAYOUTS_BATCH_SIZE заявок"""
+
+    settings.PAYOUTS_PROCESSING_MODE = "batch"
+    settings.PAYOUTS_BATCH_SIZE = 2
+    mocked = mocker.patch("payouts.tasks.group")
+
+    enqueue_payouts(["a", "b", "c"])
+
+    signatures = mocked.call_args.args[0]
+    assert len(signatures) == 2
+    assert {s.task for s in signatures} == {"payouts.tasks.process_payout_batch_task"}
+
+
+@pytest.mark.django_db
+def test_relay_outbox_publishes_and_marks_sent(recipient, mocker):
+    """Проверяем ретрансляцию outbox: сообщения публикуются пакетами и помечаются отправленными"""
+
+    mocked = mocker.patch("payouts.tasks.enqueue_payouts")
+    payouts = [
+        Payout.objects.create(amount=Decimal("10"), recipient_details=recipient) for _ in range(3)
+    ]
+    schedule_payouts(payouts)
+
+    assert relay_outbox(batch_size=2) == 2
+    assert relay_outbox(batch_size=2) == 1
+    assert relay_outbox(batch_size=2) == 0
+
+    published = [pid for call in mocked.call_args_list for pid in call.args[0]]
+    assert published == [str(p.id) for p in payouts]
+    assert not PayoutOutbox.objects.filter(sent_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_relay_outbox_broker_error_keeps_messages(recipient, mocker):
+    """Проверяем, что при ошибке брокера сообщения остаются неотправленными"""
+
+    mocker.patch("payouts.tasks.enqueue_payouts", side_effect=ConnectionError("redis"))
+    payout = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    schedule_payouts([payout])
+
+    with pytest.raises(ConnectionError):
+        relay_outbox(batch_size=10)
+
+    assert PayoutOutbox.objects.filter(sent_at__isnull=True).count() == 1
+
+
+@pytest.mark.django_db
+def test_prune_outbox_deletes_old_sent_messages(recipient):
+    """Проверяем, что удаляются только отправленные сообщения старше срока хранения"""
+
+    payout = Payout.objects.create(amount=Decimal("10"), recipient_details=recipient)
+    now = timezone.now()
+    old = [
+        PayoutOutbox.objects.create(payout=payout, sent_at=now - timedelta(days=8))
+        for _ in range(3)
+    ]
+    recent = PayoutOutbox.objects.create(payout=payout, sent_at=now - timedelta(days=1))
+    unsent = PayoutOutbox.objects.create(payout=payout)
+
+    assert prune_outbox(retention=7 * 24 * 60 * 60, batch_size=2) == len(old)
+
+    assert set(PayoutOutbox.objects.values_list("id", flat=True)) == {recent.id, unsent.id}
@@ -1,16 +1,22 @@
+from datetime import timedelta
 from decimal import Decimal
 
 import pytest
 
+from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse
 
-from payouts.models import Payout
+from payouts.models import Payout, PayoutOutbox, RecipientDetails
+from payouts.serializers import PayoutSerializer
 
 
 @pytest.mark.django_db
-def test_create_payout_calls_task(api, recipient, mocker):
-    """Тест: при создании выплаты вызывается Celery-задача."""
-    mocked = mocker.patch("payouts.views.process_payout_task.delay")
+def test_create_payout_calls_task(
+    api, recipient, mocker, settings, django_capture_on_commit_callbacks
+):
+    """Тест: при создании выплаты в режиме direct вызывается Celery-задача."""
+    settings.PAYOUTS_DISPATCH_MODE = "direct"
+    mocked = mocker.patch("payouts.tasks.process_payout_task.apply_async")
 
     url = reverse("payout-list")
     payload = {
@@ -20,14 +26,30 @@ def test_create_payout_calls_task(api, recipient, mocker):
         "description": "Test payout",
     }
 
-    response = api.post(url, payload, format="json")
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api.post(url, payload, format="json")
 
     assert response.status_code == 201
     assert response.data["amount"] == "99.99"
     assert response.data["status"] == Payout.Status.PENDING
 
     payout_id = response.data["id"]
-    mocked.assert_called_once_with(payout_id)
+    mocked.assert_called_once_with(args=[payout_id], queue="payouts_bulk", priority=9)
+
+
+@pytest.mark.django_db
+def test_create_payout_writes_outbox(api, recipient, mocker):
+    """Тест: в режиме outbox создание заявки пишет сообщение outbox и не обращается к брокеру."""
+    mocked = mocker.patch("payouts.tasks.process_payout_task.delay")
+
+    payload = {"amount": "99.99", "currency": "RUB", "recipient_details": str(recipient.id)}
+    response = api.post(reverse("payout-list"), payload, format="json")
+
+    assert response.status_code == 201
+    message = PayoutOutbox.objects.get()
+    assert str(message.payout_id) == response.data["id"]
+    assert message.sent_at is None
+    mocked.assert_not_called()
 
 
 @pytest.mark.django_db
@@ -105,3 +127,220 @@ def test_create_payout_missing_required_fields(api):
     assert response.status_code == 400
     assert "recipient_details" in response.data
     assert "amount" in response.data
+
+
+@pytest.mark.django_db
+def test_bulk_create_payouts_partial_errors(api, recipient, mocker):
+    """Тест: пакетное создание сохраняет валидные заявки и возвращает ошибки по невалидным."""
+    mocked = mocker.patch("payouts.views.schedule_payouts")
+
+    url = reverse("payout-bulk")
+    payload = [
+        {"amount": "10.00", "currency": "RUB", "recipient_details": str(recipient.id)},
+        {"amount": "-1", "currency": "RUB", "recipient_details": str(recipient.id)},
+        {"amount": "20.00", "currency": "USD", "recipient_details": str(recipient.id)},
+    ]
+
+    response = api.post(url, payload, format="json")
+
+    assert response.status_code == 201
+    assert len(response.data["created"]) == 2
+    assert len(response.data["errors"]) == 1
+    assert response.data["errors"][0]["index"] == 1
+    assert "amount" in response.data["errors"][0]["errors"]
+    assert Payout.objects.count() == 2
+    assert set(Payout.objects.values_list("status", flat=True)) == {Payout.Status.PENDING}
+
+    scheduled = mocked.call_args.args[0]
+    assert [str(payout.id) for payout in scheduled] == response.data["created"]
+
+
+@pytest.mark.django_db
+def test_bulk_create_payouts_all_invalid(api, mocker):
+    """Тест: если ни одна заявка не прошла валидацию — ответ 400."""
+    mocked = mocker.patch("payouts.views.schedule_payouts")
+
+    response = api.post(reverse("payout-bulk"), [{"amount": "1.00"}], format="json")
+
+    assert response.status_code == 400
+    assert response.data["created"] == []
+    assert "recipient_details" in response.data["errors"][0]["errors"]
+    assert Payout.objects.count() == 0
+    mocked.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_bulk_create_payouts_not_a_list(api):
+    """Тест: тело запроса должно быть списком."""
+    response = api.post(reverse("payout-bulk"), {"amount": "1.00"}, format="json")
+
+    assert response.status_code == 400
+    assert Payout.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_list_payouts_cursor_pagination(api, recipient):
+    """Тест: список заявок листается курсором без дублей и без поля count."""
+    payouts = Payout.objects.bulk_create(
+        [Payout(amount=Decimal("10.00"), recipient_details=recipient) for _ in range(5)]
+    )
+
+    url = f"{reverse('payout-list')}?page_size=2"
+    seen = []
+    while url:
+        response = api.get(url)
+        assert response.status_code == 200
+        assert "count" not in response.data
+        seen.extend(item["id"] for item in response.data["results"])
+        url = response.data["next"]
+
+    assert len(seen) == 5
+    assert set(seen) == {str(p.id) for p in payouts}
+
+
+@pytest.mark.django_db
+def test_list_recipients_cursor_pagination_same_names(api, valid_recipient_data):
+    """Тест: получатели с одинаковым именем листаются курсором вперед и назад без повторов."""
+    data = {**valid_recipient_data, "full_name": "ООО Ромашка"}
+    recipients = RecipientDetails.objects.bulk_create(
+        [RecipientDetails(**{**data, "inn": f"77010010{i:02d}"}) for i in range(7)]
+    )
+    expected = [str(r.id) for r in sorted(recipients, key=lambda r: str(r.id))]
+
+    url = f"{reverse('recipient-list')}?page_size=3"
+    pages = []
+    while url:
+        response = api.get(url)
+        pages.append([item["id"] for item in response.data["results"]])
+        url = response.data["next"]
+    assert [item for page in pages for item in page] == expected
+
+    previous = api.get(response.data["previous"]).data
+    assert [item["id"] for item in previous["results"]] == pages[-2]
+
+
+@pytest.mark.django_db
+def test_list_recipients_cursor_pagination(api, recipient):
+    """Тест: список получателей отдается курсорной страницей."""
+    response = api.get(reverse("recipient-list"))
+
+    assert response.status_code == 200
+    assert "count" not in response.data
+    assert response.data["next"] is None
+    assert [item["id"] for item in response.data["results"]] == [str(recipient.id)]
+
+
+@pytest.mark.django_db
+def test_list_payouts_filters(api, recipient, valid_recipient_data):
+    """Тест: фильтрация списка по статусу, валюте, получателю и ИНН."""
+    other = RecipientDetails.objects.create(**valid_recipient_data)
+    pending = Payout.objects.create(amount=Decimal("1.00"), recipient_details=recipient)
+    processing = Payout.objects.create(
+        amount=Decimal("2.00"), recipient_details=recipient, status=Payout.Status.PROCESSING
+    )
+    usd = Payout.objects.create(
+        amount=Decimal("3.00"),
+        recipient_details=other,
+        currency=Payout.Currency.USD,
+        status=Payout.Status.COMPLETED,
+    )
+    url = reverse("payout-list")
+
+    def ids(params):
+        response = api.get(url, params)
+        assert response.status_code == 200
+        return {item["id"] for item in response.data["results"]}
+
+    assert ids({"status": ["pending", "processing"]}) == {str(pending.id), str(processing.id)}
+    assert ids({"currency": "USD"}) == {str(usd.id)}
+    assert ids({"recipient_details": str(recipient.id)}) == {str(pending.id), str(processing.id)}
+    assert ids({"recipient_inn": other.inn}) == {str(usd.id)}
+    assert ids({"status": "pending", "currency": "RUB"}) == {str(pending.id)}
+
+
+@pytest.mark.django_db
+def test_list_payouts_filter_created_range(api, payout):
+    """Тест: фильтрация списка по периоду создания."""
+    url = reverse("payout-list")
+    created = payout.created_at
+
+    response = api.get(url, {"created_after": (created - timedelta(minutes=1)).isoformat()})
+    assert [item["id"] for item in response.data["results"]] == [str(payout.id)]
+
+    response = api.get(url, {"created_before": (created - timedelta(minutes=1)).isoformat()})
+    assert response.data["results"] == []
+
+
+@pytest.mark.django_db
+def test_list_payouts_invalid_filter(api):
+    """Тест: некорректные параметры фильтра возвращают 400."""
+    response = api.get(reverse("payout-list"), {"status": "unknown", "recipient_inn": "12"})
+
+    assert response.status_code == 400
+    assert "status" in response.data
+    assert "recipient_inn" in response.data
+
+
+@pytest.mark.django_db
+def test_export_payouts_streams_csv(api, payout):
+    """Тест: выгрузка заявок отдается потоковым CSV."""
+    response = api.get(reverse("payout-export"), {"status": "pending"})
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/csv")
+    content = b"".join(response.streaming_content).decode()
+    header, row = content.splitlines()
+    assert header.startswith("id,amount,currency,status")
+    assert row.startswith(f"{payout.id},1000.00,RUB,pending")
+
+
+@pytest.mark.django_db
+def test_export_payouts_streams_ndjson(api, payout):
+    """Тест: выгрузка заявок в NDJSON, фильтры применяются."""
+    response = api.get(reverse("payout-export"), {"export_format": "ndjson", "currency": "USD"})
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert b"".join(response.streaming_content) == b""
+
+
+@pytest.mark.django_db
+def test_export_payouts_invalid_format(api):
+    """Тест: неизвестный формат выгрузки возвращает 400."""
+    response = api.get(reverse("payout-export"), {"export_format": "xml"})
+
+    assert response.status_code == 400
+    assert "export_format" in response.data
+
+
+@pytest.mark.django_db
+def test_list_and_retrieve_match_serializer(api, recipient, payout):
+    """Тест: быстрый путь списка и карточки отдает те же байты, что и PayoutSerializer."""
+    Payout.objects.create(
+        amount=Decimal("12.30"),
+        currency=Payout.Currency.USD,
+        recipient_details=recipient,
+        status=Payout.Status.FAILED,
+        error_message="Ошибка банка",
+    )
+    payouts = Payout.objects.select_related("recipient_details").order_by("-created_at", "-id")
+    renderer = JSONRenderer()
+
+    response = api.get(reverse("payout-list"))
+    expected = renderer.render(PayoutSerializer(payouts, many=True).data)
+    assert renderer.render(response.data["results"]) == expected
+
+    response = api.get(reverse("payout-detail", args=[payout.id]))
+    assert response.content == renderer.render(PayoutSerializer(payout).data)
+
+
+@pytest.mark.django_db
+def test_list_payouts_sparse_fields(api, payout):
+    """Тест: параметр fields сужает набор полей ответа, неизвестные поля — 400."""
+    response = api.get(reverse("payout-list"), {"fields": "id,status"})
+
+    assert response.status_code == 200
+    assert response.data["results"] == [{"id": str(payout.id), "status": payout.status}]
+
+    response = api.get(reverse("payout-detail", args=[payout.id]), {"fields": "amount,secret"})
+    assert response.status_code == 400
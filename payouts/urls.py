@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from payouts import async_views
 from payouts.views import PayoutViewSet, RecipientDetailsViewSet
 
 
@@ -10,4 +11,28 @@ router.register(r"recipients", RecipientDetailsViewSet, basename="recipient")
 
 urlpatterns = [
     path("api/", include(router.urls)),
+    # Асинхронные версии горячих эндпоинтов, обслуживаются ASGI-сервером
+    path("api/async/payouts/", async_views.create_payout, name="async-payout-create"),
+    path(
+        "api/async/payouts/<uuid:id>/",
+        async_views.retrieve_payout,
+        name="async-payout-detail",
+    ),
+    path(
+        "api/async/payouts/<uuid:id>/status/",
+        async_views.payout_status,
+        name="async-payout-status",
+    ),
+    # Потоки Server-Sent Events с изменениями статусов вместо опроса
+    path("api/async/payouts/events/", async_views.payout_events, name="async-payout-events"),
+    path(
+        "api/async/payouts/<uuid:id>/events/",
+        async_views.payout_events,
+        name="async-payout-detail-events",
+    ),
+    path(
+        "api/async/recipients/<uuid:id>/",
+        async_views.retrieve_recipient,
+        name="async-recipient-detail",
+    ),
 ]
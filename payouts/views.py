@@ -1,12 +1,31 @@
 from typing import Any
 
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from payouts.models import Payout, RecipientDetails
-from payouts.serializers import PayoutSerializer, RecipientDetailsSerializer
-from payouts.tasks import process_payout_task
+from payouts import idempotency
+from payouts.archive import get_archived
+from payouts.exporters import EXPORT_CONTENT_TYPES, EXPORT_FORMAT_CSV, EXPORT_FORMATS, iter_export
+from payouts.filters import PayoutFilterBackend, filter_payouts, filter_stats
+from payouts.models import Payout, PayoutStats, RecipientDetails
+from payouts.pagination import PayoutCursorPagination, RecipientCursorPagination
+from payouts.serializers import (
+    PayoutReadRepresentation,
+    PayoutSerializer,
+    PayoutStatsSerializer,
+    PayoutStatusConflict,
+    RecipientDetailsSerializer,
+)
+from payouts.stats import record_transition
+from payouts.status_events import notify_deleted
+from payouts.tasks import schedule_payouts
 
 
 class RecipientDetailsViewSet(viewsets.ModelViewSet):
@@ -14,6 +33,7 @@ class RecipientDetailsViewSet(viewsets.ModelViewSet):
 
     queryset = RecipientDetails.objects.all()
     serializer_class = RecipientDetailsSerializer
+    pagination_class = RecipientCursorPagination
     lookup_field = "id"
 
 
@@ -22,20 +42,117 @@ class PayoutViewSet(viewsets.ModelViewSet):
 
     queryset = Payout.objects.select_related("recipient_details").all()
     serializer_class = PayoutSerializer
+    pagination_class = PayoutCursorPagination
+    filter_backends = [PayoutFilterBackend]
     lookup_field = "id"
 
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Создание заявки с запуском Celery задачи"""
+        key = idempotency.get_idempotency_key(request)
+        if key is not None:
+            fingerprint = idempotency.request_fingerprint(request)
+            stored = idempotency.lookup(key)
+            if stored is not None:
+                return idempotency.replay(stored, fingerprint)
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        payout = serializer.save()
 
-        # Запуск асинхронной обработки
-        process_payout_task.delay(str(payout.id))
+        # Заявка, задание на ее обработку и ключ идемпотентности фиксируются одной транзакцией
+        try:
+            with transaction.atomic():
+                payout = serializer.save()
+                schedule_payouts([payout])
+                out = PayoutSerializer(payout, context={"request": request}).data
+                response = Response(
+                    out, status=status.HTTP_201_CREATED, headers=self.get_success_headers(out)
+                )
+                if key is not None:
+                    # Сохраняется ответ в том виде, в каком его получит клиент
+                    response = self.finalize_response(request, response)
+                    response.render()
+                    idempotency.store(
+                        key,
+                        fingerprint,
+                        response.status_code,
+                        response.content,
+                        response["Content-Type"],
+                    )
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел создать заявку первым
+            stored = idempotency.lookup(key) if key is not None else None
+            if stored is None:
+                raise
+            return idempotency.replay(stored, fingerprint)
+
+        return response
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Список заявок: строки читаются через .values() и собираются без сериализаторов"""
+        representation = PayoutReadRepresentation.from_query_params(request.query_params)
+        queryset = self.filter_queryset(Payout.objects.all())
+        page = self.paginate_queryset(representation.values(queryset))
+        return self.get_paginated_response(representation.to_list(page))
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Карточка заявки через тот же быстрый путь, что и список"""
+        representation = PayoutReadRepresentation.from_query_params(request.query_params)
+        try:
+            row = get_object_or_404(
+                representation.values(Payout.objects.all()), id=kwargs[self.lookup_field]
+            )
+        except Http404:
+            # Заявка могла быть перенесена в архив
+            row = get_archived(kwargs[self.lookup_field])
+            if row is None:
+                raise
+        return Response(representation.to_representation(row))
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request: Request) -> Response:
+        """Пакетное создание заявок: валидные сохраняются, по невалидным возвращаются ошибки"""
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=settings.PAYOUTS_BULK_MAX_SIZE
+        )
+        serializer.is_valid(raise_exception=True)
 
-        out = PayoutSerializer(payout, context={"request": request}).data
-        headers = self.get_success_headers(out)
-        return Response(out, status=status.HTTP_201_CREATED, headers=headers)
+        with transaction.atomic():
+            payouts = serializer.save()
+            created = [str(payout.id) for payout in payouts]
+            if created:
+                schedule_payouts(payouts)
+
+        errors = [
+            {"index": index, "errors": item_errors}
+            for index, item_errors in enumerate(serializer.item_errors)
+            if item_errors
+        ]
+        out = {"created": created, "errors": errors}
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response(out, status=response_status)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """Потоковая выгрузка заявок в CSV или NDJSON с теми же фильтрами, что и у списка"""
+        export_format = request.query_params.get("export_format", EXPORT_FORMAT_CSV)
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"export_format": f"Допустимые форматы: {', '.join(EXPORT_FORMATS)}"}
+            )
+
+        queryset = filter_payouts(Payout.objects.all(), request.query_params)
+        response = StreamingHttpResponse(
+            iter_export(queryset, export_format, settings.PAYOUTS_EXPORT_CHUNK_SIZE),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="payouts.{export_format}"'
+        return response
+
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats(self, request: Request) -> Response:
+        """Сводная статистика по дням, валютам и статусам из инкрементальной таблицы"""
+        queryset = filter_stats(PayoutStats.objects.filter(count__gt=0), request.query_params)
+        return Response(PayoutStatsSerializer(queryset, many=True).data)
 
     def partial_update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Частичное обновление заявки"""
@@ -55,5 +172,11 @@ class PayoutViewSet(viewsets.ModelViewSet):
         """Удаление: в ответе возвращаем сериализованный объект (до удаления)"""
         instance = self.get_object()
         data = PayoutSerializer(instance, context={"request": request}).data
-        self.perform_destroy(instance)
+        with transaction.atomic():
+            # Удаление условно по прочитанному статусу, как и смена статуса
+            deleted, _ = Payout.objects.filter(id=instance.id, status=instance.status).delete()
+            if not deleted:
+                raise PayoutStatusConflict()
+            record_transition(instance, instance.status, None)
+            notify_deleted(instance)
         return Response(data, status=status.HTTP_200_OK)